@@ -0,0 +1,109 @@
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict
+
+from .database import db, SIGNAL_COLUMNS
+from .groups import GROUP_DIMENSIONS, natural_key
+
+WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+MAX_WINDOW = timedelta(days=30)
+# Windows up to this long are answered from the minute rollup, longer ones from the hourly one
+MINUTE_ROLLUP_MAX_WINDOW = timedelta(hours=6)
+
+def parse_window(window: str) -> timedelta:
+    """'15m', '1h', '7d' -> timedelta"""
+    match = re.fullmatch(r"(\d+)([mhd])", window or "")
+    if match is None:
+        raise ValueError("window must look like 15m, 1h or 7d")
+    span = timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+    if not timedelta(0) < span <= MAX_WINDOW:
+        raise ValueError("window must be between 1m and 30d")
+    return span
+
+class GroupAggregator:
+    """
+    Fleet readings aggregated per sector, line or model over a time window.
+
+    Answers come from the per-group rollups the database maintains at ingest, so the
+    cost depends on the number of groups and buckets, not machines. Results are cached
+    until the next committed tick or metadata change.
+    """
+    CACHE_SIZE = 64
+
+    def __init__(self, database=db):
+        self.database = database
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def aggregate(self, group_by: str, metric: str, window: str = "1h", series: bool = False) -> Dict:
+        if group_by not in GROUP_DIMENSIONS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_DIMENSIONS)}")
+        if metric not in SIGNAL_COLUMNS:
+            raise ValueError(f"metric must be one of {', '.join(SIGNAL_COLUMNS)}")
+        span = parse_window(window)
+
+        key = (group_by, metric, window, series, self.database.tick_id, self.database.groups.version)
+        result = self._cache.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = self._compute(group_by, metric, window, span, series)
+        with self._lock:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def _compute(self, group_by, metric, window, span, series) -> Dict:
+        resolution = "1m" if span <= MINUTE_ROLLUP_MAX_WINDOW else "1h"
+        rows = self.database.get_group_rollup(group_by, resolution, datetime.now() - span)
+
+        # 1. Fold the buckets of each group
+        groups = {}
+        for row in rows:
+            g = groups.get(row["grp"])
+            if g is None:
+                g = groups[row["grp"]] = {"count": 0, "sum": 0.0, "min": row[f"{metric}_min"],
+                                          "max": row[f"{metric}_max"], "series": []}
+            g["count"] += row["count"]
+            g["sum"] += row[f"{metric}_sum"]
+            g["min"] = min(g["min"], row[f"{metric}_min"])
+            g["max"] = max(g["max"], row[f"{metric}_max"])
+            if series:
+                g["series"].append({"bucket": row["bucket"], "count": row["count"],
+                                    "avg": round(row[f"{metric}_sum"] / row["count"], 2)})
+
+        # 2. Attach the group's machines and rated capacity
+        members = self.database.groups.members(group_by)
+        out = []
+        for name in sorted(groups, key=natural_key):
+            g = groups[name]
+            machines = members.get(name, [])
+            item = {
+                "group": name,
+                "count": g["count"],
+                "avg": round(g["sum"] / g["count"], 2),
+                "min": round(g["min"], 2),
+                "max": round(g["max"], 2),
+                "machines": len(machines),
+            }
+            if machines:
+                capacity = self.database.groups.rated_capacity(machines)
+                item["rated_capacity_kw"] = round(capacity, 1)
+                if metric == "power" and capacity:
+                    # Mean draw per machine relative to mean rated capacity per machine
+                    item["utilization_pct"] = round(100 * item["avg"] / (capacity / len(machines)), 1)
+            if series:
+                item["series"] = g["series"]
+            out.append(item)
+        return {"group_by": group_by, "metric": metric, "window": window, "resolution": resolution, "groups": out}
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else None}
+
+group_aggregator = GroupAggregator()
@@ -0,0 +1,187 @@
+import os
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from .database import db
+from .es_engine import es_engine
+from .snapshot import snapshot_cache
+from .metrics import ERRORS
+
+# Consecutive ticks a condition must be absent before its alert resolves (damps flapping)
+CLEAR_AFTER = int(os.getenv("SF_ALERT_CLEAR_TICKS", "2"))
+# Seconds between batched last_seen_at writes for ongoing alerts
+SEEN_FLUSH_INTERVAL = float(os.getenv("SF_ALERT_FLUSH_INTERVAL", "60"))
+# Transitions kept in memory for /api/alerts/events
+EVENT_BUFFER = 1000
+
+class AlertManager:
+    """
+    Alert lifecycle per (machine_id, condition).
+
+    An alert opens when a diagnosis first appears, stays open while it keeps firing and
+    resolves once it has been absent for `clear_after` consecutive ticks, or when a
+    technician logs a fix. It is evaluated once per committed tick from the shared
+    snapshot; only transitions are written (one transaction per tick, last_seen_at in
+    periodic batches) and open alerts are served from memory.
+    """
+    def __init__(self, database=db, cache=snapshot_cache, engine=es_engine,
+                 clear_after=CLEAR_AFTER, flush_interval=SEEN_FLUSH_INTERVAL):
+        self.database = database
+        self.cache = cache
+        self.engine = engine
+        self.clear_after = clear_after
+        self.flush_interval = flush_interval
+        self.open = {}       # (machine_id, condition) -> alert row
+        self._missed = {}    # (machine_id, condition) -> consecutive ticks absent
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_key = None
+        self._last_flush = time.monotonic()
+        self.events = deque(maxlen=EVENT_BUFFER)
+        self._seq = 0
+        self.opened_total = 0
+        self.resolved_total = 0
+        self.last_update_ms = None
+
+    def load(self):
+        """Resume the open alerts persisted by a previous run; updates are ignored until then"""
+        with self._lock:
+            self.open = {(a["machine_id"], a["condition"]): a for a in self.database.get_open_alerts()}
+            self._missed = {}
+            self._loaded = True
+        print(f"--- Alerts: {len(self.open)} open alerts resumed ---")
+
+    def _emit(self, kind, alert):
+        self._seq += 1
+        self.events.append({"seq": self._seq, "type": kind, "alert": dict(alert)})
+
+    def update(self) -> int:
+        """Ingest listener: diff the current diagnoses against the open alerts; returns the transition count"""
+        if not self._loaded:
+            return 0
+        start = time.perf_counter()
+        snapshot = self.cache.get()
+        with self._lock:
+            if snapshot.key == self._last_key:
+                return 0
+            severity = {r["diagnosis"]: r.get("severity") for r in self.engine.rules}
+
+            # 1. Current firing set; several rules may share a diagnosis name
+            current = {}
+            for d in snapshot.diagnoses:
+                key = (d.machine_id, d.condition)
+                if key not in current or d.confidence > current[key].confidence:
+                    current[key] = d
+
+            # 2. Transitions
+            now = datetime.now().isoformat()
+            opened = [key for key in current if key not in self.open]
+            resolved, missed, seen = [], {}, {}
+            for key, alert in self.open.items():
+                d = current.get(key)
+                if d is not None:
+                    seen[key] = d.timestamp.isoformat()
+                elif self._missed.get(key, 0) + 1 >= self.clear_after:
+                    resolved.append(key)
+                else:
+                    missed[key] = self._missed.get(key, 0) + 1
+
+            flush = time.monotonic() - self._last_flush >= self.flush_interval
+            if not opened and not resolved and not flush:
+                self._apply_seen(seen)
+                self._missed, self._last_key = missed, snapshot.key
+                return 0
+
+            # 3. One transaction for the whole tick
+            rows = [(m, c, severity.get(c), current[(m, c)].confidence, current[(m, c)].action,
+                     current[(m, c)].timestamp.isoformat()) for m, c in opened]
+            try:
+                ids = self.database.record_alert_transitions(
+                    rows,
+                    [(now, "cleared", self.open[key]["last_seen_at"], self.open[key]["id"]) for key in resolved],
+                    [(seen[key], self.open[key]["id"]) for key in seen] if flush else (),
+                )
+            except Exception as e:
+                ERRORS.inc(where="alert_transitions")
+                print(f"Alert update failed: {e}")
+                return 0
+
+            self._apply_seen(seen)
+            for key in resolved:
+                alert = self.open.pop(key)
+                alert.update(resolved_at=now, resolution="cleared")
+                self._emit("resolved", alert)
+            for alert_id, row in zip(ids, rows):
+                alert = dict(zip(("machine_id", "condition", "severity", "confidence", "action", "opened_at"), row),
+                             id=alert_id, last_seen_at=row[-1], resolved_at=None, resolution=None, log_id=None)
+                self.open[row[:2]] = alert
+                self._emit("opened", alert)
+            if flush:
+                self._last_flush = time.monotonic()
+            self._missed, self._last_key = missed, snapshot.key
+            self.opened_total += len(opened)
+            self.resolved_total += len(resolved)
+            self.last_update_ms = round((time.perf_counter() - start) * 1000, 2)
+            return len(opened) + len(resolved)
+
+    def _apply_seen(self, seen):
+        for key, timestamp in seen.items():
+            self.open[key]["last_seen_at"] = timestamp
+
+    def log_maintenance(self, machine_id: str, technician_action: str, notes: str, resolved: bool = True,
+                        diagnosis_id: Optional[int] = None, alert_id: Optional[int] = None) -> Dict:
+        """
+        Record a technician action. With resolved=True it closes the targeted open alerts:
+        `alert_id`, else the machine's alert for the rule `diagnosis_id`, else all of the machine's.
+        """
+        with self._lock:
+            if alert_id is not None:
+                targets = [a for a in self.open.values() if a["id"] == alert_id and a["machine_id"] == machine_id]
+            elif diagnosis_id is not None:
+                alert = self.open.get((machine_id, self.database.get_rule_diagnosis(diagnosis_id)))
+                targets = [alert] if alert else []
+            else:
+                targets = [a for (m, _), a in self.open.items() if m == machine_id]
+            if alert_id is None and len(targets) == 1:
+                alert_id = targets[0]["id"]
+
+            now = datetime.now().isoformat()
+            entry = {"machine_id": machine_id, "timestamp": now, "diagnosis_id": diagnosis_id,
+                     "technician_action": technician_action, "notes": notes, "resolved": bool(resolved),
+                     "alert_id": alert_id}
+            closing = targets if resolved else []
+            log_id = self.database.log_maintenance(entry, [a["id"] for a in closing])
+
+            for alert in closing:
+                del self.open[(alert["machine_id"], alert["condition"])]
+                self._missed.pop((alert["machine_id"], alert["condition"]), None)
+                alert.update(resolved_at=now, resolution="technician", log_id=log_id)
+                self._emit("resolved", alert)
+            self.resolved_total += len(closing)
+        return {"id": log_id, "alert_id": alert_id, "resolved_alerts": [a["id"] for a in closing]}
+
+    def list_open(self, machine_id: Optional[str] = None, limit: int = 50, before: Optional[int] = None) -> List[Dict]:
+        """Open alerts from memory, newest first, with the same paging as get_alerts"""
+        with self._lock:
+            alerts = [dict(a) for a in self.open.values()
+                      if (machine_id is None or a["machine_id"] == machine_id) and (before is None or a["id"] < before)]
+        alerts.sort(key=lambda a: a["id"], reverse=True)
+        return alerts[:limit]
+
+    def events_since(self, seq: int = 0, limit: int = 100) -> Dict:
+        """Transitions after `seq`; `resync` is set if some were already dropped from the buffer"""
+        with self._lock:
+            events = [e for e in self.events if e["seq"] > seq][:limit]
+            oldest = self.events[0]["seq"] if self.events else self._seq + 1
+            return {"seq": events[-1]["seq"] if events else max(seq, self._seq),
+                    "resync": seq + 1 < oldest and self._seq > seq, "events": events}
+
+    def stats(self) -> Dict:
+        return {"open": len(self.open), "opened_total": self.opened_total, "resolved_total": self.resolved_total,
+                "last_update_ms": self.last_update_ms, "clear_after_ticks": self.clear_after}
+
+alert_manager = AlertManager()
+db.add_ingest_listener(lambda tick_id, columns: alert_manager.update())
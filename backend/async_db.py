@@ -0,0 +1,79 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from .database import db
+
+# Threads serving blocking SQLite reads (each keeps its own read connection)
+DB_READ_THREADS = int(os.getenv("SF_DB_READ_THREADS", "4"))
+# Threads for CPU-bound request work (snapshot rebuilds, what-if simulations, downsampling)
+CPU_THREADS = int(os.getenv("SF_CPU_THREADS", str(min(4, os.cpu_count() or 1))))
+
+class AsyncDatabase:
+    """
+    Awaitable facade over a Database for request handlers.
+
+    `await adb.get_history("24h")` runs the blocking call on a dedicated read pool, so
+    the event loop never waits on SQLite and slow reads cannot exhaust the threadpool
+    used for everything else. Writes still go through the database's single writer.
+    """
+    def __init__(self, database=db, threads=DB_READ_THREADS):
+        self.database = database
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="sf-db-read")
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self.database, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return call
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+_cpu_executor = ThreadPoolExecutor(CPU_THREADS, thread_name_prefix="sf-cpu")
+
+async def run_cpu(fn, *args, **kwargs):
+    """Offload CPU-bound work (NumPy releases the GIL for the heavy parts) from the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_cpu_executor, functools.partial(fn, *args, **kwargs))
+
+class Coalescer:
+    """
+    Request coalescing: concurrent calls with the same key share one in-flight computation.
+
+    The first caller starts the work; later callers await the same result until it
+    completes, after which the next call computes afresh (nothing is cached). The work is
+    shielded, so a client disconnecting does not cancel it for the others.
+    """
+    def __init__(self):
+        self._inflight: Dict = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(self, key, fn, *args):
+        """Await fn(*args) (a coroutine function), shared with identical concurrent calls"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.started += 1
+            task = self._inflight[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        return {"in_flight": len(self._inflight), "started": self.started, "joined": self.joined}
+
+adb = AsyncDatabase()
+coalescer = Coalescer()
+
+def close_executors():
+    adb.close()
+    _cpu_executor.shutdown(wait=False, cancel_futures=True)
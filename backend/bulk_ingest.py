@@ -0,0 +1,294 @@
+import io
+import os
+import asyncio
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Iterator
+import numpy as np
+
+from .database import db, SIGNAL_COLUMNS
+from .columnar import KNOWN_STATUSES
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional: ~3x faster NDJSON parsing
+    _loads = json.loads
+
+# Rows validated and written per chunk, and the cap on one request
+CHUNK_ROWS = int(os.getenv("SF_BULK_CHUNK_ROWS", "20000"))
+MAX_ROWS = int(os.getenv("SF_BULK_MAX_ROWS", "5000000"))
+
+# Accepted Content-Types
+NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+NPY = ("application/x-npy",)
+ARROW = ("application/vnd.apache.arrow.stream",)
+
+REQUIRED = ("machine_id", "timestamp") + SIGNAL_COLUMNS
+
+class IngestError(ValueError):
+    """Rejected payload; `row` is the 0-based index of the first offending reading, if known"""
+    def __init__(self, message, row=None):
+        super().__init__(message)
+        self.row = row
+
+class UnsupportedFormat(IngestError):
+    pass
+
+class BodyReader(io.RawIOBase):
+    """
+    Blocking file object over an async request body, for parsers running in a worker
+    thread. Each read pulls the next chunk from the event loop, so the upload is
+    consumed only as fast as it is parsed.
+    """
+    def __init__(self, chunks, loop):
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._buffer = b""
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _next_chunk(self):
+        try:
+            return asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop).result()
+        except StopAsyncIteration:
+            return b""
+
+    def readinto(self, buffer):
+        while not self._buffer and not self._eof:
+            self._buffer = self._next_chunk()
+            self._eof = not self._buffer
+        n = min(len(buffer), len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+def _read_exact(reader, size) -> bytes:
+    parts, remaining = [], size
+    while remaining:
+        data = reader.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+# --- Validation ---
+
+def _first_bad(values, convert) -> int:
+    for i, v in enumerate(values):
+        try:
+            convert(v)
+        except (TypeError, ValueError):
+            return i
+    return None
+
+def _timestamps(values, offset) -> np.ndarray:
+    """ISO strings (naive local time, as stored) or epoch seconds -> datetime64[us]"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        utc = (values.astype(np.float64) * 1e6).astype("datetime64[us]")
+        local = datetime.now().astimezone().utcoffset()
+        return utc + np.timedelta64(int(local.total_seconds() * 1e6), "us")
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[us]")
+    try:
+        ts = values.astype("datetime64[us]")
+    except (TypeError, ValueError):
+        row = _first_bad(values, lambda v: np.datetime64(v, "us"))
+        raise IngestError(f"Invalid timestamp {str(values[row])!r}", offset + (row or 0))
+    nat = np.flatnonzero(np.isnat(ts))
+    if len(nat):
+        raise IngestError("Missing timestamp", offset + int(nat[0]))
+    return ts
+
+def validate_columns(columns: Dict[str, np.ndarray], offset: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Check a chunk as whole arrays (no per-row models) and normalize it to the layout
+    stored by insert_columns. `offset` is the chunk's first row, for error positions.
+    """
+    for name in REQUIRED:
+        if name not in columns:
+            raise IngestError(f"Missing field '{name}'")
+    size = len(columns["machine_id"])
+
+    ids = np.asarray(columns["machine_id"], dtype=object)
+    if ids.dtype.kind == "O":
+        bad = np.flatnonzero(np.equal(ids, None) | np.equal(ids, ""))
+    else:
+        bad = np.flatnonzero(np.char.str_len(ids.astype(str)) == 0)
+    if len(bad):
+        raise IngestError("Missing machine_id", offset + int(bad[0]))
+    ids = ids.astype(str).astype(object)
+
+    signals = {}
+    for name in SIGNAL_COLUMNS:
+        raw = columns[name]
+        try:
+            values = np.asarray(raw, dtype=np.float64)
+        except (TypeError, ValueError):
+            row = _first_bad(raw, float)
+            raise IngestError(f"Invalid {name} {raw[row]!r}", offset + (row or 0))
+        bad = np.flatnonzero(~np.isfinite(values))
+        if len(bad):
+            raise IngestError(f"Invalid {name}", offset + int(bad[0]))
+        signals[name] = values
+
+    ts = _timestamps(columns["timestamp"], offset)
+    status = columns.get("status")
+    if status is None:
+        status = np.full(size, "running", dtype=object)
+    else:
+        status = np.asarray(status, dtype=object)
+        status = np.where(np.equal(status, None), "running", status).astype(str).astype(object)
+        bad = np.flatnonzero(~np.isin(status, KNOWN_STATUSES))
+        if len(bad):
+            raise IngestError(f"Invalid status {status[bad[0]]!r}; use one of {', '.join(KNOWN_STATUSES)}",
+                              offset + int(bad[0]))
+
+    return {
+        "machine_id": ids,
+        "timestamp": np.datetime_as_string(ts, unit="us").astype(object),
+        **signals,
+        "status": status,
+    }
+
+# --- Format readers: each yields raw column chunks ---
+
+def _ndjson_rows(lines, offset):
+    try:
+        rows = _loads(b"[" + b",".join(lines) + b"]")
+    except ValueError:
+        for i, line in enumerate(lines):
+            try:
+                _loads(line)
+            except ValueError as e:
+                raise IngestError(f"Invalid JSON: {e}", offset + i)
+        raise
+    bad = next((i for i, r in enumerate(rows) if not isinstance(r, dict)), None)
+    if bad is not None:
+        raise IngestError("Each line must be a JSON object", offset + bad)
+    columns = {name: [r.get(name) for r in rows] for name in REQUIRED}
+    if any("status" in r for r in rows):
+        columns["status"] = [r.get("status") for r in rows]
+    return columns
+
+def read_ndjson(reader, chunk_rows=CHUNK_ROWS) -> Iterator[Dict]:
+    pending, tail, offset = [], b"", 0
+    while True:
+        data = reader.read(1 << 20)
+        if data:
+            lines = (tail + data).split(b"\n")
+            tail = lines.pop()
+            pending.extend(line for line in lines if line.strip())
+        else:
+            if tail.strip():
+                pending.append(tail)
+        while len(pending) >= chunk_rows or (not data and pending):
+            chunk, pending = pending[:chunk_rows], pending[chunk_rows:]
+            yield _ndjson_rows(chunk, offset)
+            offset += len(chunk)
+        if not data:
+            return
+
+def read_npy(reader, chunk_rows=CHUNK_ROWS) -> Iterator[Dict]:
+    """A .npy file holding a 1-D structured array with one field per reading column"""
+    try:
+        version = np.lib.format.read_magic(reader)
+        if version == (1, 0):
+            _, _, dtype = np.lib.format.read_array_header_1_0(reader)
+        else:
+            _, _, dtype = np.lib.format.read_array_header_2_0(reader)
+    except ValueError as e:
+        raise IngestError(f"Invalid .npy header: {e}")
+    if dtype.names is None or dtype.hasobject:
+        raise IngestError("Expected a structured array without object fields")
+
+    while True:
+        data = _read_exact(reader, dtype.itemsize * chunk_rows)
+        if len(data) % dtype.itemsize:
+            raise IngestError("Truncated .npy payload")
+        if not data:
+            return
+        records = np.frombuffer(data, dtype=dtype)
+        columns = {}
+        for name in dtype.names:
+            values = records[name]
+            if values.dtype.kind == "S":
+                values = np.char.decode(values, "utf-8")
+            columns[name] = values
+        yield columns
+
+def read_arrow(reader, chunk_rows=CHUNK_ROWS) -> Iterator[Dict]:
+    try:
+        import pyarrow.ipc
+    except ImportError:
+        raise UnsupportedFormat("Arrow ingest requires pyarrow")
+    try:
+        stream = pyarrow.ipc.open_stream(reader)
+    except Exception as e:
+        raise IngestError(f"Invalid Arrow stream: {e}")
+    with stream:
+        for batch in stream:
+            for start in range(0, batch.num_rows, chunk_rows):
+                part = batch.slice(start, chunk_rows)
+                yield {name: part.column(name).to_numpy(zero_copy_only=False) for name in part.schema.names}
+
+READERS = {**{t: read_ndjson for t in NDJSON}, **{t: read_npy for t in NPY}, **{t: read_arrow for t in ARROW}}
+
+class BulkIngest:
+    """Validates streamed batches chunk by chunk and writes each request in one transaction"""
+    def __init__(self, database=db, max_rows=MAX_ROWS):
+        self.database = database
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+        self.rows_written = 0
+        self.last_rows_per_s = None
+
+    def reader_for(self, content_type: str):
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        reader = READERS.get(media_type)
+        if reader is None:
+            raise UnsupportedFormat(f"Unsupported Content-Type '{media_type}'; use one of {', '.join(READERS)}")
+        return reader
+
+    def ingest(self, read, source) -> Dict:
+        """Parse, validate and write one upload; nothing is committed unless all of it is valid"""
+        start = time.perf_counter()
+        bulk = self.database.bulk_insert()
+        rows = chunks = 0
+        try:
+            for raw in read(source):
+                columns = validate_columns(raw, rows)
+                rows += len(columns["machine_id"])
+                if rows > self.max_rows:
+                    raise IngestError(f"Too many readings in one request (max {self.max_rows})")
+                bulk.feed(columns)
+                chunks += 1
+            bulk.commit()
+        except BaseException:
+            bulk.abort()
+            with self._lock:
+                self.requests += 1
+                self.rejected += 1
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.requests += 1
+            self.rows_written += rows
+            self.last_rows_per_s = round(rows / elapsed) if elapsed > 0 else None
+        return {"rows": rows, "chunks": chunks, "elapsed_ms": round(elapsed * 1000, 1),
+                "rows_per_s": self.last_rows_per_s}
+
+    def stats(self) -> Dict:
+        return {"requests": self.requests, "rejected": self.rejected, "rows_written": self.rows_written,
+                "last_rows_per_s": self.last_rows_per_s}
+
+bulk_ingest = BulkIngest()
@@ -0,0 +1,147 @@
+import threading
+import numpy as np
+from collections import namedtuple
+from typing import List, Dict, Optional
+
+from .models import MachineData
+
+# Status strings are stored as small integer codes (uint8)
+KNOWN_STATUSES = ("running", "idle", "off", "fault")
+STATUS_NAMES = list(KNOWN_STATUSES)
+MAX_STATUSES = 256
+_status_codes = {name: i for i, name in enumerate(STATUS_NAMES)}
+_status_lock = threading.Lock()
+
+def status_code(name: str) -> int:
+    code = _status_codes.get(name)
+    if code is None:
+        with _status_lock:
+            code = _status_codes.get(name)
+            if code is None:
+                if len(STATUS_NAMES) >= MAX_STATUSES:
+                    raise ValueError(f"Too many distinct machine statuses (max {MAX_STATUSES})")
+                code = _status_codes[name] = len(STATUS_NAMES)
+                STATUS_NAMES.append(name)
+    return code
+
+# Lightweight row view for code that wants attribute access without building a model
+ReadingRow = namedtuple("ReadingRow", "machine_id timestamp temperature vibration power status")
+
+class MachineIndex:
+    """
+    Stable machine_id -> dense integer index, shared by every per-machine array
+    (engine state, ring buffers, ...). New machines are appended as they appear.
+    """
+    def __init__(self):
+        self._index = {}
+        self.ids = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lookup(self, machine_ids) -> np.ndarray:
+        index = self._index
+        try:
+            return np.fromiter((index[m] for m in machine_ids), dtype=np.int32, count=len(machine_ids))
+        except KeyError:
+            pass
+        with self._lock:
+            for m in machine_ids:
+                if m not in index:
+                    index[m] = len(self.ids)
+                    self.ids.append(m)
+        return np.fromiter((index[m] for m in machine_ids), dtype=np.int32, count=len(machine_ids))
+
+    def find(self, machine_ids) -> np.ndarray:
+        """Like lookup, but read-only: unknown machines get -1 instead of a new index"""
+        index = self._index
+        return np.fromiter((index.get(m, -1) for m in machine_ids), dtype=np.int32, count=len(machine_ids))
+
+machine_index = MachineIndex()
+
+def occurrence_groups(idx: np.ndarray, t: np.ndarray) -> List[np.ndarray]:
+    """
+    Split a batch of readings into row groups that each hold at most one reading per
+    machine: group k is every machine's k-th oldest reading. Applying the groups in
+    order replays each machine's readings in time order with one vectorized update per
+    group, however many distinct timestamps the batch has.
+    """
+    n = len(idx)
+    order = np.lexsort((t, idx))
+    sorted_idx = idx[order]
+    starts = np.r_[True, sorted_idx[1:] != sorted_idx[:-1]]
+    if starts.all():
+        return [order]
+    # Rank of each row within its machine's run: position minus the run's first position
+    rank = np.arange(n) - np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[by_rank], np.arange(rank.max() + 2))
+    rows = order[by_rank]
+    return [rows[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+class FleetColumns:
+    """
+    Structure-of-arrays view of one reading per machine.
+
+    Hot paths (ES inference, DSS statistics, stream deltas) work directly on these
+    arrays; pydantic models are only built at the API boundary, for the rows returned.
+    Supports `columns["temperature"]`-style access so it can be passed anywhere a
+    column dict is accepted.
+    """
+    __slots__ = ("machine_id", "index", "timestamp", "temperature", "vibration", "power", "status", "_rows")
+
+    def __init__(self, machine_id, timestamp, temperature, vibration, power, status, index=None):
+        self.machine_id = np.asarray(machine_id, dtype=object)
+        self.timestamp = np.asarray(timestamp, dtype="datetime64[us]")
+        self.temperature = np.asarray(temperature, dtype=np.float32)
+        self.vibration = np.asarray(vibration, dtype=np.float32)
+        self.power = np.asarray(power, dtype=np.float32)
+        self.status = np.asarray(status, dtype=np.uint8)
+        self.index = machine_index.lookup(self.machine_id) if index is None else np.asarray(index, dtype=np.int32)
+        self._rows = None
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [], [])
+
+    @classmethod
+    def from_tuples(cls, rows) -> "FleetColumns":
+        """Build from (machine_id, timestamp, temperature, vibration, power, status) tuples"""
+        if not rows:
+            return cls.empty()
+        ids, ts, temp, vib, power, status = zip(*rows)
+        return cls(ids, ts, temp, vib, power, [status_code(s) for s in status])
+
+    def __len__(self):
+        return len(self.machine_id)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def take(self, rows) -> "FleetColumns":
+        return FleetColumns(self.machine_id[rows], self.timestamp[rows], self.temperature[rows],
+                            self.vibration[rows], self.power[rows], self.status[rows], self.index[rows])
+
+    def find(self, machine_id: str) -> Optional[int]:
+        """Row number of a machine in this snapshot"""
+        if self._rows is None:
+            self._rows = {m: i for i, m in enumerate(self.machine_id.tolist())}
+        return self._rows.get(machine_id)
+
+    def row(self, i: int) -> ReadingRow:
+        return ReadingRow(self.machine_id[i], self.timestamp[i].item(), float(self.temperature[i]),
+                          float(self.vibration[i]), float(self.power[i]), STATUS_NAMES[self.status[i]])
+
+    def to_dicts(self, rows=slice(None)) -> List[Dict]:
+        # float32 -> 2 decimals: the precision contract documented on MachineData
+        return [
+            {"machine_id": m, "timestamp": t, "temperature": round(a, 2), "vibration": round(b, 2),
+             "power": round(c, 2), "status": STATUS_NAMES[s]}
+            for m, t, a, b, c, s in zip(
+                self.machine_id[rows].tolist(), self.timestamp[rows].tolist(), self.temperature[rows].tolist(),
+                self.vibration[rows].tolist(), self.power[rows].tolist(), self.status[rows].tolist())
+        ]
+
+    def to_models(self, rows=slice(None)) -> List[MachineData]:
+        return [MachineData(**d) for d in self.to_dicts(rows)]
@@ -1,36 +1,451 @@
+import os
 import sqlite3
 import json
+import re
+import queue
+import threading
+import itertools
+import time
+import uuid
+import tempfile
+from concurrent.futures import Future
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Dict, Optional
+import numpy as np
+
+from .columnar import FleetColumns, machine_index
+from .groups import GroupIndex, GROUP_DIMENSIONS, UNASSIGNED
+from .metrics import timed, DB_QUERY_SECONDS, DB_ROWS_RETURNED, DB_WRITE_SECONDS, DB_ROWS_WRITTEN, ERRORS
 
 DB_NAME = "smartfactory.db"
 
+# Applied to every connection. WAL lets readers run while the writer commits.
+PRAGMAS = (
+    # Must precede the first write to a new file; existing files switch on their next VACUUM
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-32000",     # 32 MB page cache per connection
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+)
+
+def open_connection(path):
+    # Large statement cache: connections are long-lived, so repeated queries reuse their prepared statements
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30, cached_statements=256)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+SIGNAL_COLUMNS = ("temperature", "vibration", "power")
+
+# Rollup tables maintained at ingest: resolution -> (table, timestamp prefix length, bucket suffix)
+ROLLUPS = {
+    "1m": ("readings_rollup_1m", 16, ":00"),
+    "1h": ("readings_rollup_1h", 13, ":00:00"),
+}
+
+# Per-(dimension, group) rollups (e.g. ('sector', 'Sector 7')) maintained at ingest alongside ROLLUPS
+GROUP_ROLLUPS = {"1m": "group_rollup_1m", "1h": "group_rollup_1h"}
+
+# Raw readings older than the raw retention window are folded into this per-machine rollup
+MACHINE_ROLLUP = "machine_rollup_1m"
+
+# Raw readings live in one table per day (readings_YYYYMMDD), so retention drops whole tables
+PARTITION_PREFIX = "readings_"
+PARTITION_GLOB = PARTITION_PREFIX + "[0-9]" * 8
+
+def _rollup_stats_columns():
+    return ", ".join(f"{c}_sum, {c}_min, {c}_max" for c in SIGNAL_COLUMNS)
+
+def _rollup_updates():
+    return ", ".join(
+        f"{c}_sum = {c}_sum + excluded.{c}_sum, "
+        f"{c}_min = MIN({c}_min, excluded.{c}_min), "
+        f"{c}_max = MAX({c}_max, excluded.{c}_max)"
+        for c in SIGNAL_COLUMNS
+    )
+
+def _rollup_upsert_sql(table):
+    placeholders = ", ".join("?" * (2 + 3 * len(SIGNAL_COLUMNS)))
+    return f'''
+        INSERT INTO {table} (bucket, count, {_rollup_stats_columns()})
+        VALUES ({placeholders})
+        ON CONFLICT(bucket) DO UPDATE SET count = count + excluded.count, {_rollup_updates()}
+    '''
+
+def _group_rollup_upsert_sql(table):
+    placeholders = ", ".join("?" * (4 + 3 * len(SIGNAL_COLUMNS)))
+    return f'''
+        INSERT INTO {table} (dimension, bucket, grp, count, {_rollup_stats_columns()})
+        VALUES ({placeholders})
+        ON CONFLICT(dimension, bucket, grp) DO UPDATE SET count = count + excluded.count, {_rollup_updates()}
+    '''
+
+# Built once so every connection's statement cache sees identical SQL text
+ROLLUP_UPSERT = {resolution: _rollup_upsert_sql(table) for resolution, (table, _, _) in ROLLUPS.items()}
+GROUP_ROLLUP_UPSERT = {resolution: _group_rollup_upsert_sql(table) for resolution, table in GROUP_ROLLUPS.items()}
+
+def partition_day(timestamp: str) -> str:
+    """'2024-01-05T10:15:00' -> '20240105'"""
+    return timestamp[:4] + timestamp[5:7] + timestamp[8:10]
+
+def partition_table(day: str) -> str:
+    return PARTITION_PREFIX + day
+
+def columns_from_rows(readings: List[dict]) -> Dict[str, np.ndarray]:
+    """Convert reading dicts into the column layout accepted by insert_columns"""
+    return {
+        "machine_id": np.array([r['machine_id'] for r in readings], dtype=object),
+        "timestamp": np.array([r['timestamp'] for r in readings], dtype=object),
+        **{c: np.array([r[c] for r in readings], dtype=np.float64) for c in SIGNAL_COLUMNS},
+        "status": np.array([r.get('status', 'running') for r in readings], dtype=object),
+    }
+
+def concat_columns(batches: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if len(batches) == 1:
+        return batches[0]
+    return {key: np.concatenate([b[key] for b in batches]) for key in batches[0]}
+
+def grouped_stats(group: np.ndarray, signals: List[np.ndarray]):
+    """Distinct group values with their row count and per-signal sum/min/max (NumPy reduceat)"""
+    order = np.argsort(group, kind="stable")
+    sorted_group = group[order]
+    starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    stats = []
+    for values in signals:
+        v = values[order]
+        stats += [np.add.reduceat(v, starts), np.minimum.reduceat(v, starts), np.maximum.reduceat(v, starts)]
+    return sorted_group[starts], counts, stats
+
+def bucket_key(timestamp: str, resolution: str) -> str:
+    """Truncate an ISO timestamp to its rollup bucket, e.g. '2024-01-01T10:15:00'"""
+    _, length, suffix = ROLLUPS[resolution]
+    return timestamp[:10] + "T" + timestamp[11:length] + suffix
+
+# Seeded inference rules. Windows ("for" k "of" n readings) keep single noisy readings from raising alerts
+INFERENCE_RULES = [
+    ({"all": [{"signal": "vibration", "op": ">", "value": 90, "for": 3, "of": 5},
+              {"signal": "temperature", "op": ">", "value": 80, "for": 3, "of": 5}]},
+     'Likely Bearing Failure', 'Immediate shutdown recommended. Replace bearing assembly.', 0.94, 'Critical',
+     'Sustained high vibration (>90Hz) and temperature (>80C) indicates mechanical friction consistent with bearing seizure.',
+     ['vibration', 'temperature', 'bearing']),
+    ({"all": [{"signal": "vibration", "op": ">", "value": 80, "for": 3, "of": 5},
+              {"signal": "power", "op": ">", "value": 13, "for": 3, "of": 5}]},
+     'Motor Misalignment', 'Schedule realignment during next shift.', 0.87, 'Medium',
+     'Persistently high vibration with increased power draw suggests motor shaft misalignment.',
+     ['vibration', 'power', 'misalignment']),
+    ({"signal": "temperature", "op": ">", "value": 95, "for": 3, "of": 5},
+     'Coolant System Degradation', 'Check coolant levels and pump function.', 0.92, 'Critical',
+     'Temperature critical (>95C) for most recent readings without corresponding vibration spike points to thermal management failure.',
+     ['temperature', 'coolant']),
+]
+
+# Conditions of the seeded inference rules before they used windows; migrated on startup
+LEGACY_INFERENCE_CONDITIONS = {
+    'Likely Bearing Failure': {"all": [{"signal": "vibration", "op": ">", "value": 90},
+                                       {"signal": "temperature", "op": ">", "value": 80}]},
+    'Motor Misalignment': {"all": [{"signal": "vibration", "op": ">", "value": 80},
+                                   {"signal": "power", "op": ">", "value": 13}]},
+    'Coolant System Degradation': {"signal": "temperature", "op": ">", "value": 95},
+}
+
+class DatabaseWriter:
+    """
+    Single writer thread. Every write runs here in submission order on one
+    dedicated connection, so writers never contend for the SQLite write lock
+    and WAL readers are never blocked by ingest.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args) -> Future:
+        """Queue fn(cursor, *args) to run in its own transaction; returns a Future with its result"""
+        future = Future()
+        self._ensure_started()
+        self.jobs.put((fn, args, future))
+        return future
+
+    def execute(self, fn, *args):
+        """Run a write job and wait for it to commit"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Nested write job submitted from the writer thread")
+        return self.submit(fn, *args).result()
+
+    def _run(self):
+        conn = open_connection(self.path)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            fn, args, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = time.perf_counter()
+            try:
+                result = fn(conn.cursor(), *args)
+                conn.commit()
+            except BaseException as e:
+                conn.rollback()
+                future.set_exception(e)
+                continue
+            DB_WRITE_SECONDS.observe(time.perf_counter() - start, job=fn.__name__.lstrip("_"))
+            future.set_result(result)
+        conn.close()
+
+    def stop(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self.jobs.put(None)
+            thread.join()
+
+# Validated bulk uploads are spooled in memory up to this size, then in a temp file
+BULK_SPOOL_BYTES = int(os.getenv("SF_BULK_SPOOL_MB", "64")) * 1024 * 1024
+# Upper bound on spooled rows held in memory while replaying an upload to the ingest listeners
+BULK_NOTIFY_ROWS = int(os.getenv("SF_BULK_NOTIFY_ROWS", "100000"))
+BULK_TEXT_COLUMNS = ("machine_id", "timestamp", "status")
+
+class BulkInsert:
+    """
+    One all-or-nothing bulk write. Chunks fed while the upload streams in are spooled
+    (sorted by timestamp, as raw record arrays, in memory and then on disk), and commit()
+    writes them all in one writer job. The writer never waits on the client, so a slow
+    upload cannot hold up ingest ticks or other writes, and nothing is visible until commit().
+
+    Afterwards the ingest listeners get every row in time order, merged from the sorted
+    chunks a block at a time, so memory stays bounded however large the upload is.
+    """
+    def __init__(self, database, spool_bytes=BULK_SPOOL_BYTES, notify_rows=BULK_NOTIFY_ROWS):
+        self.database = database
+        self.rows = 0
+        self.notify_rows = notify_rows
+        self._spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        # (offset, rows, record dtype) of each spooled chunk
+        self._runs = []
+
+    def feed(self, columns: Dict[str, np.ndarray]):
+        """Spool a validated chunk (timestamps as uniform ISO strings, as validate_columns makes them)"""
+        size = len(columns["machine_id"])
+        if not size:
+            return
+        text = {name: np.asarray(columns[name]).astype(str) for name in BULK_TEXT_COLUMNS}
+        dtype = np.dtype([(name, text[name].dtype) if name in text else (name, np.float64)
+                          for name in ("machine_id", "timestamp") + SIGNAL_COLUMNS + ("status",)])
+        records = np.empty(size, dtype=dtype)
+        for name in dtype.names:
+            records[name] = text[name] if name in text else columns[name]
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+        self._spool.seek(0, os.SEEK_END)
+        self._runs.append((self._spool.tell(), size, dtype))
+        self._spool.write(records.tobytes())
+        self.rows += size
+
+    def _read(self, run, start, count) -> np.ndarray:
+        offset, _, dtype = run
+        self._spool.seek(offset + start * dtype.itemsize)
+        return np.frombuffer(self._spool.read(count * dtype.itemsize), dtype=dtype)
+
+    @staticmethod
+    def _columns(records) -> Dict[str, np.ndarray]:
+        return {name: records[name].astype(object) if name in BULK_TEXT_COLUMNS else records[name].copy()
+                for name in records.dtype.names}
+
+    def _read_chunks(self):
+        for run in self._runs:
+            yield self._columns(self._read(run, 0, run[1]))
+
+    def _time_ordered(self):
+        """
+        All spooled rows in timestamp order, in batches. Block merge of the sorted chunks:
+        each round emits every buffered row up to the smallest "last buffered timestamp"
+        among chunks with unread rows, so no later read can hold an earlier row.
+        """
+        runs = self._runs
+        block = max(256, self.notify_rows // max(1, len(runs)))
+        read = [0] * len(runs)
+        buffers = [None] * len(runs)
+        while True:
+            for i, run in enumerate(runs):
+                if (buffers[i] is None or not len(buffers[i])) and read[i] < run[1]:
+                    count = min(block, run[1] - read[i])
+                    buffers[i] = self._read(run, read[i], count)
+                    read[i] += count
+            live = [b for b in buffers if b is not None and len(b)]
+            if not live:
+                return
+            unread = [buffers[i]["timestamp"][-1] for i, run in enumerate(runs) if read[i] < run[1]]
+            cutoff = min(unread) if unread else None
+            parts = []
+            for i, b in enumerate(buffers):
+                if b is None or not len(b):
+                    continue
+                n = len(b) if cutoff is None else int(np.searchsorted(b["timestamp"], cutoff, side="right"))
+                if n:
+                    parts.append(self._columns(b[:n]))
+                    buffers[i] = b[n:]
+            columns = concat_columns(parts)
+            order = np.argsort(columns["timestamp"].astype(str), kind="stable")
+            yield {name: values[order] for name, values in columns.items()}
+
+    def commit(self) -> int:
+        try:
+            days = self.database.writer.execute(self.database._bulk_insert, self._read_chunks())
+            DB_ROWS_WRITTEN.inc(self.rows, job="bulk_insert")
+            self.database._register_partitions(days)
+            if self.rows:
+                # Listeners fold multi-tick batches in time order, like the backfill
+                self.database._publish(self._time_ordered)
+            return self.rows
+        finally:
+            self._spool.close()
+
+    def abort(self):
+        self._spool.close()
+
 class Database:
-    def __init__(self):
-        self.conn = None
+    def __init__(self, path=DB_NAME):
+        self.path = path
+        self._local = threading.local()
+        self.writer = DatabaseWriter(path)
+        # Tick id: changes after every committed ingest batch. The boot token keeps ids
+        # from a previous process (e.g. in client ETags) from ever matching.
+        self._boot = uuid.uuid4().hex[:8]
+        self._ticks = itertools.count(1)
+        self._tick_lock = threading.Lock()
+        self.tick_seq = 0
+        self._listeners = []
+        self._state_listeners = []
+        # Set by init_db: whether this SQLite build has FTS5 (otherwise search falls back to LIKE)
+        self.fts_enabled = False
+        # Days that have a raw readings partition, oldest first
+        self._partitions = []
+        self._partition_lock = threading.Lock()
+        # Machine metadata and group codes; loaded by init_db, changed by set_machine_metadata
+        self.groups = GroupIndex()
+
+    @property
+    def tick_id(self):
+        return f"{self._boot}-{self.tick_seq}"
 
     def get_connection(self):
-        return sqlite3.connect(DB_NAME, check_same_thread=False)
+        """Reusable per-thread read connection (WAL, tuned pragmas, cached statements)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_connection(self.path)
+        return conn
+
+    def add_ingest_listener(self, fn, before_publish=False):
+        """
+        Register fn(tick_id, columns), called after every committed ingest batch.
+        before_publish listeners run before the new tick id becomes visible, for derived
+        state that readers cache per tick id (e.g. the ES rule windows behind snapshots).
+        """
+        (self._state_listeners if before_publish else self._listeners).append(fn)
+
+    def close(self):
+        """Stop the writer; per-thread read connections close with their threads"""
+        self.writer.stop()
 
     def init_db(self):
         """Initialize Local SQLite Database with Schema"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        
-        # 1. Machine Readings Table
+
+        # 1. Machine Readings: one partition table per day, created on first insert
+        self._load_partitions(cursor)
+        self._migrate_legacy_readings(cursor)
+        history = self._union_sql("machine_id, timestamp, temperature, vibration, power, status", self.partitions())
+
+        # Current state of every machine, upserted with each insert so reads are one PK row per machine
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS machine_readings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                machine_id TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            CREATE TABLE IF NOT EXISTS machine_latest (
+                machine_id TEXT PRIMARY KEY,
+                timestamp DATETIME,
                 temperature REAL,
                 vibration REAL,
                 power REAL,
                 status TEXT
             )
         ''')
-        # Index for fast time-range queries
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON machine_readings(timestamp)')
+        cursor.execute('SELECT count(*) FROM machine_latest')
+        if cursor.fetchone()[0] == 0 and history:
+            # Existing database: derive it once from history (bare columns come from the MAX row)
+            cursor.execute(f'''
+                INSERT INTO machine_latest (machine_id, timestamp, temperature, vibration, power, status)
+                SELECT machine_id, MAX(timestamp), temperature, vibration, power, status
+                FROM ({history}) GROUP BY machine_id
+            ''')
+
+        # Pre-aggregated history: per-bucket count/sum/min/max of every signal, updated by insert_readings
+        stats = ",\n".join(f"{c}_sum REAL, {c}_min REAL, {c}_max REAL" for c in SIGNAL_COLUMNS)
+        aggs = ", ".join(f"SUM({c}), MIN({c}), MAX({c})" for c in SIGNAL_COLUMNS)
+        for resolution, (table, length, suffix) in ROLLUPS.items():
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    {stats}
+                )
+            ''')
+            cursor.execute(f'SELECT count(*) FROM {table}')
+            if cursor.fetchone()[0] == 0 and history:
+                # Existing database: build the rollup once from raw history
+                fmt = '%Y-%m-%dT%H:%M:00' if resolution == '1m' else '%Y-%m-%dT%H:00:00'
+                cursor.execute(f'''
+                    INSERT INTO {table}
+                    SELECT strftime('{fmt}', timestamp), COUNT(*), {aggs}
+                    FROM ({history}) GROUP BY 1
+                ''')
+
+        # Downsampled per-machine history for raw partitions past retention
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {MACHINE_ROLLUP} (
+                machine_id TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                {stats},
+                PRIMARY KEY (machine_id, bucket)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{MACHINE_ROLLUP}_bucket ON {MACHINE_ROLLUP}(bucket)')
+
+        # Machine metadata (sector, line, model, rated capacity) and per-group rollups
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS machine_metadata (
+                machine_id TEXT PRIMARY KEY,
+                sector TEXT,
+                line TEXT,
+                model TEXT,
+                rated_capacity REAL
+            )
+        ''')
+        for table in GROUP_ROLLUPS.values():
+            # Bucket before group: window queries scan one dimension's contiguous bucket range
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    dimension TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    grp TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    {stats},
+                    PRIMARY KEY (dimension, bucket, grp)
+                ) WITHOUT ROWID
+            ''')
+        cursor.execute('SELECT * FROM machine_metadata')
+        self.groups.set([dict(r) for r in cursor.fetchall()])
 
         # 2. Fault Rules Table
         cursor.execute('''
@@ -40,9 +455,26 @@ class Database:
                 diagnosis TEXT NOT NULL,
                 action TEXT NOT NULL,
                 confidence REAL,
-                severity TEXT
+                severity TEXT,
+                reasoning TEXT,
+                conditions TEXT -- JSON predicate tree used by the inference engine, NULL for keyword-only rules
             )
         ''')
+        self._migrate_columns(cursor, 'fault_rules', {'reasoning': 'TEXT', 'conditions': 'TEXT'})
+
+        # Rule base version, bumped by triggers so the ES can hot-reload on any edit
+        cursor.execute('CREATE TABLE IF NOT EXISTS rules_meta (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)')
+        cursor.execute('INSERT OR IGNORE INTO rules_meta (id, version) VALUES (1, 0)')
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS fault_rules_version_{event.lower()} AFTER {event} ON fault_rules
+                BEGIN
+                    UPDATE rules_meta SET version = version + 1 WHERE id = 1;
+                END
+            ''')
+
+        # Full-text index over the knowledge base, kept in sync by triggers
+        self.fts_enabled = self._init_rule_search(cursor)
 
         # 3. Maintenance Logs
         cursor.execute('''
@@ -53,18 +485,45 @@ class Database:
                 diagnosis_id INTEGER,
                 technician_action TEXT,
                 notes TEXT,
-                resolved BOOLEAN DEFAULT 0
+                resolved BOOLEAN DEFAULT 0,
+                alert_id INTEGER
+            )
+        ''')
+        self._migrate_columns(cursor, 'maintenance_logs', {'alert_id': 'INTEGER'})
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_logs_machine ON maintenance_logs(machine_id, id)')
+
+        # 4. Alerts: one row per (machine, condition) episode, from first firing until resolved
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                machine_id TEXT NOT NULL,
+                condition TEXT NOT NULL,
+                severity TEXT,
+                confidence REAL,
+                action TEXT,
+                opened_at TEXT NOT NULL,
+                last_seen_at TEXT NOT NULL,
+                resolved_at TEXT,
+                resolution TEXT, -- 'cleared' (stopped firing) or 'technician'
+                log_id INTEGER
             )
         ''')
+        # At most one open episode per key; the partial index also serves the open-alert scan
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_open ON alerts(machine_id, condition) WHERE resolved_at IS NULL')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_machine ON alerts(machine_id, id)')
 
         # Seed Fault Rules if empty
         cursor.execute('SELECT count(*) FROM fault_rules')
         if cursor.fetchone()[0] == 0:
             self._seed_rules(cursor)
+        cursor.execute('SELECT count(*) FROM fault_rules WHERE conditions IS NOT NULL')
+        if cursor.fetchone()[0] == 0:
+            self._seed_inference_rules(cursor)
+        else:
+            self._migrate_inference_rules(cursor)
 
         conn.commit()
-        conn.close()
-        print(f"--- SQLite Database '{DB_NAME}' Initialized ---")
+        print(f"--- SQLite Database '{self.path}' Initialized (WAL) ---")
 
     def _seed_rules(self, cursor):
         rules = [
@@ -75,48 +534,415 @@ class Database:
         ]
         cursor.executemany('INSERT INTO fault_rules (symptom_keywords, diagnosis, action, confidence, severity) VALUES (?, ?, ?, ?, ?)', rules)
 
+    def _seed_inference_rules(self, cursor):
+        cursor.executemany(
+            'INSERT INTO fault_rules (conditions, diagnosis, action, confidence, severity, reasoning, symptom_keywords) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(json.dumps(c), d, a, conf, sev, r, json.dumps(k)) for c, d, a, conf, sev, r, k in INFERENCE_RULES]
+        )
+
+    def _migrate_inference_rules(self, cursor):
+        """Move the seeded rules still on their original instantaneous conditions to the windowed ones"""
+        for conditions, diagnosis, _, _, _, reasoning, _ in INFERENCE_RULES:
+            cursor.execute('SELECT id, conditions FROM fault_rules WHERE diagnosis = ? AND conditions IS NOT NULL', (diagnosis,))
+            for rule_id, old in cursor.fetchall():
+                if json.loads(old) == LEGACY_INFERENCE_CONDITIONS[diagnosis]:
+                    cursor.execute('UPDATE fault_rules SET conditions = ?, reasoning = ? WHERE id = ?',
+                                   (json.dumps(conditions), reasoning, rule_id))
+
+    def _migrate_columns(self, cursor, table, columns):
+        """Add columns introduced after a database file was first created"""
+        existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+        for name, decl in columns.items():
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+
+    def _init_rule_search(self, cursor) -> bool:
+        try:
+            # symptom_keywords is indexed as stored (JSON text); the tokenizer drops the punctuation
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS fault_rules_fts USING fts5(
+                    diagnosis, action, reasoning, keywords,
+                    tokenize = 'unicode61', prefix = '2 3 4'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable ({e}); knowledge base search uses LIKE")
+            return False
+
+        row = "new.id, new.diagnosis, new.action, new.reasoning, new.symptom_keywords"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS fault_rules_fts_insert AFTER INSERT ON fault_rules BEGIN
+                INSERT INTO fault_rules_fts (rowid, diagnosis, action, reasoning, keywords) VALUES ({row});
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS fault_rules_fts_delete AFTER DELETE ON fault_rules BEGIN
+                DELETE FROM fault_rules_fts WHERE rowid = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS fault_rules_fts_update AFTER UPDATE ON fault_rules BEGIN
+                DELETE FROM fault_rules_fts WHERE rowid = old.id;
+                INSERT INTO fault_rules_fts (rowid, diagnosis, action, reasoning, keywords) VALUES ({row});
+            END
+        ''')
+
+        # Existing database: (re)build the index once if it is out of step with the table
+        indexed = cursor.execute('SELECT count(*) FROM fault_rules_fts').fetchone()[0]
+        rules = cursor.execute('SELECT count(*) FROM fault_rules').fetchone()[0]
+        if indexed != rules:
+            cursor.execute('DELETE FROM fault_rules_fts')
+            cursor.execute('''
+                INSERT INTO fault_rules_fts (rowid, diagnosis, action, reasoning, keywords)
+                SELECT id, diagnosis, action, reasoning, symptom_keywords FROM fault_rules
+            ''')
+        return True
+
+    # --- Partitioned raw readings ---
+    def _load_partitions(self, cursor):
+        rows = cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?", (PARTITION_GLOB,)
+        ).fetchall()
+        with self._partition_lock:
+            self._partitions = sorted(r[0][len(PARTITION_PREFIX):] for r in rows)
+
+    def _register_partitions(self, days):
+        """Make committed partitions visible to readers"""
+        with self._partition_lock:
+            new = set(days) - set(self._partitions)
+            if new:
+                self._partitions = sorted(self._partitions + list(new))
+
+    def _create_partition(self, cursor, day) -> str:
+        table = partition_table(day)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                machine_id TEXT NOT NULL,
+                timestamp DATETIME NOT NULL,
+                temperature REAL,
+                vibration REAL,
+                power REAL,
+                status TEXT
+            )
+        ''')
+        # Per-machine range scans, and fleet-wide "last N minutes" windows
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_machine_ts ON {table}(machine_id, timestamp)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table}(timestamp)')
+        return table
+
+    def partitions(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """Partition tables overlapping [start, end], oldest first"""
+        lo = partition_day(start.isoformat()) if start else None
+        hi = partition_day(end.isoformat()) if end else None
+        with self._partition_lock:
+            days = self._partitions
+        return [partition_table(d) for d in days if (lo is None or d >= lo) and (hi is None or d <= hi)]
+
+    def list_partitions(self) -> List[str]:
+        """Partition tables as currently stored in the database file, oldest first (refreshes the cached list)"""
+        self._load_partitions(self.get_connection().cursor())
+        return self.partitions()
+
+    def _union_sql(self, columns, tables, where=""):
+        """One SELECT per partition combined with UNION ALL (bind the parameters once per table)"""
+        return " UNION ALL ".join(f"SELECT {columns} FROM {t} {where}" for t in tables)
+
+    def _migrate_legacy_readings(self, cursor):
+        """Move rows of the single pre-partitioning machine_readings table into day partitions"""
+        if not cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'machine_readings'").fetchone():
+            return
+        days = [r[0] for r in cursor.execute(
+            "SELECT DISTINCT substr(timestamp, 1, 10) FROM machine_readings WHERE timestamp IS NOT NULL")]
+        for day in days:
+            table = self._create_partition(cursor, partition_day(day))
+            next_day = (datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()
+            cursor.execute(f'''
+                INSERT INTO {table} (machine_id, timestamp, temperature, vibration, power, status)
+                SELECT machine_id, timestamp, temperature, vibration, power, status FROM machine_readings
+                WHERE timestamp >= ? AND timestamp < ?
+            ''', (day, next_day))
+        cursor.execute('DROP TABLE machine_readings')
+        self._register_partitions(partition_day(d) for d in days)
+        print(f"--- Migrated machine_readings into {len(days)} daily partitions ---")
+
+    def downsample_partition(self, day: str) -> int:
+        """Fold a whole day of raw readings into the per-machine minute rollup and drop the partition"""
+        with self._partition_lock:
+            self._partitions = [d for d in self._partitions if d != day]
+        try:
+            return self.writer.execute(self._downsample_partition, partition_table(day))
+        except Exception:
+            self._register_partitions([day])
+            raise
+
+    def _downsample_partition(self, cursor, table):
+        aggs = ", ".join(f"SUM({c}), MIN({c}), MAX({c})" for c in SIGNAL_COLUMNS)
+        cursor.execute(f'''
+            INSERT INTO {MACHINE_ROLLUP} (machine_id, bucket, count, {_rollup_stats_columns()})
+            SELECT machine_id, strftime('%Y-%m-%dT%H:%M:00', timestamp), COUNT(*), {aggs}
+            FROM {table} WHERE true GROUP BY 1, 2
+            ON CONFLICT(machine_id, bucket) DO UPDATE SET count = count + excluded.count, {_rollup_updates()}
+        ''')
+        buckets = cursor.rowcount
+        cursor.execute(f'DROP TABLE {table}')
+        return buckets
+
+    def prune_rollups(self, cutoff: datetime) -> int:
+        """Delete per-machine and fleet rollup buckets older than cutoff"""
+        return self.writer.execute(self._prune_rollups, cutoff.isoformat())
+
+    def _prune_rollups(self, cursor, cutoff):
+        deleted = 0
+        for table in [MACHINE_ROLLUP] + [table for table, _, _ in ROLLUPS.values()] + list(GROUP_ROLLUPS.values()):
+            cursor.execute(f'DELETE FROM {table} WHERE bucket < ?', (cutoff,))
+            deleted += cursor.rowcount
+        return deleted
+
+    def reclaim_space(self):
+        """Return freed pages to the filesystem (runs on the writer, never on a request thread)"""
+        return self.writer.execute(self._reclaim_space)
+
+    def _reclaim_space(self, cursor):
+        if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            cursor.execute('PRAGMA incremental_vacuum').fetchall()
+        else:
+            # Database created before partitioning: one full VACUUM switches it to incremental
+            cursor.execute('VACUUM')
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+
+    def storage_stats(self) -> Dict:
+        cursor = self.get_connection().cursor()
+        page_size, pages, free, auto_vacuum = (
+            cursor.execute(f'PRAGMA {p}').fetchone()[0] for p in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum'))
+        return {
+            "partitions": self.partitions(),
+            "size_mb": round(page_size * pages / 1e6, 1),
+            "free_mb": round(page_size * free / 1e6, 1),
+            "incremental_vacuum": auto_vacuum == 2,
+        }
+
     def insert_readings(self, readings: List[dict]):
-        """Bulk insert machine readings"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        data = [
-            (r['machine_id'], r['timestamp'], r['temperature'], r['vibration'], r['power'], r['status'])
-            for r in readings
-        ]
+        """Bulk insert machine readings (list of dicts)"""
+        return self.insert_columns(columns_from_rows(readings))
+
+    def insert_columns(self, columns: Dict[str, np.ndarray]):
+        """
+        Bulk insert readings given as column arrays (machine_id, timestamp, temperature,
+        vibration, power, status) and update each machine's latest state and the rollups
+        in the same transaction.
+        """
+        if len(columns["machine_id"]) == 0:
+            return
+        days = self.writer.execute(self._insert_columns, columns)
+        DB_ROWS_WRITTEN.inc(len(columns["machine_id"]), job="insert_columns")
+        self._after_commit(days, columns)
+
+    def bulk_insert(self) -> BulkInsert:
+        """Start a spooled single-transaction insert (feed chunks, then commit or abort)"""
+        return BulkInsert(self)
+
+    def _bulk_insert(self, cursor, chunks):
+        days = set()
+        for columns in chunks:
+            days.update(self._insert_columns(cursor, columns))
+        return sorted(days)
+
+    def _after_commit(self, days, columns):
+        """Publish a committed batch: new partitions, tick id, ingest listeners"""
+        self._register_partitions(days)
+        if columns is not None:
+            self._publish(lambda: (columns,))
+
+    def _publish(self, batches):
+        """Bump the tick id and notify listeners; batches() yields the committed rows in time order"""
+        with self._tick_lock:
+            seq = next(self._ticks)
+            for columns in batches():
+                self._notify(self._state_listeners, f"{self._boot}-{seq}", columns)
+            self.tick_seq = seq
+        for columns in batches():
+            self._notify(self._listeners, self.tick_id, columns)
+
+    def _notify(self, listeners, tick_id, columns):
+        for listener in listeners:
+            try:
+                listener(tick_id, columns)
+            except Exception as e:
+                ERRORS.inc(where="ingest_listener")
+                print(f"Ingest listener failed: {e}")
+
+    def _insert_columns(self, cursor, columns: Dict[str, np.ndarray]):
+        ids = np.asarray(columns["machine_id"], dtype=object)
+        timestamps = np.asarray(columns["timestamp"], dtype=object)
+        signals = [np.asarray(columns[c], dtype=np.float64) for c in SIGNAL_COLUMNS]
+        status = columns.get("status")
+        status = np.full(len(ids), "running", dtype=object) if status is None else np.asarray(status, dtype=object)
+
+        ts_values, ts_rank = np.unique(timestamps, return_inverse=True)
+
+        # Raw rows go to the partition of their day (a batch spans more than one only around midnight)
+        days = np.array([partition_day(t) for t in ts_values.tolist()], dtype=object)
+        batch_days = np.unique(days).tolist()
+        known = set(self._partitions)
+        for day in batch_days:
+            if day not in known:
+                self._create_partition(cursor, day)
+            sel = slice(None) if len(batch_days) == 1 else days[ts_rank] == day
+            rows = zip(ids[sel].tolist(), timestamps[sel].tolist(), *(v[sel].tolist() for v in signals), status[sel].tolist())
+            cursor.executemany(f'''
+                INSERT INTO {partition_table(day)} (machine_id, timestamp, temperature, vibration, power, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+        # Only each machine's newest row in the batch can change machine_latest
+        latest = slice(None)
+        if len(ts_values) > 1:
+            id_values, id_idx = np.unique(ids, return_inverse=True)
+            newest = np.full(len(id_values), -1)
+            np.maximum.at(newest, id_idx, ts_rank)
+            latest = ts_rank == newest[id_idx]
+
+        rows = zip(ids[latest].tolist(), timestamps[latest].tolist(),
+                   *(v[latest].tolist() for v in signals), status[latest].tolist())
+        # Late or backfilled readings never overwrite a newer state
         cursor.executemany('''
-            INSERT INTO machine_readings (machine_id, timestamp, temperature, vibration, power, status)
+            INSERT INTO machine_latest (machine_id, timestamp, temperature, vibration, power, status)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', data)
-        conn.commit()
-        conn.close()
+            ON CONFLICT(machine_id) DO UPDATE SET
+                timestamp = excluded.timestamp,
+                temperature = excluded.temperature,
+                vibration = excluded.vibration,
+                power = excluded.power,
+                status = excluded.status
+            WHERE excluded.timestamp >= machine_latest.timestamp
+        ''', rows)
+        self._update_rollups(cursor, ts_values, ts_rank, signals)
+        self._update_group_rollups(cursor, ids, ts_values, ts_rank, signals)
+        return batch_days
 
-    def get_latest_readings(self, limit=500):
-        """Get the most recent reading for each machine (approx)"""
+    def _update_rollups(self, cursor, ts_values, ts_rank, signals):
+        """Merge a batch into the minute and hour rollups (grouped in NumPy, one upsert per bucket)"""
+        for resolution in ROLLUPS:
+            keys = np.array([bucket_key(t, resolution) for t in ts_values.tolist()], dtype=object)
+            buckets, key_idx = np.unique(keys, return_inverse=True)
+            _, counts, stats = grouped_stats(key_idx[ts_rank], signals)
+            params = zip(buckets.tolist(), counts.tolist(), *(a.tolist() for a in stats))
+            cursor.executemany(ROLLUP_UPSERT[resolution], params)
+
+    def _update_group_rollups(self, cursor, ids, ts_values, ts_rank, signals):
+        """Merge a batch into the per-group rollups: one upsert per (dimension, bucket, group)"""
+        rows = machine_index.lookup(ids)
+        groups = [(dimension, *self.groups.codes(dimension, rows)) for dimension in GROUP_DIMENSIONS]
+        for resolution in GROUP_ROLLUPS:
+            keys = np.array([bucket_key(t, resolution) for t in ts_values.tolist()], dtype=object)
+            buckets, key_idx = np.unique(keys, return_inverse=True)
+            bucket_of_row = key_idx[ts_rank].astype(np.int64)
+            for dimension, codes, names in groups:
+                # One combined key per (bucket, group)
+                combined, counts, stats = grouped_stats(bucket_of_row * len(names) + codes, signals)
+                params = zip(
+                    [dimension] * len(combined), buckets[combined // len(names)].tolist(),
+                    [names[c] for c in (combined % len(names)).tolist()], counts.tolist(), *(a.tolist() for a in stats))
+                cursor.executemany(GROUP_ROLLUP_UPSERT[resolution], params)
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_latest_readings(self, limit=None, max_age=timedelta(minutes=2)):
+        """
+        Get the current reading of every machine from machine_latest.
+        Machines whose latest reading is older than max_age are treated as stale and left out,
+        so an empty result tells the simulator to generate a fresh tick.
+        """
         conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        
-        # Use Python time to ensure we only get RECENT fresh data
-        # If data is old (stale), this returns empty, forcing simulator to regenerate.
-        start_dt = datetime.now() - timedelta(minutes=2)
-        
+
+        start_dt = datetime.now() - max_age
         cursor.execute('''
-            SELECT * FROM machine_readings 
+            SELECT * FROM machine_latest
             WHERE timestamp > ?
-            ORDER BY timestamp DESC
+            ORDER BY machine_id
             LIMIT ?
-        ''', (start_dt.isoformat(), limit))
+        ''', (start_dt.isoformat(), limit if limit is not None else -1))
         rows = cursor.fetchall()
-        conn.close()
         return [dict(row) for row in rows]
 
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_latest_columns(self, max_age=timedelta(minutes=2)) -> FleetColumns:
+        """Same rows as get_latest_readings, as a columnar FleetColumns (no per-row dicts)"""
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = None
+        start_dt = datetime.now() - max_age
+        cursor.execute('''
+            SELECT machine_id, timestamp, temperature, vibration, power, status FROM machine_latest
+            WHERE timestamp > ?
+            ORDER BY machine_id
+        ''', (start_dt.isoformat(),))
+        return FleetColumns.from_tuples(cursor.fetchall())
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_readings_since(self, start_dt) -> Dict[str, np.ndarray]:
+        """Raw readings newer than start_dt as column arrays, oldest first"""
+        names = ("machine_id", "timestamp", "temperature", "vibration", "power")
+        tables = self.partitions(start_dt)
+        rows = []
+        if tables:
+            cursor = self.get_connection().cursor()
+            cursor.row_factory = None
+            sql = self._union_sql(", ".join(names), tables, "WHERE timestamp > ?")
+            cursor.execute(sql + " ORDER BY timestamp", (start_dt.isoformat(),) * len(tables))
+            rows = cursor.fetchall()
+        if not rows:
+            return {name: np.array([]) for name in names}
+        return {name: np.array(values) for name, values in zip(names, zip(*rows))}
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_machine_history(self, machine_id: str, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+        """
+        One machine's readings in [start, end], oldest first, as column arrays.
+        Raw partitions are read through their (machine_id, timestamp) index; the part of the
+        window older than the oldest raw partition comes from the per-machine minute rollup.
+        """
+        start_iso, end_iso = start.isoformat(), end.isoformat()
+        with self._partition_lock:
+            oldest = self._partitions[0] if self._partitions else None
+
+        parts, params = [], []
+        if oldest is None or partition_day(start_iso) < oldest:
+            rollup_end = end_iso if oldest is None else f"{oldest[:4]}-{oldest[4:6]}-{oldest[6:]}"
+            parts.append(f'''
+                SELECT bucket, temperature_sum / count, vibration_sum / count, power_sum / count
+                FROM {MACHINE_ROLLUP} WHERE machine_id = ? AND bucket >= ? AND bucket < ?
+            ''')
+            params += [machine_id, start_iso, min(rollup_end, end_iso)]
+        for table in self.partitions(start, end):
+            parts.append(f'''
+                SELECT timestamp, temperature, vibration, power
+                FROM {table} WHERE machine_id = ? AND timestamp >= ? AND timestamp <= ?
+            ''')
+            params += [machine_id, start_iso, end_iso]
+
+        cursor = self.get_connection().cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(" UNION ALL ".join(parts) + " ORDER BY 1", params).fetchall()
+        names = ("timestamp",) + SIGNAL_COLUMNS
+        if not rows:
+            return {"timestamp": np.array([], dtype="datetime64[us]"), **{c: np.array([]) for c in SIGNAL_COLUMNS}}
+        columns = dict(zip(names, zip(*rows)))
+        return {
+            "timestamp": np.array(columns["timestamp"], dtype="datetime64[us]"),
+            **{c: np.array(columns[c], dtype=np.float64) for c in SIGNAL_COLUMNS},
+        }
+
+    def machine_exists(self, machine_id: str) -> bool:
+        cursor = self.get_connection().cursor()
+        return cursor.execute("SELECT 1 FROM machine_latest WHERE machine_id = ?", (machine_id,)).fetchone() is not None
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
     def get_history(self, period="24h"):
         """
         Get aggregated history for charts.
         period: '24h' (Hourly), '60m' (Minutely), 'current' (Raw)
         """
         conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         now = datetime.now()
@@ -124,48 +950,25 @@ class Database:
         if period == "current":
             # Very tight window for "Current" (Last 2 minutes)
             start_dt = now - timedelta(minutes=2)
-            cursor.execute('''
-                SELECT 
-                    strftime('%Y-%m-%dT%H:%M:%S', timestamp) as timestamp,
-                    temperature, vibration, power
-                FROM machine_readings
-                WHERE timestamp > ?
-                ORDER BY timestamp ASC
-                LIMIT 2000
-            ''', (start_dt.isoformat(),))
+            tables = self.partitions(start_dt, now)
+            if not tables:
+                return []
+            sql = self._union_sql(
+                "strftime('%Y-%m-%dT%H:%M:%S', timestamp) as timestamp, temperature, vibration, power",
+                tables, "WHERE timestamp > ?")
+            cursor.execute(sql + " ORDER BY timestamp ASC LIMIT 2000", (start_dt.isoformat(),) * len(tables))
             
         elif period == "60m":
-            # Last 60 Minutes (Strict)
+            # Last 60 Minutes (Strict), from the per-minute rollup
             start_dt = now - timedelta(hours=1)
-            cursor.execute('''
-                SELECT 
-                    strftime('%Y-%m-%dT%H:%M:00', timestamp) as timestamp,
-                    AVG(temperature) as temperature,
-                    AVG(vibration) as vibration,
-                    AVG(power) as power
-                FROM machine_readings
-                WHERE timestamp > ?
-                GROUP BY strftime('%Y-%m-%dT%H:%M:00', timestamp)
-                ORDER BY timestamp ASC
-            ''', (start_dt.isoformat(),))
-            
+            self._query_rollup(cursor, "1m", start_dt)
+
         else:
-            # Last 24 Hours
+            # Last 24 Hours, from the per-hour rollup
             start_dt = now - timedelta(hours=24)
-            cursor.execute('''
-                SELECT 
-                    strftime('%Y-%m-%dT%H:00:00', timestamp) as timestamp,
-                    AVG(temperature) as temperature,
-                    AVG(vibration) as vibration,
-                    AVG(power) as power
-                FROM machine_readings
-                WHERE timestamp > ?
-                GROUP BY strftime('%Y-%m-%dT%H:00:00', timestamp)
-                ORDER BY timestamp ASC
-            ''', (start_dt.isoformat(),))
-            
+            self._query_rollup(cursor, "1h", start_dt)
+
         rows = cursor.fetchall()
-        conn.close()
         
         result = []
         for row in rows:
@@ -174,30 +977,255 @@ class Database:
             result.append(d)
         return result
 
+    def _query_rollup(self, cursor, resolution, start_dt):
+        table = ROLLUPS[resolution][0]
+        cursor.execute(f'''
+            SELECT
+                bucket as timestamp,
+                temperature_sum / count as temperature,
+                vibration_sum / count as vibration,
+                power_sum / count as power
+            FROM {table}
+            WHERE bucket > ?
+            ORDER BY bucket ASC
+        ''', (bucket_key(start_dt.isoformat(), resolution),))
+
+    def get_last_timestamp(self) -> Optional[datetime]:
+        """Time of the newest stored reading (None on an empty database)"""
+        c = self.get_connection().cursor()
+        for table in reversed(self.partitions()):
+            row = c.execute(f"SELECT MAX(timestamp) FROM {table}").fetchone()
+            if row[0] is not None:
+                return datetime.fromisoformat(row[0])
+        return None
+
     def has_any_data(self):
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT id FROM machine_readings LIMIT 1")
-        has_data = c.fetchone() is not None
-        conn.close()
-        return has_data
+        c = self.get_connection().cursor()
+        for table in reversed(self.partitions()):
+            if c.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None:
+                return True
+        return False
+
+    # --- Machine Metadata & Group Rollups ---
+    def set_machine_metadata(self, rows: List[Dict]) -> int:
+        """
+        Add or update machines' metadata (machine_id, sector, line, model, rated_capacity);
+        returns the number of changed machines. Readings are grouped by the metadata current
+        at ingest, except the first metadata load, which regroups the stored history.
+        """
+        return self.writer.execute(self._set_machine_metadata, [dict(r) for r in rows])
+
+    def _set_machine_metadata(self, cursor, rows):
+        cursor.execute('SELECT * FROM machine_metadata')
+        existing = {r["machine_id"]: dict(r) for r in cursor.fetchall()}
+        changed = [r for r in rows if existing.get(r["machine_id"]) != r]
+        if not changed:
+            return 0
+        cursor.executemany('''
+            INSERT INTO machine_metadata (machine_id, sector, line, model, rated_capacity)
+            VALUES (:machine_id, :sector, :line, :model, :rated_capacity)
+            ON CONFLICT(machine_id) DO UPDATE SET sector = excluded.sector, line = excluded.line,
+                model = excluded.model, rated_capacity = excluded.rated_capacity
+        ''', changed)
+        if not existing:
+            self._rebuild_group_rollups(cursor)
+        self.groups.set(changed)
+        return len(changed)
+
+    def _rebuild_group_rollups(self, cursor):
+        """Recompute the group rollups from raw partitions plus the per-machine rollup"""
+        with self._partition_lock:
+            tables = [partition_table(day) for day in self._partitions]
+        raw = ", ".join(f"{c} AS {c}_sum, {c} AS {c}_min, {c} AS {c}_max" for c in SIGNAL_COLUMNS)
+        sources = [f"SELECT machine_id, bucket AS ts, count AS n, {_rollup_stats_columns()} FROM {MACHINE_ROLLUP}"]
+        sources += [f"SELECT machine_id, timestamp AS ts, 1 AS n, {raw} FROM {table}" for table in tables]
+        aggs = ", ".join(f"SUM({c}_sum), MIN({c}_min), MAX({c}_max)" for c in SIGNAL_COLUMNS)
+        for resolution, table in GROUP_ROLLUPS.items():
+            _, length, suffix = ROLLUPS[resolution]
+            cursor.execute(f'DELETE FROM {table}')
+            for dimension in GROUP_DIMENSIONS:
+                cursor.execute(f'''
+                    INSERT INTO {table} (dimension, bucket, grp, count, {_rollup_stats_columns()})
+                    SELECT ?, substr(s.ts, 1, 10) || 'T' || substr(s.ts, 12, {length - 11}) || '{suffix}',
+                           COALESCE(m.{dimension}, ?), SUM(s.n), {aggs}
+                    FROM ({" UNION ALL ".join(sources)}) s
+                    LEFT JOIN machine_metadata m ON m.machine_id = s.machine_id
+                    GROUP BY 2, 3
+                ''', (dimension, UNASSIGNED))
+
+    def get_machine_metadata(self, sector: Optional[str] = None) -> List[Dict]:
+        cursor = self.get_connection().cursor()
+        if sector is None:
+            cursor.execute('SELECT * FROM machine_metadata ORDER BY machine_id')
+        else:
+            cursor.execute('SELECT * FROM machine_metadata WHERE sector = ? ORDER BY machine_id', (sector,))
+        return [dict(r) for r in cursor.fetchall()]
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_group_rollup(self, dimension: str, resolution: str, start_dt: datetime) -> List[Dict]:
+        """One dimension's rollup buckets after start_dt, per group, oldest first"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(f'''
+            SELECT grp, bucket, count, {_rollup_stats_columns()}
+            FROM {GROUP_ROLLUPS[resolution]}
+            WHERE dimension = ? AND bucket > ?
+            ORDER BY bucket ASC
+        ''', (dimension, bucket_key(start_dt.isoformat(), resolution)))
+        return [dict(r) for r in cursor.fetchall()]
+
+    # --- Alerts & Maintenance ---
+    def record_alert_transitions(self, opened, resolved, seen=()):
+        """
+        Persist one batch of alert state changes in a single transaction.
+        opened: (machine_id, condition, severity, confidence, action, opened_at) -> returns their new ids
+        resolved: (resolved_at, resolution, last_seen_at, alert_id); seen: (last_seen_at, alert_id)
+        """
+        return self.writer.execute(self._record_alert_transitions, list(opened), list(resolved), list(seen))
+
+    def _record_alert_transitions(self, cursor, opened, resolved, seen):
+        ids = []
+        for row in opened:
+            cursor.execute('''
+                INSERT INTO alerts (machine_id, condition, severity, confidence, action, opened_at, last_seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', tuple(row) + (row[-1],))
+            ids.append(cursor.lastrowid)
+        cursor.executemany('''
+            UPDATE alerts SET resolved_at = ?, resolution = ?, last_seen_at = ?
+            WHERE id = ? AND resolved_at IS NULL
+        ''', resolved)
+        cursor.executemany('UPDATE alerts SET last_seen_at = ? WHERE id = ? AND resolved_at IS NULL', seen)
+        return ids
+
+    def log_maintenance(self, entry: Dict, resolve_ids: List[int]) -> int:
+        """Insert a technician log and resolve the given open alerts with it; returns the log id"""
+        return self.writer.execute(self._log_maintenance, entry, list(resolve_ids))
+
+    def _log_maintenance(self, cursor, entry, resolve_ids):
+        cursor.execute('''
+            INSERT INTO maintenance_logs (machine_id, timestamp, diagnosis_id, technician_action, notes, resolved, alert_id)
+            VALUES (:machine_id, :timestamp, :diagnosis_id, :technician_action, :notes, :resolved, :alert_id)
+        ''', entry)
+        log_id = cursor.lastrowid
+        cursor.executemany('''
+            UPDATE alerts SET resolved_at = ?, resolution = 'technician', log_id = ?
+            WHERE id = ? AND resolved_at IS NULL
+        ''', [(entry["timestamp"], log_id, alert_id) for alert_id in resolve_ids])
+        return log_id
+
+    def get_open_alerts(self) -> List[Dict]:
+        cursor = self.get_connection().cursor()
+        return [dict(r) for r in cursor.execute('SELECT * FROM alerts WHERE resolved_at IS NULL ORDER BY id')]
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_alerts(self, status="all", machine_id=None, limit=50, before=None) -> List[Dict]:
+        """Newest first, keyset-paginated on id: pass the last id of a page as `before`"""
+        where, params = [], []
+        if status == "open":
+            where.append("resolved_at IS NULL")
+        elif status == "resolved":
+            where.append("resolved_at IS NOT NULL")
+        if machine_id is not None:
+            where.append("machine_id = ?")
+            params.append(machine_id)
+        if before is not None:
+            where.append("id < ?")
+            params.append(before)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        cursor = self.get_connection().cursor()
+        rows = cursor.execute(f'SELECT * FROM alerts {clause} ORDER BY id DESC LIMIT ?', params + [limit])
+        return [dict(r) for r in rows]
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_maintenance_logs(self, machine_id=None, limit=50, before=None) -> List[Dict]:
+        """Technician logs, newest first (keyset-paginated on id), with the diagnosis they refer to"""
+        where, params = [], []
+        if machine_id is not None:
+            where.append("l.machine_id = ?")
+            params.append(machine_id)
+        if before is not None:
+            where.append("l.id < ?")
+            params.append(before)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        cursor = self.get_connection().cursor()
+        rows = cursor.execute(f'''
+            SELECT l.*, COALESCE(r.diagnosis, a.condition) AS diagnosis
+            FROM maintenance_logs l
+            LEFT JOIN fault_rules r ON r.id = l.diagnosis_id
+            LEFT JOIN alerts a ON a.id = l.alert_id
+            {clause}
+            ORDER BY l.id DESC LIMIT ?
+        ''', params + [limit])
+        return [{**dict(r), "resolved": bool(r["resolved"])} for r in rows]
+
+    def get_rule_diagnosis(self, rule_id: int) -> Optional[str]:
+        row = self.get_connection().cursor().execute("SELECT diagnosis FROM fault_rules WHERE id = ?", (rule_id,)).fetchone()
+        return row[0] if row else None
 
     # --- Rule & Search Helpers ---
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
     def get_all_rules(self):
         conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
         rows = conn.cursor().execute("SELECT * FROM fault_rules").fetchall()
-        conn.close()
         return [dict(r) for r in rows]
 
-    def search_rules(self, query):
+    def get_rules_version(self):
+        conn = self.get_connection()
+        row = conn.cursor().execute("SELECT version FROM rules_meta WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def get_inference_rules(self):
+        """Rules with structured conditions, in the shape expected by the ES compiler"""
         conn = self.get_connection()
-        conn.row_factory = sqlite3.Row
         rows = conn.cursor().execute(
-            "SELECT * FROM fault_rules WHERE diagnosis LIKE ? OR action LIKE ?", 
-            (f'%{query}%', f'%{query}%')
+            "SELECT * FROM fault_rules WHERE conditions IS NOT NULL ORDER BY id"
         ).fetchall()
-        conn.close()
+        rules = []
+        for r in rows:
+            try:
+                when = json.loads(r['conditions'])
+            except ValueError as e:
+                print(f"Rule {r['id']} has invalid conditions: {e}")
+                continue
+            rules.append({
+                "id": r['id'],
+                "when": when,
+                "diagnosis": r['diagnosis'],
+                "action": r['action'],
+                "reasoning": r['reasoning'] or "",
+                "confidence": r['confidence'] if r['confidence'] is not None else 0.5,
+                "severity": r['severity'],
+            })
+        return rules
+
+    @timed(DB_QUERY_SECONDS, rows=DB_ROWS_RETURNED)
+    def search_rules(self, query, limit=20):
+        """
+        Ranked knowledge base search. Every word of the query must match as a prefix
+        (type-ahead, and "overheat" finds "Overheating") in the diagnosis, action,
+        reasoning or keywords.
+        """
+        conn = self.get_connection()
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        if not self.fts_enabled:
+            rows = conn.cursor().execute(
+                "SELECT * FROM fault_rules WHERE diagnosis LIKE ? OR action LIKE ? LIMIT ?",
+                (f'%{query}%', f'%{query}%', limit)
+            ).fetchall()
+            return [dict(r) for r in rows]
+
+        match = " ".join(f'"{w}"*' for w in words)
+        # bm25 column weights: diagnosis, action, reasoning, keywords
+        rows = conn.cursor().execute('''
+            SELECT r.*, bm25(fault_rules_fts, 10.0, 2.0, 1.0, 5.0) AS score
+            FROM fault_rules_fts JOIN fault_rules r ON r.id = fault_rules_fts.rowid
+            WHERE fault_rules_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+        ''', (match, limit)).fetchall()
         return [dict(r) for r in rows]
 
 db = Database()
@@ -0,0 +1,73 @@
+import numpy as np
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[us]").astype(np.int64)
+    return x.astype(np.float64)
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of at most `points` samples that keep the
+    visual shape of the series. First and last samples are always kept; each bucket in
+    between contributes the point forming the largest triangle with the previously
+    selected point and the average of the next bucket.
+    """
+    n = len(y)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        raise ValueError("LTTB needs at least 3 points")
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket boundaries over the interior samples 1..n-2
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of every bucket (the "third" point of each triangle), plus the last sample
+    counts = ends - starts
+    avg_x = np.add.reduceat(x[1:n - 1], starts - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], starts - 1) / counts
+    avg_x = np.append(avg_x, x[-1])
+    avg_y = np.append(avg_y, y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i, (lo, hi) in enumerate(zip(starts.tolist(), ends.tolist())):
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def minmax(y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Min/max-preserving downsampling: indices of the minimum and maximum of each of
+    points // 2 equal buckets, in time order. Never hides a spike.
+    """
+    n = len(y)
+    buckets = max(points // 2, 1)
+    if points >= n:
+        return np.arange(n)
+
+    bucket = np.arange(n) * buckets // n
+    # Within each bucket, sorted by value: first row is the min, last the max
+    order = np.lexsort((np.asarray(y), bucket))
+    sorted_bucket = bucket[order]
+    first = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    last = np.r_[first[1:] - 1, n - 1]
+    return np.unique(np.concatenate([order[first], order[last]]))
+
+METHODS = ("lttb", "minmax")
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str = "lttb") -> np.ndarray:
+    """Indices of the samples to keep, using one of METHODS"""
+    if method == "lttb":
+        return lttb(x, y, points)
+    if method == "minmax":
+        return minmax(y, points)
+    raise ValueError(f"Unknown downsampling method '{method}'")
@@ -1,11 +1,253 @@
-import pandas as pd
-from typing import List, Dict
+import os
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, TYPE_CHECKING
 from .models import MachineData, SimulationResult
+from .columnar import machine_index, occurrence_groups
+from .database import db
+from .metrics import timed, DSS_SECONDS
+from .es_engine import es_engine
+from . import montecarlo
+
+if TYPE_CHECKING:  # pandas is only needed by callers of analyze_trends; importing it costs ~0.2s
+    import pandas as pd
+
+SIGNALS = ("temperature", "vibration", "power")
 
 class DSSEngine:
-    def analyze_trends(self, data: pd.DataFrame) -> Dict:
+    """
+    Decision support over per-machine streaming statistics.
+
+    Every ingested tick updates, per machine and signal, in O(1):
+      - a fast EWMA (current level) and a slow EWMA + EW variance (baseline),
+      - an exponentially weighted least-squares slope (units per minute),
+      - a two-sided CUSUM of the standardized deviation from the baseline.
+    Trend, drift and bottleneck queries read this state directly instead of
+    re-aggregating history.
+    """
+    FAST_ALPHA = 0.3        # weight of the newest reading in the current level
+    SLOW_ALPHA = 0.02       # weight of the newest reading in the baseline
+    SLOPE_DECAY = 0.9       # per-tick forgetting factor of the slope regression
+    CUSUM_K = 0.5           # allowance, in baseline standard deviations
+    CUSUM_H = 5.0           # decision threshold
+    CUSUM_CLIP = 3.0        # cap per-tick evidence so a single spike is not a drift
+    WARMUP_TICKS = 20       # readings needed before a machine can be flagged
+    BOTTLENECK_POWER = 14   # kW, sustained (EWMA) power draw treated as saturation
+    # Scenario work (samples x machines x scenarios) above which the process pool is used
+    PARALLEL_MIN_CELLS = 4_000_000
+    MAX_SAMPLES = 100_000
+
+    def __init__(self, workers=None):
+        self._lock = threading.Lock()
+        self._t0 = None
+        self._allocate(0)
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _allocate(self, n):
+        shape = (n, len(SIGNALS))
+        self.fast = np.zeros(shape)
+        self.slow = np.zeros(shape)
+        self.var = np.zeros(shape)
+        self.cusum_hi = np.zeros(shape)
+        self.cusum_lo = np.zeros(shape)
+        # Exponentially weighted regression sums: w, t, y, t*t, t*y
+        self.s_w = np.zeros((n, 1))
+        self.s_t = np.zeros((n, 1))
+        self.s_y = np.zeros(shape)
+        self.s_tt = np.zeros((n, 1))
+        self.s_ty = np.zeros(shape)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.last_t = np.full(n, -np.inf)
+
+    def _grow(self, n):
+        size = len(self.count)
+        if n <= size:
+            return
+        n = max(n, size * 2)
+        for name in ("fast", "slow", "var", "cusum_hi", "cusum_lo", "s_w", "s_t", "s_y", "s_tt", "s_ty", "count", "last_t"):
+            old = getattr(self, name)
+            fill = -np.inf if name == "last_t" else 0
+            new = np.full((n,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:size] = old
+            setattr(self, name, new)
+
+    @timed(DSS_SECONDS)
+    def observe(self, columns):
+        """Ingest listener: fold a batch of readings (one or more ticks) into the per-machine state"""
+        idx = machine_index.lookup(np.asarray(columns["machine_id"], dtype=object))
+        ts = np.asarray(columns["timestamp"], dtype="datetime64[us]")
+        values = np.stack([np.asarray(columns[c], dtype=np.float64) for c in SIGNALS], axis=1)
+
+        with self._lock:
+            self._grow(len(machine_index))
+            if self._t0 is None:
+                self._t0 = ts.min()
+            minutes = (ts - self._t0) / np.timedelta64(1, "m")
+
+            # Each machine's readings in time order; one update per reading rank, not per timestamp
+            for rows in occurrence_groups(idx, minutes):
+                self._update(idx[rows], minutes[rows], values[rows])
+
+    def _update(self, idx, t, x):
+        fresh = t > self.last_t[idx]  # late readings never rewind the state
+        if not fresh.all():
+            idx, t, x = idx[fresh], t[fresh], x[fresh]
+        if not len(idx):
+            return
+
+        count = self.count[idx][:, None]
+        warm = count >= self.WARMUP_TICKS
+
+        # Levels and baseline. Until a machine has 1/alpha readings the weights fall back
+        # to a plain running mean/variance, so young baselines are not biased towards 0.
+        fast, slow, var = self.fast[idx], self.slow[idx], self.var[idx]
+        diff = x - slow
+        a = np.maximum(self.FAST_ALPHA, 1.0 / (count + 1))
+        b = np.maximum(self.SLOW_ALPHA, 1.0 / (count + 1))
+        self.fast[idx] = fast + a * (x - fast)
+        self.slow[idx] = slow + b * diff
+        self.var[idx] = (1 - b) * (var + b * diff * diff)
+
+        # CUSUM on the standardized deviation from the (previous) baseline
+        z = np.clip(diff / (np.sqrt(var) + 1e-9), -self.CUSUM_CLIP, self.CUSUM_CLIP)
+        z = np.where(warm, z, 0.0)
+        self.cusum_hi[idx] = np.maximum(0.0, self.cusum_hi[idx] + z - self.CUSUM_K)
+        self.cusum_lo[idx] = np.maximum(0.0, self.cusum_lo[idx] - z - self.CUSUM_K)
+
+        # Exponentially weighted least squares of value against time
+        d = self.SLOPE_DECAY
+        tc = t[:, None]
+        self.s_w[idx] = d * self.s_w[idx] + 1
+        self.s_t[idx] = d * self.s_t[idx] + tc
+        self.s_tt[idx] = d * self.s_tt[idx] + tc * tc
+        self.s_y[idx] = d * self.s_y[idx] + x
+        self.s_ty[idx] = d * self.s_ty[idx] + tc * x
+
+        self.count[idx] += 1
+        self.last_t[idx] = t
+
+    @timed(DSS_SECONDS)
+    def warm_start(self, database=db, window=timedelta(minutes=60)):
+        """Seed the streaming state from recent history after a restart"""
+        if self.count.any():
+            return
+        columns = database.get_readings_since(datetime.now() - window)
+        if len(columns["machine_id"]):
+            self.observe(columns)
+            print(f"--- DSS: warm-started streaming stats from {len(columns['machine_id'])} readings ---")
+
+    def _slopes(self, rows):
+        den = self.s_w[rows] * self.s_tt[rows] - self.s_t[rows] ** 2
+        num = self.s_w[rows] * self.s_ty[rows] - self.s_t[rows] * self.s_y[rows]
+        return np.where(den > 1e-9, num / np.where(den > 1e-9, den, 1.0), 0.0)
+
+    @timed(DSS_SECONDS)
+    def trend_summary(self) -> Dict:
+        """Fleet trend summary and bottlenecks from in-memory state"""
+        with self._lock:
+            rows = np.flatnonzero(self.count > 0)
+            if not len(rows):
+                return {"avg_temp": None, "avg_vib": None, "power_draw": 0.0, "bottlenecks": [], "drifting": 0}
+            fast = self.fast[rows]
+            drifting = np.count_nonzero(self._drift_score(rows).max(axis=1) > self.CUSUM_H)
+            bottleneck_rows = rows[fast[:, 2] > self.BOTTLENECK_POWER]
+
+        return {
+            "avg_temp": round(float(fast[:, 0].mean()), 2),
+            "avg_vib": round(float(fast[:, 1].mean()), 2),
+            "power_draw": round(float(fast[:, 2].sum()), 2),
+            "bottlenecks": sorted(machine_index.ids[i] for i in bottleneck_rows),
+            "drifting": int(drifting),
+        }
+
+    def _drift_score(self, rows):
+        score = np.maximum(self.cusum_hi[rows], self.cusum_lo[rows])
+        return np.where((self.count[rows] >= self.WARMUP_TICKS)[:, None], score, 0.0)
+
+    @timed(DSS_SECONDS)
+    def detect_drift(self, signal: str = None, limit: int = 50) -> List[Dict]:
+        """Machines whose CUSUM crossed the decision threshold, strongest first"""
+        columns = range(len(SIGNALS)) if signal is None else [SIGNALS.index(signal)]
+        with self._lock:
+            rows = np.flatnonzero(self.count > 0)
+            score = self._drift_score(rows)
+            slopes = self._slopes(rows)
+            hits = [(score[r, c], r, c) for c in columns for r in np.flatnonzero(score[:, c] > self.CUSUM_H)]
+            hits.sort(reverse=True)
+            result = []
+            for s, r, c in hits[:limit]:
+                i = rows[r]
+                result.append({
+                    "machine_id": machine_index.ids[i],
+                    "signal": SIGNALS[c],
+                    "direction": "up" if self.cusum_hi[i, c] >= self.cusum_lo[i, c] else "down",
+                    "cusum": round(float(s), 2),
+                    "level": round(float(self.fast[i, c]), 2),
+                    "baseline": round(float(self.slow[i, c]), 2),
+                    "slope_per_min": round(float(slopes[r, c]), 4),
+                })
+        return result
+
+    def baseline(self, machine_ids: Optional[List[str]] = None):
+        """Recent per-machine distribution (slow EWMA mean and std) for the given or all known machines"""
+        with self._lock:
+            if machine_ids is None:
+                rows = np.flatnonzero(self.count >= 2)
+            else:
+                # Client-supplied ids: never add them to the shared index
+                rows = machine_index.find(machine_ids)
+                unknown = [m for m, i in zip(machine_ids, rows.tolist()) if i < 0]
+                if unknown:
+                    raise LookupError(f"Unknown machine(s): {', '.join(unknown[:10])}")
+                rows = rows[rows < len(self.count)]
+                rows = rows[self.count[rows] >= 2]
+            mean = self.slow[rows].copy()
+            std = np.sqrt(self.var[rows])
+        return [machine_index.ids[i] for i in rows], mean, np.maximum(std, 1e-3)
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn, not fork: the server process runs DB writer and ingest threads
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    @timed(DSS_SECONDS)
+    def run_scenarios(self, scenarios: List[Dict[str, float]], machine_ids: Optional[List[str]] = None,
+                      samples: int = 2000, seed: Optional[int] = None) -> List[Dict]:
         """
-        Analyze data for simple trends. 
+        Monte Carlo what-if over many machines at once: each scenario maps parameters
+        (capacity, speed, ambient_temperature) to new values and gets percentile bands
+        for energy, output and fault risk. Large sweeps are split across a process pool.
+        """
+        if not 1 <= samples <= self.MAX_SAMPLES:
+            raise ValueError(f"samples must be between 1 and {self.MAX_SAMPLES}")
+        ids, mean, std = self.baseline(machine_ids)
+        if not ids:
+            raise LookupError("No telemetry statistics for the requested machines yet")
+
+        rules = [{"when": r["when"]} for r in es_engine.rules]
+        cells = samples * len(ids) * len(scenarios)
+        if cells >= self.PARALLEL_MIN_CELLS and self.workers > 1:
+            parts = max(1, -(-self.workers // len(scenarios)))
+            return montecarlo.run_scenarios(ids, mean, std, scenarios, rules, samples, seed, self._executor(), parts)
+        return montecarlo.run_scenarios(ids, mean, std, scenarios, rules, samples, seed)
+
+    @timed(DSS_SECONDS)
+    def analyze_trends(self, data: "pd.DataFrame") -> Dict:
+        """
+        Analyze data for simple trends.
         Returns summary stats and potential issues.
         """
         summary = {
@@ -14,31 +256,35 @@ class DSSEngine:
             "power_draw": data['power'].sum(),
             "bottlenecks": []
         }
-        
+
         # Simple bottleneck detection: Machines with consistently high utilization (approximated by power)
         high_power_machines = data[data['power'] > 14]['machine_id'].unique().tolist()
         if high_power_machines:
             summary['bottlenecks'] = high_power_machines
-            
+
         return summary
 
-    def run_simulation(self, machine_id: str, parameter: str, value: float, current_data: MachineData) -> SimulationResult:
+    @timed(DSS_SECONDS)
+    def run_simulation(self, machine_id: str, parameter: str, value: float, current_data) -> SimulationResult:
         """
         Run a what-if simulation.
         E.g. If specific machine capacity (parameter) is increased to X (value).
+        current_data: MachineData or a columnar ReadingRow (anything with .power)
         """
-        # Assumed logic: 
+        # Assumed logic:
         # Capacity increase -> Linearly increases power and temperature risk
-        
+        if parameter in montecarlo.PARAMETERS:
+            value = montecarlo.validate_changes({parameter: value})[parameter]
+
         original_value = 60.0 # Assumed base capacity %
-        
+
         # Simple formulas for simulation
         if parameter == "capacity":
             # Ratio of increase
             ratio = value / original_value
             new_power = current_data.power * ratio * 1.1 # 10% inefficiency overhead
             output_impact = ratio * 100 # percentage of original output
-            
+
             return SimulationResult(
                 machine_id=machine_id,
                 original_value=original_value,
@@ -46,7 +292,22 @@ class DSSEngine:
                 energy_impact=round(new_power - current_data.power, 2),
                 output_impact=round(output_impact, 2)
             )
-        
+
+        if parameter in montecarlo.PARAMETERS:
+            # Other parameters: median of a Monte Carlo run over the machine's recent telemetry
+            try:
+                result = self.run_scenarios([{parameter: value}], [machine_id], samples=1000)[0]
+            except LookupError:
+                return None
+            return SimulationResult(
+                machine_id=machine_id,
+                original_value=montecarlo.PARAMETERS[parameter],
+                new_value=value,
+                energy_impact=result["energy_impact_kw"]["p50"],
+                output_impact=result["output_pct"]["p50"]
+            )
+
         return None
 
 dss_engine = DSSEngine()
+db.add_ingest_listener(lambda tick_id, columns: dss_engine.observe(columns))
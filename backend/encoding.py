@@ -0,0 +1,192 @@
+import os
+import io
+import json
+import gzip
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+from .columnar import STATUS_NAMES
+
+try:
+    import orjson
+except ImportError:  # optional: several times faster than json for large lists
+    orjson = None
+try:
+    import brotli
+except ImportError:  # optional: brotli is offered only when installed
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("SF_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("SF_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("SF_BROTLI_QUALITY", "4"))
+
+# format name -> media type; ?format=<name> or the Accept header selects one
+FORMATS = {
+    "json": "application/json",
+    "columnar": "application/vnd.smartfactory.columnar+json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+MEDIA_TYPES = {media: name for name, media in FORMATS.items()}
+MEDIA_TYPES["application/x-msgpack"] = "msgpack"
+
+class NotAcceptable(Exception):
+    pass
+
+class Table:
+    """
+    A response payload as columns (name -> NumPy array or list, equal lengths).
+
+    Endpoints build one from their columnar data and `encode` renders it as row JSON
+    (the default, same shape as the pydantic models), columnar JSON, MessagePack or
+    Arrow, without building a model per row.
+    """
+    def __init__(self, columns: Dict[str, object]):
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], names=None) -> "Table":
+        names = names or (list(rows[0]) if rows else [])
+        return cls({name: [row[name] for row in rows] for name in names})
+
+    @classmethod
+    def from_models(cls, models, names) -> "Table":
+        return cls({name: [getattr(m, name) for m in models] for name in names})
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def lists(self) -> Dict[str, list]:
+        """Plain Python columns; datetimes become ISO strings"""
+        out = {}
+        for name, col in self.columns.items():
+            if isinstance(col, np.ndarray):
+                col = np.datetime_as_string(col, unit="us") if col.dtype.kind == "M" else col
+                col = col.tolist()
+            elif col and isinstance(col[0], datetime):
+                col = [t.isoformat() for t in col]
+            out[name] = col
+        return out
+
+    def rows(self) -> List[Dict]:
+        names = list(self.columns)
+        columns = [c.tolist() if isinstance(c, np.ndarray) else c for c in self.columns.values()]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+def frame_table(frame, rows=slice(None)) -> Table:
+    """MachineData-shaped table of (a slice of) a FleetColumns snapshot"""
+    return Table({
+        "machine_id": frame.machine_id[rows],
+        "timestamp": frame.timestamp[rows],
+        # float32 -> 2 decimals: the precision contract documented on MachineData
+        "temperature": frame.temperature[rows].astype(np.float64).round(2),
+        "vibration": frame.vibration[rows].astype(np.float64).round(2),
+        "power": frame.power[rows].astype(np.float64).round(2),
+        "status": np.asarray(STATUS_NAMES, dtype=object)[frame.status[rows]],
+    })
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+def _msgpack(table: Table) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        raise NotAcceptable("MessagePack responses require msgpack")
+    return msgpack.packb(table.lists())
+
+def _arrow(table: Table) -> bytes:
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise NotAcceptable("Arrow responses require pyarrow")
+    batch = pyarrow.table({name: pyarrow.array(col) for name, col in table.columns.items()})
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_table(batch)
+    return sink.getvalue()
+
+ENCODERS = {
+    "json": lambda table: dumps(table.rows()),
+    "columnar": lambda table: dumps(table.columns),
+    "msgpack": _msgpack,
+    "arrow": _arrow,
+}
+
+def _weighted(header: Optional[str]):
+    """(token, q) pairs of an Accept-style header; q=0 means "not acceptable" (RFC 9110)"""
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token:
+            yield token.strip().lower(), q
+
+def negotiate(format: Optional[str], accept: Optional[str]) -> str:
+    """Response format from ?format= or else the Accept header (highest q first); default json"""
+    if format:
+        if format not in FORMATS:
+            raise NotAcceptable(f"format must be one of {', '.join(FORMATS)}")
+        return format
+    best, best_q, refused = None, 0.0, set()
+    for media, q in _weighted(accept):
+        name = MEDIA_TYPES.get(media)
+        if name is None:
+            continue
+        if q <= 0:
+            refused.add(name)
+        elif q > best_q:
+            best, best_q = name, q
+    if best is None:
+        if "json" in refused:
+            raise NotAcceptable(f"Accept refuses application/json and names no other format; use one of {', '.join(FORMATS.values())}")
+        best = "json"
+    return best
+
+def content_coding(accept_encoding: Optional[str]) -> Optional[str]:
+    """br if installed and accepted, else gzip if accepted (q=0 refuses a coding)"""
+    offered = {coding for coding, q in _weighted(accept_encoding) if q > 0}
+    if brotli is not None and "br" in offered:
+        return "br"
+    return "gzip" if "gzip" in offered else None
+
+class Encoded:
+    """An encoded (and possibly compressed) body with its response headers"""
+    __slots__ = ("body", "headers")
+
+    def __init__(self, body: bytes, media_type: str, coding: Optional[str]):
+        self.body = body
+        self.headers = {"Content-Type": media_type, "Vary": "Accept, Accept-Encoding"}
+        if coding:
+            self.headers["Content-Encoding"] = coding
+
+def encode(table: Table, format: str = "json", coding: Optional[str] = None) -> Encoded:
+    body = ENCODERS[format](table)
+    if coding and len(body) >= COMPRESS_MIN_BYTES:
+        if coding == "br":
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        coding = None
+    return Encoded(body, FORMATS[format], coding)
@@ -1,54 +1,150 @@
-from typing import List
+import time
+import numpy as np
+from typing import List, Dict
 from .models import MachineData, Diagnosis
-from datetime import datetime
+from .rule_compiler import compile_rules
+from .database import db
+from .metrics import timed, ES_INFERENCE_SECONDS, ERRORS
+from .temporal import SignalHistory
+from .sharding import sharded_inference
+
+def columns_from_readings(readings: List[MachineData]) -> Dict[str, np.ndarray]:
+    """Convert a list of readings into the column layout used by diagnose_batch"""
+    return {
+        "machine_id": np.array([r.machine_id for r in readings], dtype=object),
+        "timestamp": np.array([r.timestamp for r in readings], dtype=object),
+        "temperature": np.array([r.temperature for r in readings], dtype=np.float64),
+        "vibration": np.array([r.vibration for r in readings], dtype=np.float64),
+        "power": np.array([r.power for r in readings], dtype=np.float64),
+    }
 
 class ESEngine:
-    def __init__(self):
-        # Sample Rule Base (subset of 200+)
-        self.rules = [
-            {
-                "condition": lambda d: d.vibration > 90 and d.temperature > 80,
-                "diagnosis": "Likely Bearing Failure",
-                "action": "Immediate shutdown recommended. Replace bearing assembly.",
-                "reasoning": "Simultaneous high vibration (>90Hz) and temperature (>80C) indicates mechanical friction consistent with bearing seizure.",
-                "confidence": 0.94
-            },
-            {
-                "condition": lambda d: d.vibration > 80 and d.power > 13,
-                "diagnosis": "Motor Misalignment",
-                "action": "Schedule realignment during next shift.",
-                "reasoning": "High vibration with increased power draw suggests motor shaft misalignment.",
-                "confidence": 0.87
-            },
-            {
-                "condition": lambda d: d.temperature > 95,
-                "diagnosis": "Coolant System Degradation",
-                "action": "Check coolant levels and pump function.",
-                "reasoning": "Temperature critical (>95C) without corresponding vibration spike points to thermal management failure.",
-                "confidence": 0.92
-            }
-        ]
+    # Seconds between checks of the fault_rules version for hot reload
+    RELOAD_INTERVAL = 2.0
+
+    def __init__(self, source=None, history=None, sharding=None):
+        # Rule base is read from the fault_rules table of `source` (a Database) and
+        # recompiled whenever the table changes. Without a source, use set_rules().
+        # `history` (a SignalHistory fed by ingest) backs temporal rule conditions.
+        # `sharding` (a ShardedInference) takes over evaluation of large snapshots.
+        self.source = source
+        self.history = history
+        self.sharding = sharding
+        self.rules_version = None
+        self._last_check = 0.0
+        self.set_rules([])
+
+    def set_rules(self, rules: List[Dict]):
+        """Compile a rule base: dicts with when/diagnosis/action/reasoning/confidence"""
+        self.plan = compile_rules(rules)
+        self.rules = self.plan.rules
+
+    def load_rules(self):
+        """(Re)compile the rule base from the database"""
+        version = self.source.get_rules_version()
+        self.set_rules(self.source.get_inference_rules())
+        self.rules_version = version
+        print(f"--- ES: compiled {len(self.rules)} rules into {self.plan.predicate_count} shared predicates ---")
+
+    def warm_start(self):
+        """Refill the temporal rule windows from recent history after a restart"""
+        if self.history is not None and self.source is not None:
+            self.history.warm_start(self.source)
+
+    def refresh(self):
+        """Hot reload: recompile if the fault_rules table changed since the last load"""
+        if self.source is None:
+            return
+        now = time.monotonic()
+        if self.rules_version is not None and now - self._last_check < self.RELOAD_INTERVAL:
+            return
+        self._last_check = now
+        try:
+            if self.source.get_rules_version() != self.rules_version:
+                self.load_rules()
+        except Exception as e:
+            ERRORS.inc(where="rule_reload")
+            print(f"Rule reload failed: {e}")
+
+    def _build(self, rule, machine_id, timestamp) -> Diagnosis:
+        return Diagnosis(
+            machine_id=machine_id,
+            timestamp=timestamp,
+            condition=rule["diagnosis"],
+            action=rule["action"],
+            reasoning=rule["reasoning"],
+            confidence=rule["confidence"]
+        )
+
+    def _evaluate(self, columns) -> List[np.ndarray]:
+        plan = self.plan
+        if self.sharding is not None and self.sharding.should_shard(len(columns["machine_id"])):
+            return self.sharding.evaluate(plan, columns, self.history)
+        return plan.evaluate(columns, self.history)
+
+    def close(self):
+        if self.sharding is not None:
+            self.sharding.close()
+        if self.history is not None:
+            self.history.close()
 
     def diagnose(self, reading: MachineData) -> List[Diagnosis]:
-        diagnoses = []
-        
-        for rule in self.rules:
-            if rule["condition"](reading):
-                diagnoses.append(Diagnosis(
-                    machine_id=reading.machine_id,
-                    timestamp=reading.timestamp,
-                    condition=rule["diagnosis"],
-                    action=rule["action"],
-                    reasoning=rule["reasoning"],
-                    confidence=rule["confidence"]
-                ))
-                
-        return diagnoses
+        return self.diagnose_batch(columns_from_readings([reading]))
+
+    def evaluate_masks(self, columns: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        """
+        Evaluate every rule against a whole snapshot at once.
+        Returns one boolean hit mask (one entry per machine) per rule.
+        """
+        self.refresh()
+        return self._evaluate(columns)
+
+    def diagnose_batch(self, columns: Dict[str, np.ndarray]) -> List[Diagnosis]:
+        """
+        Vectorized equivalent of diagnose_all over a column snapshot.
+        Diagnosis objects are only built for (machine, rule) pairs that fired,
+        ordered by machine then rule like diagnose_all.
+        """
+        self.refresh()
+        plan = self.plan
+        masks = self._evaluate(columns)
+        rows, rule_idx = [], []
+        for i, mask in enumerate(masks):
+            hit_rows = np.flatnonzero(mask)
+            if hit_rows.size:
+                rows.append(hit_rows)
+                rule_idx.append(np.full(hit_rows.size, i))
+        if not rows:
+            return []
+
+        rows = np.concatenate(rows)
+        rule_idx = np.concatenate(rule_idx)
+        order = np.lexsort((rule_idx, rows))
+        rows, rule_idx = rows[order], rule_idx[order]
+
+        # Only the rows that fired are converted to Python objects
+        ids = np.asarray(columns["machine_id"])[rows].tolist()
+        timestamps = np.asarray(columns["timestamp"])[rows]
+        if timestamps.dtype.kind == "M":
+            timestamps = timestamps.astype("datetime64[us]")
+        return [
+            self._build(plan.rules[r], m, t)
+            for r, m, t in zip(rule_idx.tolist(), ids, timestamps.tolist())
+        ]
+
+    @timed(ES_INFERENCE_SECONDS)
+    def diagnose_frame(self, frame) -> List[Diagnosis]:
+        """Diagnose a FleetColumns snapshot without building MachineData models"""
+        if not len(frame):
+            return []
+        return self.diagnose_batch(frame)
 
+    @timed(ES_INFERENCE_SECONDS)
     def diagnose_all(self, readings: List[MachineData]) -> List[Diagnosis]:
-        all_diagnoses = []
-        for reading in readings:
-            all_diagnoses.extend(self.diagnose(reading))
-        return all_diagnoses
+        if not readings:
+            return []
+        return self.diagnose_batch(columns_from_readings(readings))
 
-es_engine = ESEngine()
+es_engine = ESEngine(source=db, history=SignalHistory(shared=sharded_inference.enabled), sharding=sharded_inference)
+# Rule windows must include a tick before snapshots keyed on its tick id are built
+db.add_ingest_listener(lambda tick_id, columns: es_engine.history.observe(columns), before_publish=True)
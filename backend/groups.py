@@ -0,0 +1,75 @@
+import re
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+from .columnar import machine_index
+
+# Machine metadata columns that readings can be grouped by
+GROUP_DIMENSIONS = ("sector", "line", "model")
+# Group of machines without metadata
+UNASSIGNED = "unassigned"
+
+def natural_key(name: str):
+    """'Sector 9' sorts before 'Sector 10'"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+class GroupIndex:
+    """
+    Machine metadata (sector, line, model, rated capacity) plus, per dimension, a dense
+    group code for every machine_index row, so a batch of readings maps to its groups
+    with one array lookup. Machines without metadata fall in group 0 (UNASSIGNED).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metadata: Dict[str, Dict] = {}
+        self.names = {d: [UNASSIGNED] for d in GROUP_DIMENSIONS}
+        self._code_of = {d: {UNASSIGNED: 0} for d in GROUP_DIMENSIONS}
+        self._codes = {d: np.zeros(0, dtype=np.int32) for d in GROUP_DIMENSIONS}
+        self.version = 0
+
+    def set(self, rows: List[Dict]):
+        """Add or replace machines' metadata (dicts with machine_id and the GROUP_DIMENSIONS)"""
+        with self._lock:
+            for row in rows:
+                self.metadata[row["machine_id"]] = dict(row)
+                for d in GROUP_DIMENSIONS:
+                    value = row.get(d) or UNASSIGNED
+                    if value not in self._code_of[d]:
+                        self._code_of[d][value] = len(self.names[d])
+                        self.names[d].append(value)
+            # Metadata changes are rare: recode every known machine
+            self._codes = {d: np.zeros(0, dtype=np.int32) for d in GROUP_DIMENSIONS}
+            self._extend()
+            self.version += 1
+
+    def _extend(self):
+        size = len(self._codes[GROUP_DIMENSIONS[0]])
+        new = machine_index.ids[size:]
+        if not new:
+            return
+        for d in GROUP_DIMENSIONS:
+            code_of = self._code_of[d]
+            codes = [code_of[(self.metadata.get(m) or {}).get(d) or UNASSIGNED] for m in new]
+            self._codes[d] = np.concatenate([self._codes[d], np.array(codes, dtype=np.int32)])
+
+    def codes(self, dimension: str, rows: np.ndarray):
+        """Group code of each machine_index row, and the group names the codes index"""
+        with self._lock:
+            if len(self._codes[dimension]) < len(machine_index):
+                self._extend()
+            return self._codes[dimension][rows], list(self.names[dimension])
+
+    def members(self, dimension: str, group: Optional[str] = None) -> Dict[str, List[str]]:
+        """Machines with metadata per group (or of one group)"""
+        out = {}
+        with self._lock:
+            for machine_id, row in self.metadata.items():
+                value = row.get(dimension) or UNASSIGNED
+                if group is None or value == group:
+                    out.setdefault(value, []).append(machine_id)
+        return out
+
+    def rated_capacity(self, machine_ids: List[str]) -> float:
+        with self._lock:
+            return float(sum((self.metadata.get(m) or {}).get("rated_capacity") or 0 for m in machine_ids))
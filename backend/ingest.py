@@ -0,0 +1,150 @@
+import os
+import time
+import queue
+import threading
+from datetime import datetime
+from typing import List, Dict
+import numpy as np
+
+from .simulator import simulator
+from .database import db, concat_columns
+from .metrics import ERRORS
+
+# Tick rate and backpressure limits, configurable per deployment
+TICK_INTERVAL = float(os.getenv("SF_TICK_INTERVAL", "10"))   # seconds between simulator ticks
+QUEUE_SIZE = int(os.getenv("SF_INGEST_QUEUE", "32"))          # ticks buffered before dropping
+BATCH_TICKS = int(os.getenv("SF_INGEST_BATCH", "8"))          # max ticks written per transaction
+
+class IngestLoop:
+    """
+    Background ingestion, decoupled from request handling.
+
+    A producer thread emits simulator ticks at a fixed rate into a bounded queue;
+    a consumer thread drains whatever is queued and writes it to the DB as one
+    batch. When the writer falls behind, the oldest queued tick is dropped so the
+    dashboard always converges on the freshest state.
+    """
+    def __init__(self, source=simulator, database=db, interval=TICK_INTERVAL,
+                 max_queue=QUEUE_SIZE, max_batch=BATCH_TICKS):
+        self.source = source
+        self.database = database
+        self.interval = interval
+        self.max_batch = max_batch
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # Backpressure metrics
+        self.ticks_produced = 0
+        self.ticks_written = 0
+        self.ticks_dropped = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.last_batch_ms = 0.0
+        self.avg_batch_ms = 0.0
+        self.max_batch_ms = 0.0
+        self.last_write_at = None
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._produce, name="ingest-producer", daemon=True),
+            threading.Thread(target=self._consume, name="ingest-consumer", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        print(f"--- Ingest loop started: 1 tick / {self.interval}s, queue {self.queue.maxsize}, batch {self.max_batch} ---")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def request_tick(self):
+        """Ask the producer for an immediate tick instead of waiting for the next interval"""
+        self._wake.set()
+
+    def _offer(self, tick: Dict[str, np.ndarray]):
+        with self._lock:
+            self.ticks_produced += 1
+            while True:
+                try:
+                    self.queue.put_nowait(tick)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.ticks_dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def _produce(self):
+        while not self._stop.is_set():
+            try:
+                self._offer(self.source.generate_columns([datetime.now()]))
+            except Exception as e:
+                ERRORS.inc(where="tick_generation")
+                print(f"Tick generation failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _consume(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            try:
+                batch = [self.queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, np.ndarray]]):
+        start = time.perf_counter()
+        try:
+            self.database.insert_columns(concat_columns(batch))
+        except Exception as e:
+            self.write_errors += 1
+            ERRORS.inc(where="ingest_write")
+            print(f"Ingest write failed ({len(batch)} ticks dropped): {e}")
+            return
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.ticks_written += len(batch)
+        self.batches_written += 1
+        self.last_batch_ms = elapsed
+        self.max_batch_ms = max(self.max_batch_ms, elapsed)
+        self.avg_batch_ms = elapsed if self.batches_written == 1 else 0.9 * self.avg_batch_ms + 0.1 * elapsed
+        self.last_write_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "tick_interval_s": self.interval,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "ticks_produced": self.ticks_produced,
+            "ticks_written": self.ticks_written,
+            "ticks_dropped": self.ticks_dropped,
+            "batches_written": self.batches_written,
+            "write_errors": self.write_errors,
+            "last_batch_ms": round(self.last_batch_ms, 2),
+            "avg_batch_ms": round(self.avg_batch_ms, 2),
+            "max_batch_ms": round(self.max_batch_ms, 2),
+            "last_write_age_s": round(time.time() - self.last_write_at, 1) if self.last_write_at else None,
+        }
+
+ingest_loop = IngestLoop()
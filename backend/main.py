@@ -1,17 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
+import asyncio
 from typing import List, Dict, Optional
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from datetime import timedelta
 from pydantic import BaseModel
 
-from .models import MachineData, Diagnosis, SimulationRequest, SimulationResult
+from .models import MachineData, Diagnosis, SimulationRequest, SimulationResult, ScenarioRequest, ScenarioSweepRequest
 from .simulator import simulator
 from .dss_engine import dss_engine
 from .es_engine import es_engine
 from .database import db
+from .ingest import ingest_loop
+from .snapshot import snapshot_cache
+from .stream import telemetry_hub
+from .retention import retention_worker
+from .search import rule_search
+from .bulk_ingest import bulk_ingest, BodyReader, IngestError, UnsupportedFormat
+from .downsample import downsample, METHODS as DOWNSAMPLE_METHODS
+from .metrics import metrics, MetricsMiddleware, ERRORS
+from .alerts import alert_manager
+from .warmup import warmup
+from .async_db import adb, run_cpu, coalescer, close_executors
+from .encoding import Table, frame_table, encode, negotiate, content_coding, NotAcceptable, FORMATS
+from .aggregate import group_aggregator
 
 app = FastAPI(title="Smart Manufacturing Hybrid System")
 
@@ -19,10 +33,26 @@ app = FastAPI(title="Smart Manufacturing Hybrid System")
 def startup_event():
     print("--- BACKEND STARTUP: Initializing Local DB ---")
     db.init_db()
-    # Check if we need to seed history
-    simulator.ensure_history()
+    es_engine.load_rules()
+    alert_manager.load()
+    # Streaming state seeding, history gap-fill, then the live ingest loop (request
+    # handlers only read) run in the background; endpoints report "warming" until done
+    warmup.start()
+    telemetry_hub.start()
+    retention_worker.start()
     print("--- BACKEND SERVER RUNNING ON PORT 8000 (LOCAL SQLITE) ---")
 
+@app.on_event("shutdown")
+def shutdown_event():
+    retention_worker.stop()
+    telemetry_hub.stop()
+    warmup.stop()
+    ingest_loop.stop()
+    dss_engine.close()
+    es_engine.close()
+    close_executors()
+    db.close()
+
 # CORS for Frontend
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +62,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms (and ?profile=1 when SF_PROFILING=1)
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware)
+
+def _cache_samples(**caches):
+    return [sample for name, cache in caches.items()
+            for sample in (({"cache": name, "result": "hit"}, cache.hits), ({"cache": name, "result": "miss"}, cache.misses))]
+
+metrics.gauge("sf_cache_requests_total", "Snapshot and knowledge base search cache lookups",
+              lambda: _cache_samples(snapshot=snapshot_cache, rule_search=rule_search, aggregate=group_aggregator),
+              kind="counter")
+metrics.gauge("sf_ingest_queue_depth", "Ticks waiting for the ingest writer", lambda: ingest_loop.queue.qsize())
+metrics.gauge("sf_ingest_ticks_total", "Ingest loop ticks by outcome", lambda: [
+    ({"outcome": "produced"}, ingest_loop.ticks_produced),
+    ({"outcome": "written"}, ingest_loop.ticks_written),
+    ({"outcome": "dropped"}, ingest_loop.ticks_dropped),
+], kind="counter")
+metrics.gauge("sf_db_writer_queue_depth", "Jobs waiting for the SQLite writer thread", lambda: db.writer.jobs.qsize())
+metrics.gauge("sf_db_partitions", "Raw readings day partitions", lambda: len(db.partitions()))
+metrics.gauge("sf_stream_subscribers", "Connected SSE clients", lambda: len(telemetry_hub.subscribers))
+metrics.gauge("sf_alerts_open", "Open alerts", lambda: len(alert_manager.open))
+metrics.gauge("sf_alert_transitions_total", "Alert lifecycle transitions", lambda: [
+    ({"type": "opened"}, alert_manager.opened_total),
+    ({"type": "resolved"}, alert_manager.resolved_total),
+], kind="counter")
+metrics.gauge("sf_coalesced_requests_total", "Read requests that started a computation or joined one in flight",
+              lambda: [({"outcome": "started"}, coalescer.started), ({"outcome": "joined"}, coalescer.joined)],
+              kind="counter")
+metrics.gauge("sf_bulk_ingest_rows_total", "Readings written through POST /api/ingest",
+              lambda: bulk_ingest.rows_written, kind="counter")
+
 # New Models for Requests
 class MaintenanceLogRequest(BaseModel):
     machine_id: str
@@ -39,55 +100,182 @@ class MaintenanceLogRequest(BaseModel):
     technician_action: str
     notes: str
     resolved: bool = True
+    alert_id: Optional[int] = None
 
 class SearchQuery(BaseModel):
     query: str
 
+# Read endpoints are async: SQLite reads run on the dedicated read pool (adb), CPU-heavy
+# work on run_cpu, and identical concurrent reads share one computation (coalescer).
+# Handlers that write stay sync and run in Starlette's threadpool.
+
+async def _snapshot():
+    """Current per-tick snapshot; a rebuild runs off the event loop, shared by concurrent requests"""
+    return snapshot_cache.peek() or await coalescer.run(("snapshot", db.tick_id, es_engine.rules_version), run_cpu,
+                                                        snapshot_cache.get)
+
 @app.get("/")
-def read_root():
-    return {"status": "System Online", "modules": ["Simulator", "DSS", "ES", "LocalDB"]}
+async def read_root():
+    return {"status": "System Online", "state": warmup.state, "modules": ["Simulator", "DSS", "ES", "LocalDB"]}
+
+@app.get("/api/startup/status")
+async def get_startup_status():
+    """Background warmup (streaming state seeding, history gap-fill) progress"""
+    return warmup.stats()
 
 @app.post("/api/refresh")
 def force_refresh():
-    """Force data generation step into DB"""
-    new_data = simulator.get_latest_readings()
-    return {"status": "Refreshed and Synced to DB", "machines_monitored": len(new_data)}
+    """Ask the ingest loop for an immediate tick (written asynchronously)"""
+    ingest_loop.request_tick()
+    return {"status": "Tick requested", "machines_monitored": len(simulator.machines)}
+
+@app.get("/api/ingest/status")
+async def get_ingest_status():
+    """Background ingestion backpressure metrics, plus bulk ingest counters"""
+    return {**ingest_loop.stats(), "bulk": bulk_ingest.stats()}
+
+@app.post("/api/ingest")
+async def ingest_bulk(request: Request):
+    """
+    Bulk readings from sensor gateways, streamed: NDJSON (one reading object per line),
+    a packed NumPy .npy structured array, or an Arrow IPC stream (needs pyarrow).
+    Validated per chunk and written in one transaction: all rows or none.
+    """
+    try:
+        read = bulk_ingest.reader_for(request.headers.get("content-type"))
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    source = BodyReader(request.stream(), asyncio.get_running_loop())
+    try:
+        return await asyncio.to_thread(bulk_ingest.ingest, read, source)
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except IngestError as e:
+        raise HTTPException(status_code=422, detail={"error": str(e), "row": e.row})
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of the hot-path timers, counters and cache/queue gauges"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (SF_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/storage/status")
+async def get_storage_status():
+    """Partitions, retention policy and maintenance counters"""
+    return retention_worker.stats()
+
+@app.get("/api/stream")
+async def stream_telemetry(request: Request):
+    """
+    Server-Sent Events: a full 'snapshot' event on connect, then one 'delta' event per tick
+    (changed readings, new/cleared diagnoses, overview counters, fleet averages).
+    """
+    subscriber = telemetry_hub.subscribe(asyncio.get_running_loop())
+
+    async def events():
+        try:
+            async for chunk in telemetry_hub.events(subscriber):
+                if await request.is_disconnected():
+                    break
+                yield chunk
+        finally:
+            telemetry_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/stream/status")
+async def get_stream_status():
+    return {**telemetry_hub.stats(), "coalescing": coalescer.stats()}
+
+@app.get("/api/es/status")
+async def get_es_status():
+    """Compiled rule base, temporal rule windows and sharded inference counters"""
+    return {"rules": len(es_engine.rules), "predicates": es_engine.plan.predicate_count,
+            "windows": es_engine.history.stats(), "sharding": es_engine.sharding.stats()}
 
 @app.get("/api/es/rules")
-def get_all_rules():
+async def get_all_rules():
     """Get all rules"""
     try:
-        return db.get_all_rules()
+        return await coalescer.run("rules", adb.get_all_rules)
     except Exception as e:
+        ERRORS.inc(where="rules_endpoint")
         print(f"Rules Error: {e}")
         return []
 
+def _etag(snapshot, fmt="json", coding=None) -> str:
+    """Validator of one representation of a snapshot: tick, rules version, format and coding"""
+    return '"%s-%s-%s"' % (snapshot.etag.strip('"'), fmt, coding or "identity")
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match (weak comparison, lists and *) against `etag`"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag in tags
+
+def _etag_response(request: Request, response: Response, snapshot):
+    """Tag a snapshot-backed JSON response; returns a 304 if the client already has this tick"""
+    headers = {"ETag": _etag(snapshot), "Cache-Control": "no-cache"}
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def _encoded_responses(model):
+    """OpenAPI description of an _encoded endpoint: `model` rows as JSON, or another negotiated format"""
+    return {200: {"model": model, "description": "Rows as JSON by default; ?format= or Accept selects another encoding",
+                  "content": {media: {} for name, media in FORMATS.items() if name != "json"}}}
+
+# Bulk payloads below this many rows are encoded on the event loop
+INLINE_ENCODE_ROWS = 1000
+
+async def _encoded(request: Request, table, snapshot=None, variant=()) -> Response:
+    """
+    Bulk response in the format the client asked for (?format=json|columnar|msgpack|arrow or
+    Accept), compressed per Accept-Encoding. `table` returns the payload as a Table; with
+    `snapshot`, each variant is encoded once per tick and shared by every client, and
+    tagged per format and coding so a conditional request is answered with a 304.
+    """
+    try:
+        fmt = negotiate(request.query_params.get("format"), request.headers.get("accept"))
+        coding = content_coding(request.headers.get("accept-encoding"))
+        if snapshot is not None:
+            cache_headers = {"ETag": _etag(snapshot, fmt, coding), "Cache-Control": "no-cache",
+                             "Vary": "Accept, Accept-Encoding"}
+            if _not_modified(request, cache_headers["ETag"]):
+                return Response(status_code=304, headers=cache_headers)
+            key = variant + (fmt, coding)
+            encoded = snapshot.memo(key) or await coalescer.run(
+                (snapshot.key,) + key, run_cpu, snapshot.memo, key, lambda: encode(table(), fmt, coding))
+        else:
+            table = table()
+            if len(table) < INLINE_ENCODE_ROWS:
+                encoded = encode(table, fmt, coding)
+            else:
+                encoded = await run_cpu(encode, table, fmt, coding)
+    except NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    headers = dict(encoded.headers)
+    if snapshot is not None:
+        headers.update(cache_headers)
+    return Response(encoded.body, headers=headers)
+
 @app.get("/api/dashboard/overview")
-def get_overview():
+async def get_overview(request: Request, response: Response):
     """Combined view for the dashboard"""
     try:
-        current_readings = simulator.get_latest_readings()
-        active_machines = 490 # Fixed: 10 machines OFF as requested
-        
-        active_diagnoses = es_engine.diagnose_all(current_readings)
-        alert_count = len(active_diagnoses)
-        critical_count = len([d for d in active_diagnoses if "Critical" in d.reasoning or d.confidence > 0.9])
-
-        # Calculated Business Metrics
-        production = 98.4 - (alert_count * 0.1)
-        avg_power = sum([r.power for r in current_readings]) / len(current_readings) if current_readings else 10
-        efficiency = 100 - ((avg_power - 10) * 5) if avg_power > 10 else 98.5
-
-        return {
-            "active_machines": active_machines,
-            "total_machines": 500,
-            "active_alerts": alert_count,
-            "critical_alerts": critical_count,
-            "production_output": round(production, 1),
-            "energy_efficiency": round(efficiency, 1),
-            "system_health": "Optimal" if alert_count < 10 else "Attention Required"
-        }
+        snapshot = await _snapshot()
+        if warmup.warming:
+            # Not cacheable: the same tick reads differently once warmup completes
+            return {**snapshot.overview, "system_health": "Warming Up", "state": warmup.state}
+        return _etag_response(request, response, snapshot) or {**snapshot.overview, "state": warmup.state}
     except Exception as e:
+        ERRORS.inc(where="overview_endpoint")
         print(f"Overview Error: {e}")
         return {
             "active_machines": 0, "total_machines": 500, "active_alerts": 0, "critical_alerts": 0,
@@ -95,7 +283,7 @@ def get_overview():
         }
 
 @app.get("/api/dss/forecast")
-def get_efficiency_forecast():
+async def get_efficiency_forecast():
     return {
         "current_efficiency": 94.0,
         "projected_efficiency": 92.5,
@@ -105,71 +293,194 @@ def get_efficiency_forecast():
     }
 
 @app.get("/api/dss/trends")
-def get_trends():
-    """Get trend analysis from DSS using latest data"""
-    try:
-        # Use history fetch for trends
-        history = db.get_history(period="60m")
-        if not history: return {}
-        df = pd.DataFrame(history)
-        return dss_engine.analyze_trends(df)
-    except:
-        return {}
-
-@app.get("/api/es/diagnoses", response_model=List[Diagnosis])
-def get_diagnoses():
+async def get_trends():
+    """Fleet trend summary from the DSS streaming per-machine statistics"""
+    return await coalescer.run("dss_trends", run_cpu, dss_engine.trend_summary)
+
+@app.get("/api/dss/drift")
+async def get_drift(signal: Optional[str] = None, limit: int = 50):
+    """Machines whose health signals are drifting away from their own baseline (CUSUM)"""
+    if signal is not None and signal not in ("temperature", "vibration", "power"):
+        raise HTTPException(status_code=400, detail=f"Unknown signal '{signal}'")
+    return await coalescer.run(("dss_drift", signal, limit), run_cpu, dss_engine.detect_drift, signal, limit)
+
+@app.get("/api/es/diagnoses", responses=_encoded_responses(List[Diagnosis]))
+async def get_diagnoses(request: Request):
     """Get current active diagnoses"""
-    latest = simulator.get_latest_readings()
-    return es_engine.diagnose_all(latest)
+    snapshot = await _snapshot()
+    return await _encoded(
+        request, lambda: Table.from_models(snapshot.diagnoses, Diagnosis.model_fields), snapshot, ("diagnoses",))
 
 @app.get("/api/es/search")
-def search_knowledge_base(q: str):
-    """Search the 'fault_rules' table"""
+async def search_knowledge_base(q: str, limit: int = 20):
+    """Ranked full-text search of the fault_rules knowledge base (prefix match for type-ahead)"""
     if not q: return []
     try:
-        return db.search_rules(q)
+        return await adb.run(rule_search.search, q, max(1, min(limit, 100)))
     except Exception as e:
+        ERRORS.inc(where="search_endpoint")
         print(f"Search Error: {e}")
         return []
 
 @app.post("/api/maintenance/log")
 def log_maintenance(log: MaintenanceLogRequest):
-    """Log technician action"""
-    # Skipping implementation for speed, but DB has table
-    return {"status": "Logged (Stub)"}
+    """Log technician action; resolved=True closes the alert(s) it refers to"""
+    result = alert_manager.log_maintenance(log.machine_id, log.technician_action, log.notes, log.resolved,
+                                           log.diagnosis_id, log.alert_id)
+    return {"status": "Logged", **result}
+
+def _page_limit(limit: int) -> int:
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    return limit
+
+@app.get("/api/maintenance/logs")
+async def get_maintenance_logs(machine_id: Optional[str] = None, limit: int = 50, before: Optional[int] = None):
+    """Technician logs, newest first; page with before=<last id>"""
+    return await adb.get_maintenance_logs(machine_id, _page_limit(limit), before)
+
+@app.get("/api/alerts")
+async def get_alerts(status: str = "open", machine_id: Optional[str] = None, limit: int = 50, before: Optional[int] = None):
+    """Alert episodes (open, resolved or all), newest first; page with before=<last id>"""
+    if status not in ("open", "resolved", "all"):
+        raise HTTPException(status_code=400, detail="status must be open, resolved or all")
+    if status == "open":
+        # The alert lock can be held across a transition write, so don't wait for it on the loop
+        return await adb.run(alert_manager.list_open, machine_id, _page_limit(limit), before)
+    return await adb.get_alerts(status, machine_id, _page_limit(limit), before)
+
+@app.get("/api/alerts/events")
+async def get_alert_events(since: int = 0, limit: int = 100):
+    """Alert transitions (opened/resolved) after sequence number `since`"""
+    return await adb.run(alert_manager.events_since, since, _page_limit(limit))
+
+@app.get("/api/alerts/status")
+async def get_alert_status():
+    return alert_manager.stats()
 
 @app.post("/api/dss/simulate", response_model=SimulationResult)
-def run_simulation(req: SimulationRequest):
+async def run_simulation(req: SimulationRequest):
     """Run a what-if scenario"""
-    latest = simulator.get_latest_readings()
-    machine = next((m for m in latest if m.machine_id == req.machine_id), None)
+    machine = (await _snapshot()).reading(req.machine_id)
     if not machine:
         raise HTTPException(status_code=404, detail="Machine not found")
-        
-    result = dss_engine.run_simulation(req.machine_id, req.parameter, req.value, machine)
+
+    try:
+        result = await run_cpu(dss_engine.run_simulation, req.machine_id, req.parameter, req.value, machine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not result:
         raise HTTPException(status_code=400, detail="Simulation failed")
     return result
 
+async def _run_scenarios(scenarios, req):
+    machine_ids = req.machine_ids
+    if req.sector is not None:
+        members = db.groups.members("sector", req.sector).get(req.sector)
+        if not members:
+            raise HTTPException(status_code=404, detail=f"Unknown sector '{req.sector}'")
+        in_sector = set(members)
+        machine_ids = members if machine_ids is None else [m for m in machine_ids if m in in_sector]
+    try:
+        return await run_cpu(dss_engine.run_scenarios, scenarios, machine_ids, req.samples, req.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.post("/api/dss/scenario")
+async def run_scenario(req: ScenarioRequest):
+    """Monte Carlo what-if for many machines: percentile bands for energy, output and fault risk"""
+    return (await _run_scenarios([req.changes], req))[0]
+
+@app.post("/api/dss/scenario/sweep")
+async def run_scenario_sweep(req: ScenarioSweepRequest):
+    """Several scenarios over the same machines (parallelized for large sweeps)"""
+    if not req.scenarios:
+        raise HTTPException(status_code=400, detail="No scenarios given")
+    return await _run_scenarios(req.scenarios, req)
+
 @app.get("/api/dashboard/history")
-def get_dashboard_history(period: str = "24h"):
+async def get_dashboard_history(request: Request, period: str = "24h"):
     """
     Get simulated history for charts.
     period: '24h' (Hourly agg), '60m' (Minute agg), 'current' (Last 10m distinct)
     """
     try:
-        # Use specialized DB method for aggregation
-        return db.get_history(period)
+        # Use specialized DB method for aggregation; dashboards polling the same period share one query
+        rows = await coalescer.run(("history", period), adb.get_history, period)
     except Exception as e:
+        ERRORS.inc(where="history_endpoint")
         print(f"History Endpoint Fail: {e}")
-        return []
+        rows = []
+    return await _encoded(request, lambda: Table.from_rows(rows))
 
-@app.get("/api/machines", response_model=List[MachineData])
-def get_machines(limit: int = 50):
-    """Raw machine data"""
+@app.get("/api/aggregate")
+async def get_aggregate(group_by: str = "sector", metric: str = "power", window: str = "1h", series: bool = False):
+    """Readings aggregated per sector, line or model over the last `window` (e.g. 15m, 1h, 7d)"""
     try:
-        # Convert dicts back to Pydantic models
-        raw = db.get_latest_readings(limit)
-        return [MachineData(**r) for r in raw]
-    except:
-        return simulator.get_latest_readings()[:limit]
+        return await coalescer.run(("aggregate", group_by, metric, window, series),
+                                   adb.run, group_aggregator.aggregate, group_by, metric, window, series)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/machines/metadata")
+async def get_machine_metadata(sector: Optional[str] = None):
+    """Sector, line, model and rated capacity of each machine"""
+    return await adb.get_machine_metadata(sector)
+
+@app.get("/api/machines", responses=_encoded_responses(List[MachineData]))
+async def get_machines(request: Request, limit: int = 50):
+    """Raw machine data"""
+    limit = _page_limit(limit)
+    snapshot = await _snapshot()
+    return await _encoded(
+        request, lambda: frame_table(snapshot.frame, slice(0, limit)), snapshot, ("machines", limit))
+
+def _local_naive(ts: datetime) -> datetime:
+    """Stored timestamps are naive local time; bring aware query parameters in line"""
+    return ts.astimezone().replace(tzinfo=None) if ts.tzinfo else ts
+
+def _downsample_series(history, wanted, points, method):
+    timestamps = history["timestamp"]
+    labels = np.datetime_as_string(timestamps, unit="s")
+    series = {}
+    for signal in wanted:
+        keep = downsample(timestamps, history[signal], points, method)
+        values = history[signal][keep].round(2).tolist()
+        series[signal] = [{"timestamp": t, "value": v} for t, v in zip(labels[keep].tolist(), values)]
+    return series
+
+@app.get("/api/machines/{machine_id}/history")
+async def get_machine_history(machine_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                              points: int = 500, method: str = "lttb", signals: str = "temperature,vibration,power"):
+    """
+    One machine's series over [start, end] (default: the last hour), downsampled
+    server-side to at most `points` samples per signal (lttb or minmax).
+    """
+    end = _local_naive(end) if end else datetime.now()
+    start = _local_naive(start) if start else end - timedelta(hours=1)
+    wanted = [s.strip() for s in signals.split(",") if s.strip()]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if not 3 <= points <= 10000:
+        raise HTTPException(status_code=400, detail="points must be between 3 and 10000")
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    unknown = [s for s in wanted if s not in ("temperature", "vibration", "power")]
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"Unknown signal(s): {', '.join(unknown)}")
+
+    history = await adb.get_machine_history(machine_id, start, end)
+    if not len(history["timestamp"]) and not await adb.machine_exists(machine_id):
+        raise HTTPException(status_code=404, detail="Machine not found")
+
+    series = await run_cpu(_downsample_series, history, wanted, points, method)
+    return {
+        "machine_id": machine_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "method": method,
+        "raw_points": len(history["timestamp"]),
+        "series": series,
+    }
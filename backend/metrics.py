@@ -0,0 +1,290 @@
+import os
+import sys
+import time
+import threading
+import functools
+from bisect import bisect_left
+from collections import Counter as _Tally
+from typing import Dict, List, Tuple
+
+# SF_METRICS=0 turns every timer into the undecorated function / a null context
+METRICS_ENABLED = os.getenv("SF_METRICS", "1") != "0"
+# SF_PROFILING=1 lets a single request ask for a sampling profile with ?profile=1
+PROFILING_ENABLED = os.getenv("SF_PROFILING", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("SF_PROFILE_INTERVAL", "0.001"))
+
+# Seconds; covers cached reads (sub-ms) up to Monte Carlo sweeps
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Family:
+    """One metric name with a fixed set of label names; series are keyed by label values"""
+    kind = None
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> Tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, value=1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(v)}" for key, v in series
+        ]
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last slot is +Inf), then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = self._header()
+        for key, values in series:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {values[-1]!r}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+class Gauge(_Family):
+    """Read at scrape time from `fn`: a number, or a list of (labels dict, number)"""
+    kind = "gauge"
+
+    def __init__(self, registry, name, help, fn, kind="gauge"):
+        super().__init__(registry, name, help)
+        self.fn = fn
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        value = self.fn()
+        samples = value if isinstance(value, list) else [({}, value)]
+        lines = self._header()
+        for labels, v in samples:
+            if v is not None:
+                lines.append(f"{self.name}{_format_labels(sorted(labels.items()))} {_format_value(v)}")
+        return lines
+
+class Registry:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._families = {}
+
+    def _add(self, family):
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(self, name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, kind="gauge") -> Gauge:
+        """Value computed on scrape (cache stats, queue depth, ...); kind='counter' for running totals"""
+        return self._add(Gauge(self, name, help, fn, kind))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for family in list(self._families.values()):
+            try:
+                lines += family.render()
+            except Exception as e:
+                print(f"Metrics Error ({family.name}): {e}")
+        return "\n".join(lines) + "\n"
+
+metrics = Registry()
+
+# --- Hot-path metrics ---
+DB_QUERY_SECONDS = metrics.histogram("sf_db_query_seconds", "SQLite read latency by query", ["query"])
+DB_ROWS_RETURNED = metrics.counter("sf_db_rows_returned_total", "Rows returned by SQLite reads", ["query"])
+DB_WRITE_SECONDS = metrics.histogram("sf_db_write_seconds", "Writer thread transaction latency by job", ["job"])
+DB_ROWS_WRITTEN = metrics.counter("sf_db_rows_written_total", "Readings committed by the writer thread", ["job"])
+ES_INFERENCE_SECONDS = metrics.histogram("sf_es_inference_seconds", "Expert system inference latency", ["path"])
+DSS_SECONDS = metrics.histogram("sf_dss_seconds", "DSS analysis latency by operation", ["op"])
+TICK_SECONDS = metrics.histogram("sf_tick_generation_seconds", "Simulator tick generation latency", ["fn"])
+HTTP_SECONDS = metrics.histogram("sf_http_request_seconds", "HTTP request latency by route",
+                                 ["method", "route", "status"])
+ERRORS = metrics.counter("sf_errors_total", "Exceptions logged and handled instead of raised", ["where"])
+
+def _row_count(result) -> int:
+    if isinstance(result, dict):
+        first = next(iter(result.values()), ())
+        return len(first) if hasattr(first, "__len__") else 1
+    return len(result) if hasattr(result, "__len__") else 1
+
+def timed(histogram: Histogram, rows: Counter = None, **labels):
+    """
+    Decorator recording the call's latency (and optionally rows returned). With a single
+    label name and no explicit labels, the function name is used as the label value.
+    When metrics are disabled the function is returned undecorated.
+    """
+    def decorate(fn):
+        if not histogram.registry.enabled:
+            return fn
+        values = labels or ({histogram.labelnames[0]: fn.__name__} if histogram.labelnames else {})
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            histogram.observe(time.perf_counter() - start, **values)
+            if rows is not None:
+                rows.inc(_row_count(result), **values)
+            return result
+        return wrapper
+    return decorate
+
+# --- Sampling profiler ---
+
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+class Sampler:
+    """
+    Wall-clock sampling profiler (stdlib only): snapshots every thread's stack each
+    `interval` seconds and counts collapsed stacks. Threads parked in a wait/select
+    are skipped. The output is the collapsed format read by flamegraph.pl and speedscope.
+    """
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self._stacks = _Tally()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        lines = [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == me or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+
+# --- ASGI middleware ---
+
+class MetricsMiddleware:
+    """
+    Per-route latency histogram for every HTTP request. Routes are labelled by their
+    path template (/api/machines/{machine_id}/history), so label cardinality stays fixed.
+    With profiling enabled, `?profile=1` replaces that request's response with its profile.
+    """
+    def __init__(self, app, histogram=HTTP_SECONDS, profiling=PROFILING_ENABLED):
+        self.app = app
+        self.histogram = histogram
+        self.profiling = profiling
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if self.profiling and b"profile=1" in scope.get("query_string", b""):
+            return await self._profile(scope, receive, send)
+
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(time.perf_counter() - start, method=scope["method"],
+                                   route=getattr(route, "path", "unmatched"), status=status)
+
+    async def _profile(self, scope, receive, send):
+        status = None
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        sampler = Sampler().start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            elapsed = time.perf_counter() - start
+            stacks = sampler.stop()
+        header = (f"# {scope['method']} {scope['path']} -> {status} in {elapsed * 1000:.1f} ms, "
+                  f"{sampler.samples} samples every {sampler.interval * 1000:g} ms\n")
+        body = (header + stacks).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; charset=utf-8"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
@@ -1,13 +1,17 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional
 from datetime import datetime
 
+# Precision contract: the live fleet snapshot holds signals as float32 (about 7 significant
+# digits), so readings served from it are rounded to 2 decimals, the precision sensors report.
+SIGNAL_PRECISION = "Reported to 2 decimals; more precise input is rounded in live (snapshot) responses"
+
 class MachineData(BaseModel):
     machine_id: str
     timestamp: datetime
-    temperature: float
-    vibration: float
-    power: float
+    temperature: float = Field(description=f"degC. {SIGNAL_PRECISION}")
+    vibration: float = Field(description=f"Hz. {SIGNAL_PRECISION}")
+    power: float = Field(description=f"kW. {SIGNAL_PRECISION}")
     status: str = "running"
 
 class Diagnosis(BaseModel):
@@ -29,3 +33,17 @@ class SimulationResult(BaseModel):
     new_value: float
     energy_impact: float
     output_impact: float
+
+class ScenarioRequest(BaseModel):
+    changes: Dict[str, float]                 # e.g. {"capacity": 80, "ambient_temperature": 32}
+    machine_ids: Optional[List[str]] = None   # default: whole fleet
+    sector: Optional[str] = None              # only machines of this sector (with machine_ids: both)
+    samples: int = 2000
+    seed: Optional[int] = None
+
+class ScenarioSweepRequest(BaseModel):
+    scenarios: List[Dict[str, float]] = Field(max_length=50)  # each one is a full Monte Carlo run
+    machine_ids: Optional[List[str]] = None
+    sector: Optional[str] = None
+    samples: int = 1000
+    seed: Optional[int] = None
@@ -0,0 +1,143 @@
+import numpy as np
+from typing import List, Dict
+
+from .rule_compiler import compile_rules
+
+# What-if parameters and the nominal operating point they are compared against
+PARAMETERS = {"capacity": 60.0, "speed": 100.0, "ambient_temperature": 25.0}
+# Physically meaningful values: above the first bound, at most the second
+PARAMETER_RANGES = {"capacity": (0.0, 200.0), "speed": (0.0, 300.0), "ambient_temperature": (-60.0, 60.0)}
+
+# Assumed plant response. Each coefficient is re-drawn per sample with a relative
+# spread, so the bands reflect model uncertainty as well as telemetry noise.
+CAPACITY_OVERHEAD = 1.1     # added load costs 10% extra energy (inefficiency overhead)
+SPEED_POWER_EXP = 1.5       # power ~ speed^1.5
+SPEED_VIBRATION_EXP = 2.0   # vibration ~ speed^2
+HEAT_PER_KW = 2.0           # degC of extra machine temperature per extra kW
+COEFFICIENT_SPREAD = 0.1
+FAULT_THROUGHPUT = 0.5      # a machine in a fault condition runs at half output
+
+# Upper bound on samples x machines materialized at once
+CHUNK_CELLS = 1_000_000
+PERCENTILES = (5, 50, 95)
+
+def validate_changes(changes: Dict[str, float]) -> Dict[str, float]:
+    unknown = set(changes) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameter(s): {', '.join(sorted(unknown))}")
+    checked = {}
+    for name, value in changes.items():
+        value = float(value)
+        low, high = PARAMETER_RANGES[name]
+        if not (np.isfinite(value) and low < value <= high):
+            raise ValueError(f"{name} must be above {low:g} and at most {high:g}, got {value:g}")
+        checked[name] = value
+    return checked
+
+def simulate_chunk(mean, std, changes, rules, samples, seed):
+    """
+    Draw `samples` Monte Carlo futures of every machine under `changes`.
+
+    mean/std: (machines, 3) recent distribution of temperature, vibration, power.
+    Fault risk is whatever the ES rule base (`rules`) fires on in the simulated state.
+    Returns per-sample fleet energy delta (kW), mean output (%), machines in fault,
+    plus per-machine fault counts. Runs in pool workers, so it only takes plain data.
+    """
+    rng = np.random.default_rng(seed)
+    plan = compile_rules(rules)
+    machines = len(mean)
+    ratio = changes.get("capacity", PARAMETERS["capacity"]) / PARAMETERS["capacity"]
+    speed = changes.get("speed", PARAMETERS["speed"]) / PARAMETERS["speed"]
+    ambient = changes.get("ambient_temperature", PARAMETERS["ambient_temperature"]) - PARAMETERS["ambient_temperature"]
+    mean = mean.astype(np.float32)
+    std = std.astype(np.float32)
+
+    energy, output, faults = [], [], []
+    machine_faults = np.zeros(machines, dtype=np.int64)
+    block = max(1, CHUNK_CELLS // max(machines, 1))
+    for start in range(0, samples, block):
+        n = min(block, samples - start)
+        # 1. Telemetry drawn from each machine's recent distribution
+        draw = mean + std * rng.standard_normal((n, machines, 3), dtype=np.float32)
+        temperature, vibration, power = draw[..., 0], draw[..., 1], draw[..., 2]
+
+        # 2. Plant response with per-sample coefficient uncertainty
+        c = 1 + COEFFICIENT_SPREAD * rng.standard_normal((4, n, 1), dtype=np.float32)
+        new_power = power * (1 + (ratio - 1) * CAPACITY_OVERHEAD * c[0]) * speed ** (SPEED_POWER_EXP * c[1])
+        vibration = vibration * speed ** (SPEED_VIBRATION_EXP * c[2])
+        temperature = temperature + ambient + HEAT_PER_KW * c[3] * (new_power - power)
+
+        # 3. Fault risk from the ES rules evaluated on the simulated state
+        columns = {
+            "machine_id": np.empty(n * machines, dtype=np.int8),  # only its length is used
+            "temperature": temperature.ravel(),
+            "vibration": vibration.ravel(),
+            "power": new_power.ravel(),
+        }
+        fault = np.zeros(n * machines, dtype=bool)
+        for mask in plan.evaluate(columns):
+            fault |= mask
+        fault = fault.reshape(n, machines)
+
+        energy.append((new_power - power).sum(axis=1, dtype=np.float64))
+        output.append(100 * ratio * speed * (1 - FAULT_THROUGHPUT * fault).mean(axis=1))
+        faults.append(fault.sum(axis=1))
+        machine_faults += fault.sum(axis=0)
+
+    return {
+        "energy": np.concatenate(energy),
+        "output": np.concatenate(output),
+        "faults": np.concatenate(faults),
+        "machine_faults": machine_faults,
+    }
+
+def _bands(values) -> Dict[str, float]:
+    bands = {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    bands["mean"] = round(float(np.mean(values)), 2)
+    return bands
+
+def summarize(machine_ids, changes, parts: List[Dict], top=10) -> Dict:
+    """Merge the sample chunks of one scenario into percentile bands"""
+    energy = np.concatenate([p["energy"] for p in parts])
+    output = np.concatenate([p["output"] for p in parts])
+    faults = np.concatenate([p["faults"] for p in parts])
+    risk = sum(p["machine_faults"] for p in parts) / len(energy)
+
+    at_risk = np.argsort(-risk, kind="stable")[:top]
+    return {
+        "changes": changes,
+        "machines": len(machine_ids),
+        "samples": len(energy),
+        "energy_impact_kw": _bands(energy),
+        "output_pct": _bands(output),
+        "machines_in_fault": _bands(faults),
+        "fault_probability": round(float(np.mean(faults > 0)), 4),
+        "at_risk": [{"machine_id": machine_ids[i], "fault_probability": round(float(risk[i]), 4)}
+                    for i in at_risk if risk[i] > 0],
+    }
+
+def run_scenarios(machine_ids, mean, std, scenarios: List[Dict], rules, samples, seed=None, executor=None, parts=1):
+    """
+    Evaluate every scenario over the same machines. Each scenario's samples are split
+    into `parts` independent chunks (own RNG stream) that run on `executor` if given.
+    """
+    scenarios = [validate_changes(s) for s in scenarios]
+    streams = np.random.SeedSequence(seed).spawn(len(scenarios) * parts)
+    sizes = [samples // parts + (1 if i < samples % parts else 0) for i in range(parts)]
+
+    jobs = []
+    for s, changes in enumerate(scenarios):
+        for p, size in enumerate(sizes):
+            if size:
+                jobs.append((s, (mean, std, changes, rules, size, streams[s * parts + p])))
+
+    if executor is None:
+        results = [simulate_chunk(*args) for _, args in jobs]
+    else:
+        futures = [executor.submit(simulate_chunk, *args) for _, args in jobs]
+        results = [f.result() for f in futures]
+
+    grouped = [[] for _ in scenarios]
+    for (s, _), result in zip(jobs, results):
+        grouped[s].append(result)
+    return [summarize(machine_ids, changes, parts) for changes, parts in zip(scenarios, grouped)]
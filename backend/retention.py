@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from .database import db, partition_day
+from .metrics import ERRORS
+
+# Retention policy, configurable per deployment
+RAW_RETENTION_HOURS = float(os.getenv("SF_RAW_RETENTION_HOURS", "48"))     # raw readings kept before downsampling
+ROLLUP_RETENTION_DAYS = float(os.getenv("SF_ROLLUP_RETENTION_DAYS", "30"))  # minute/hour rollups kept
+RETENTION_INTERVAL = float(os.getenv("SF_RETENTION_INTERVAL", "600"))       # seconds between maintenance passes
+
+class RetentionWorker:
+    """
+    Background storage maintenance, off the request path.
+
+    Each pass downsamples raw day partitions that lie entirely outside the raw
+    retention window into the per-machine minute rollup (then drops them), deletes
+    rollup buckets past their retention, and reclaims the freed pages. All writes
+    go through the DB writer thread, queued behind ingest batches.
+    """
+    def __init__(self, database=db, raw_retention=timedelta(hours=RAW_RETENTION_HOURS),
+                 rollup_retention=timedelta(days=ROLLUP_RETENTION_DAYS), interval=RETENTION_INTERVAL):
+        self.database = database
+        self.raw_retention = raw_retention
+        self.rollup_retention = rollup_retention
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.passes = 0
+        self.partitions_downsampled = 0
+        self.rollup_rows_pruned = 0
+        self.last_pass_ms = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                ERRORS.inc(where="retention")
+                print(f"Retention pass failed: {e}")
+            self._stop.wait(self.interval)
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """One maintenance pass; returns what it changed"""
+        start = time.perf_counter()
+        now = now or datetime.now()
+
+        # 1. Raw partitions whose whole day is older than the raw retention window
+        cutoff_day = partition_day((now - self.raw_retention).isoformat())
+        expired = [table for table in self.database.partitions() if table[-8:] < cutoff_day]
+        buckets = 0
+        for table in expired:
+            buckets += self.database.downsample_partition(table[-8:])
+
+        # 2. Rollups past their retention
+        pruned = self.database.prune_rollups(now - self.rollup_retention)
+
+        # 3. Give the space back
+        if expired or pruned:
+            self.database.reclaim_space()
+
+        self.passes += 1
+        self.partitions_downsampled += len(expired)
+        self.rollup_rows_pruned += pruned
+        self.last_pass_ms = round((time.perf_counter() - start) * 1000, 1)
+        if expired or pruned:
+            print(f"--- Retention: downsampled {len(expired)} partitions ({buckets} buckets), pruned {pruned} rollup rows ---")
+        return {"downsampled": expired, "rollup_rows_pruned": pruned}
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "raw_retention_hours": self.raw_retention.total_seconds() / 3600,
+            "rollup_retention_days": self.rollup_retention.total_seconds() / 86400,
+            "passes": self.passes,
+            "partitions_downsampled": self.partitions_downsampled,
+            "rollup_rows_pruned": self.rollup_rows_pruned,
+            "last_pass_ms": self.last_pass_ms,
+            "last_error": self.last_error,
+            **self.database.storage_stats(),
+        }
+
+retention_worker = RetentionWorker()
@@ -0,0 +1,227 @@
+import json
+import numpy as np
+from typing import List, Dict
+
+# Comparison operators usable in rule predicates
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+SIGNALS = ("temperature", "vibration", "power")
+COMBINATORS = ("all", "any", "not")
+
+# Longest per-machine window a temporal predicate may look back over (readings)
+MAX_WINDOW = 32
+
+class RuleError(ValueError):
+    pass
+
+def parse_condition(condition):
+    """
+    Accepts the stored JSON form of a rule condition:
+        {"all": [...]}, {"any": [...]}, {"not": {...}}
+        {"signal": "vibration", "op": ">", "value": 90}
+        {"signal": "vibration", "op": ">", "value": 80, "for": 3, "of": 5}   held in 3 of the last 5 readings
+        {"rate": "temperature", "op": ">", "value": 2, "over": 3}             change per minute over 3 readings
+    A plain list is shorthand for "all", and (signal, op, value) tuples are accepted as leaves.
+    "of" defaults to "for" (consecutive readings) and "over" to 1 (since the previous reading).
+    """
+    if isinstance(condition, str):
+        condition = json.loads(condition)
+    if isinstance(condition, (list, tuple)) and len(condition) == 3 and isinstance(condition[0], str):
+        signal, op, value = condition
+        return parse_condition({"signal": signal, "op": op, "value": value})
+    if isinstance(condition, (list, tuple)):
+        return {"all": [parse_condition(c) for c in condition]}
+    if not isinstance(condition, dict):
+        raise RuleError(f"Invalid condition: {condition!r}")
+
+    if "signal" in condition or "rate" in condition:
+        key = "signal" if "signal" in condition else "rate"
+        if condition[key] not in SIGNALS:
+            raise RuleError(f"Unknown signal '{condition[key]}'")
+        if condition.get("op") not in OPERATORS:
+            raise RuleError(f"Unknown operator '{condition.get('op')}'")
+        leaf = {key: condition[key], "op": condition["op"], "value": float(condition["value"])}
+        if key == "rate":
+            leaf["over"] = _window(condition.get("over", 1), "over")
+        elif "for" in condition:
+            leaf["for"] = _window(condition["for"], "for")
+            leaf["of"] = _window(condition.get("of", leaf["for"]), "of")
+            if leaf["for"] > leaf["of"]:
+                raise RuleError(f"'for' ({leaf['for']}) exceeds 'of' ({leaf['of']})")
+        return leaf
+
+    keys = [k for k in COMBINATORS if k in condition]
+    if len(keys) != 1:
+        raise RuleError(f"Condition must have exactly one of {COMBINATORS}: {condition!r}")
+    kind = keys[0]
+    if kind == "not":
+        return {"not": parse_condition(condition["not"])}
+    children = condition[kind]
+    if not children:
+        raise RuleError(f"Empty '{kind}' combinator")
+    return {kind: [parse_condition(c) for c in children]}
+
+def _window(value, name) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+        raise RuleError(f"'{name}' must be a whole number of readings")
+    if not 1 <= value <= MAX_WINDOW:
+        raise RuleError(f"'{name}' must be between 1 and {MAX_WINDOW} readings")
+    return int(value)
+
+class EvaluationPlan:
+    """
+    A rule base compiled into a shared DAG of predicate nodes.
+
+    Identical predicates and sub-expressions are interned once, so a snapshot pays
+    for each distinct comparison only once no matter how many rules reference it.
+    Conjunctions evaluate already-computed and most selective children first and stop
+    as soon as no machine can still match; disjunctions stop once every machine matched.
+
+    Temporal leaves ("window": k of the last n readings, "rate": change per minute) are
+    read from a SignalHistory. Without one (Monte Carlo what-ifs, single readings) the
+    state is taken as steady: a window reduces to its instantaneous comparison and every
+    rate is 0.
+    """
+    # Re-estimate hit rates with this weight on every evaluation
+    SELECTIVITY_ALPHA = 0.2
+
+    def __init__(self):
+        self.rules = []        # rule metadata, one entry per root
+        self.roots = []        # root node id per rule
+        self.nodes = []        # (kind, payload); payload is a predicate tuple, child ids or a child id
+        self._intern = {}
+        self.estimate = np.zeros(0)
+
+    @property
+    def predicate_count(self):
+        return sum(1 for kind, _ in self.nodes if kind in ("pred", "window", "rate"))
+
+    @property
+    def temporal(self):
+        return any(kind in ("window", "rate") for kind, _ in self.nodes)
+
+    def _node(self, kind, payload):
+        key = (kind, payload)
+        nid = self._intern.get(key)
+        if nid is None:
+            nid = len(self.nodes)
+            self.nodes.append(key)
+            self._intern[key] = nid
+        return nid
+
+    def _compile(self, condition):
+        if "rate" in condition:
+            return self._node("rate", (condition["rate"], condition["op"], condition["value"], condition["over"]))
+        if "signal" in condition:
+            pred = (condition["signal"], condition["op"], condition["value"])
+            if "for" in condition and condition["of"] > 1:
+                return self._node("window", pred + (condition["for"], condition["of"]))
+            return self._node("pred", pred)
+        if "not" in condition:
+            return self._node("not", self._compile(condition["not"]))
+
+        kind = "all" if "all" in condition else "any"
+        children = set()
+        for child in condition[kind]:
+            nid = self._compile(child)
+            # Flatten nested combinators of the same kind: all(a, all(b, c)) -> all(a, b, c)
+            child_kind, payload = self.nodes[nid]
+            if child_kind == kind:
+                children.update(payload)
+            else:
+                children.add(nid)
+        if len(children) == 1:
+            return children.pop()
+        return self._node(kind, tuple(sorted(children)))
+
+    def add_rule(self, rule: Dict):
+        self.roots.append(self._compile(parse_condition(rule["when"])))
+        self.rules.append(rule)
+
+    def finalize(self):
+        # Unknown selectivity starts at 0.5 for every node
+        self.estimate = np.full(len(self.nodes), 0.5)
+        return self
+
+    def evaluate(self, columns: Dict[str, np.ndarray], history=None) -> List[np.ndarray]:
+        """
+        Return one boolean hit mask per rule for the given column snapshot; temporal
+        leaves look up each row's machine in `history` (a SignalHistory), if given.
+        """
+        size = len(columns["machine_id"])
+        results = [None] * len(self.nodes)
+        estimate = self.estimate
+        alpha = self.SELECTIVITY_ALPHA
+        history_rows = []
+
+        def rows():
+            if not history_rows:
+                history_rows.append(history.rows(columns["machine_id"]))
+            return history_rows[0]
+
+        def run(nid):
+            mask = results[nid]
+            if mask is not None:
+                return mask
+
+            kind, payload = self.nodes[nid]
+            if kind == "pred":
+                signal, op, value = payload
+                column = columns[signal]
+                # Compare at the column's precision so float32 snapshots match thresholds exactly
+                mask = OPERATORS[op](column, column.dtype.type(value))
+            elif kind == "window":
+                signal, op, value, k, n = payload
+                if history is None:
+                    column = columns[signal]
+                    mask = OPERATORS[op](column, column.dtype.type(value))
+                else:
+                    mask = history.persistence(rows(), signal, op, value, k, n)
+            elif kind == "rate":
+                signal, op, value, over = payload
+                if history is None:
+                    mask = np.full(size, bool(OPERATORS[op](0.0, value)))
+                else:
+                    rate = history.rate(rows(), signal, over)
+                    mask = OPERATORS[op](rate, value) & ~np.isnan(rate)
+            elif kind == "not":
+                mask = ~run(payload)
+            elif kind == "all":
+                # Cheapest first: cached results, then the most selective children
+                order = sorted(payload, key=lambda c: (results[c] is None, estimate[c]))
+                mask = run(order[0]).copy()
+                for child in order[1:]:
+                    if not mask.any():
+                        break
+                    mask &= run(child)
+            else:
+                order = sorted(payload, key=lambda c: (results[c] is None, -estimate[c]))
+                mask = run(order[0]).copy()
+                for child in order[1:]:
+                    if mask.all():
+                        break
+                    mask |= run(child)
+
+            if size:
+                estimate[nid] = (1 - alpha) * estimate[nid] + alpha * (np.count_nonzero(mask) / size)
+            results[nid] = mask
+            return mask
+
+        return [run(root) for root in self.roots]
+
+def compile_rules(rules: List[Dict]) -> EvaluationPlan:
+    """Compile rule dicts (with a "when" condition) into an EvaluationPlan, skipping invalid rules"""
+    plan = EvaluationPlan()
+    for rule in rules:
+        try:
+            plan.add_rule(rule)
+        except (RuleError, KeyError, TypeError, ValueError) as e:
+            print(f"Skipping rule '{rule.get('diagnosis')}': {e}")
+    return plan.finalize()
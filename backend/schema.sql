@@ -1,16 +1,73 @@
 -- Protocol: Run this SQL in your Supabase SQL Editor
 
--- 1. Machine Readings (Timeseries Data)
+-- 1. Machine Readings (Timeseries Data), range-partitioned by day
+--    (the local SQLite build uses one readings_YYYYMMDD table per day)
 CREATE TABLE IF NOT EXISTS machine_readings (
-    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
     machine_id TEXT NOT NULL,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    temperature FLOAT,
+    vibration FLOAT,
+    power FLOAT,
+    status TEXT
+) PARTITION BY RANGE (timestamp);
+CREATE INDEX IF NOT EXISTS idx_machine_readings_machine_ts ON machine_readings (machine_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_machine_readings_ts ON machine_readings (timestamp);
+-- One partition per day, e.g.:
+-- CREATE TABLE machine_readings_20240101 PARTITION OF machine_readings
+--     FOR VALUES FROM ('2024-01-01') TO ('2024-01-02');
+
+-- 1b. Latest Reading per Machine (upserted on every insert)
+CREATE TABLE IF NOT EXISTS machine_latest (
+    machine_id TEXT PRIMARY KEY,
+    timestamp TIMESTAMP WITH TIME ZONE,
     temperature FLOAT,
     vibration FLOAT,
     power FLOAT,
     status TEXT
 );
 
+-- 1c. History Rollups (maintained at ingest; same layout for readings_rollup_1h)
+CREATE TABLE IF NOT EXISTS readings_rollup_1m (
+    bucket TEXT PRIMARY KEY, -- e.g. '2024-01-01T10:15:00'
+    count INTEGER NOT NULL,
+    temperature_sum FLOAT, temperature_min FLOAT, temperature_max FLOAT,
+    vibration_sum FLOAT, vibration_min FLOAT, vibration_max FLOAT,
+    power_sum FLOAT, power_min FLOAT, power_max FLOAT
+);
+CREATE TABLE IF NOT EXISTS readings_rollup_1h (LIKE readings_rollup_1m INCLUDING ALL);
+
+-- 1d. Per-machine minute rollup: raw partitions past retention are downsampled into it
+CREATE TABLE IF NOT EXISTS machine_rollup_1m (
+    machine_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    temperature_sum FLOAT, temperature_min FLOAT, temperature_max FLOAT,
+    vibration_sum FLOAT, vibration_min FLOAT, vibration_max FLOAT,
+    power_sum FLOAT, power_min FLOAT, power_max FLOAT,
+    PRIMARY KEY (machine_id, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_machine_rollup_1m_bucket ON machine_rollup_1m (bucket);
+
+-- 1e. Machine metadata, and per-group rollups (maintained at ingest; same layout for group_rollup_1h)
+CREATE TABLE IF NOT EXISTS machine_metadata (
+    machine_id TEXT PRIMARY KEY,
+    sector TEXT,
+    line TEXT,
+    model TEXT,
+    rated_capacity FLOAT -- kW
+);
+CREATE TABLE IF NOT EXISTS group_rollup_1m (
+    dimension TEXT NOT NULL, -- 'sector', 'line' or 'model'
+    bucket TEXT NOT NULL,
+    grp TEXT NOT NULL, -- e.g. 'Sector 7'; 'unassigned' for machines without metadata
+    count INTEGER NOT NULL,
+    temperature_sum FLOAT, temperature_min FLOAT, temperature_max FLOAT,
+    vibration_sum FLOAT, vibration_min FLOAT, vibration_max FLOAT,
+    power_sum FLOAT, power_min FLOAT, power_max FLOAT,
+    PRIMARY KEY (dimension, bucket, grp)
+);
+CREATE TABLE IF NOT EXISTS group_rollup_1h (LIKE group_rollup_1m INCLUDING ALL);
+
 -- 2. Fault Rules (Expert System Knowledge Base)
 CREATE TABLE IF NOT EXISTS fault_rules (
     id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
@@ -18,7 +75,14 @@ CREATE TABLE IF NOT EXISTS fault_rules (
     diagnosis TEXT NOT NULL,
     action TEXT NOT NULL,
     confidence FLOAT,
-    severity TEXT -- 'Low', 'Medium', 'Critical'
+    severity TEXT, -- 'Low', 'Medium', 'Critical'
+    reasoning TEXT,
+    conditions JSONB -- Predicate tree for the inference engine, e.g. {"all": [{"signal": "vibration", "op": ">", "value": 90}]}
+);
+
+-- 2b. Knowledge base full-text search (the local SQLite build uses an FTS5 table)
+CREATE INDEX IF NOT EXISTS idx_fault_rules_search ON fault_rules USING GIN (
+    to_tsvector('english', diagnosis || ' ' || action || ' ' || coalesce(reasoning, '') || ' ' || coalesce(array_to_string(symptom_keywords, ' '), ''))
 );
 
 -- 3. Maintenance Logs (Technician Workflow)
@@ -29,8 +93,27 @@ CREATE TABLE IF NOT EXISTS maintenance_logs (
     diagnosis_id BIGINT REFERENCES fault_rules(id),
     technician_action TEXT, -- 'Acknowledged', 'Part Ordered', 'Fixed'
     notes TEXT,
-    resolved BOOLEAN DEFAULT FALSE
+    resolved BOOLEAN DEFAULT FALSE,
+    alert_id BIGINT
+);
+CREATE INDEX IF NOT EXISTS idx_maintenance_logs_machine ON maintenance_logs (machine_id, id);
+
+-- 4. Alerts: one row per (machine, condition) episode, from first firing until resolved
+CREATE TABLE IF NOT EXISTS alerts (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    machine_id TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    severity TEXT,
+    confidence FLOAT,
+    action TEXT,
+    opened_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_seen_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    resolved_at TIMESTAMP WITH TIME ZONE,
+    resolution TEXT, -- 'cleared' (stopped firing) or 'technician'
+    log_id BIGINT REFERENCES maintenance_logs(id)
 );
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alerts_open ON alerts (machine_id, condition) WHERE resolved_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_alerts_machine ON alerts (machine_id, id);
 
 -- Seed Data for Fault Rules (20+ Examples)
 INSERT INTO fault_rules (symptom_keywords, diagnosis, action, confidence, severity) VALUES
@@ -54,3 +137,17 @@ INSERT INTO fault_rules (symptom_keywords, diagnosis, action, confidence, severi
 (ARRAY['bearing', 'heat'], 'Bearing Lubrication Failure', 'Grease Bearing', 0.91, 'High'),
 (ARRAY['motor', 'hum'], 'Phase Imbalance', 'Check Electrical Phases', 0.88, 'High'),
 (ARRAY['safety', 'stop'], 'E-Stop Triggered', 'Reset Safety Circuit', 1.00, 'Critical');
+
+
+-- Inference Rules (structured conditions compiled by the ES engine)
+-- "for": k, "of": n fires only when k of a machine's last n readings match, so single noisy readings don't raise alerts
+INSERT INTO fault_rules (symptom_keywords, diagnosis, action, confidence, severity, reasoning, conditions) VALUES
+(ARRAY['vibration', 'temperature', 'bearing'], 'Likely Bearing Failure', 'Immediate shutdown recommended. Replace bearing assembly.', 0.94, 'Critical',
+ 'Sustained high vibration (>90Hz) and temperature (>80C) indicates mechanical friction consistent with bearing seizure.',
+ '{"all": [{"signal": "vibration", "op": ">", "value": 90, "for": 3, "of": 5}, {"signal": "temperature", "op": ">", "value": 80, "for": 3, "of": 5}]}'),
+(ARRAY['vibration', 'power', 'misalignment'], 'Motor Misalignment', 'Schedule realignment during next shift.', 0.87, 'Medium',
+ 'Persistently high vibration with increased power draw suggests motor shaft misalignment.',
+ '{"all": [{"signal": "vibration", "op": ">", "value": 80, "for": 3, "of": 5}, {"signal": "power", "op": ">", "value": 13, "for": 3, "of": 5}]}'),
+(ARRAY['temperature', 'coolant'], 'Coolant System Degradation', 'Check coolant levels and pump function.', 0.92, 'Critical',
+ 'Temperature critical (>95C) for most recent readings without corresponding vibration spike points to thermal management failure.',
+ '{"signal": "temperature", "op": ">", "value": 95, "for": 3, "of": 5}');
@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+from typing import List, Dict
+
+from .database import db
+
+class RuleSearch:
+    """
+    Knowledge base search with an in-process LRU cache of recent queries.
+
+    The type-ahead box sends a request per keystroke, mostly repeats of the same few
+    prefixes. Cached results are tied to the fault_rules version (bumped by triggers
+    on every rule edit), so any edit invalidates the whole cache.
+    """
+    def __init__(self, database=db, max_entries=256):
+        self.database = database
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        key = (" ".join(query.lower().split()), limit)
+        version = self.database.get_rules_version()
+        with self._lock:
+            if version != self._version:
+                self._cache.clear()
+                self._version = version
+            results = self._cache.get(key)
+            if results is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return results
+            self.misses += 1
+
+        results = self.database.search_rules(query, limit)
+        with self._lock:
+            if version == self._version:
+                self._cache[key] = results
+                if len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return results
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "fts": self.database.fts_enabled,
+        }
+
+rule_search = RuleSearch()
@@ -0,0 +1,149 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import numpy as np
+
+from .rule_compiler import compile_rules, SIGNALS
+from .shm import SharedArrays
+from .temporal import SignalHistory
+
+# Inference worker processes; 0 keeps ES inference in-process
+SHARD_WORKERS = int(os.getenv("SF_SHARD_WORKERS", "0"))
+# Snapshots smaller than this are evaluated in-process (dispatch costs ~1 ms)
+SHARD_MIN_MACHINES = int(os.getenv("SF_SHARD_MIN_MACHINES", "20000"))
+
+# --- Worker side -------------------------------------------------------------
+# Each worker keeps the blocks it attached and the plans it compiled between tasks.
+_attached: Dict[str, SharedArrays] = {}
+_plans = {}
+
+def _attach(descriptor) -> SharedArrays:
+    name = descriptor[0]
+    arrays = _attached.get(name)
+    if arrays is None or arrays.layout != descriptor[1]:
+        # The owner reallocated (the fleet grew): drop the stale blocks of this kind
+        for old in [k for k, v in _attached.items() if v.layout.keys() == descriptor[1].keys()]:
+            _attached.pop(old).close()
+        arrays = _attached[name] = SharedArrays.attach(descriptor)
+    return arrays
+
+class _ShardHistory(SignalHistory):
+    """Attached ring buffers whose rows are already resolved by the parent"""
+    def rows(self, machine_ids) -> np.ndarray:
+        return machine_ids
+
+def evaluate_shard(plan_key, rules, frame_desc, history_desc, start, stop) -> List[np.ndarray]:
+    """
+    Evaluate the rule base over rows [start, stop) of a shared snapshot frame.
+    Returns the frame rows that fired, one int32 array per rule. Runs in pool workers.
+    """
+    plan = _plans.get(plan_key)
+    if plan is None:
+        _plans.clear()
+        plan = _plans[plan_key] = compile_rules(rules)
+    frame = _attach(frame_desc)
+    columns = {signal: frame[signal][start:stop] for signal in SIGNALS}
+    # Temporal leaves index the rings by machine_index row, which the frame carries
+    columns["machine_id"] = frame["row"][start:stop]
+    history = _ShardHistory.attached(_attach(history_desc).arrays) if history_desc else None
+    return [np.flatnonzero(mask).astype(np.int32) + start for mask in plan.evaluate(columns, history)]
+
+# --- Parent side -------------------------------------------------------------
+
+class ShardedInference:
+    """
+    Splits ES inference over large snapshots across worker processes.
+
+    The snapshot's signal columns are copied once into a shared memory frame and the
+    fleet is cut into contiguous machine ranges, one per worker. Workers read the
+    frame and the temporal rule windows (a shared SignalHistory) in place, so only
+    row bounds go out and hit rows come back; masks are merged here.
+    """
+    def __init__(self, workers=SHARD_WORKERS, min_machines=SHARD_MIN_MACHINES):
+        self.workers = workers
+        self.min_machines = min_machines
+        self._pool = None
+        self._frame = None
+        self._plan, self._plan_seq = None, 0
+        self._lock = threading.Lock()
+        self.sharded_runs = 0
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def should_shard(self, size) -> bool:
+        return self.enabled and size >= self.min_machines
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn, not fork: the server process runs DB writer and ingest threads
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _frame_for(self, size, dtypes) -> SharedArrays:
+        frame = self._frame
+        if frame is None or len(frame["row"]) < size or any(frame[s].dtype != d for s, d in dtypes.items()):
+            specs = {s: ((max(size, 2 * len(frame["row"]) if frame else size),), d) for s, d in dtypes.items()}
+            specs["row"] = (specs[SIGNALS[0]][0], np.int32)
+            if frame is not None:
+                frame.close()
+            frame = self._frame = SharedArrays.create(specs)
+        return frame
+
+    def evaluate(self, plan, columns, history=None) -> List[np.ndarray]:
+        """Same result as plan.evaluate(columns, history), computed by the worker pool"""
+        size = len(columns["machine_id"])
+        temporal = history is not None and plan.temporal
+        if temporal and not len(history.head):
+            # Nothing observed yet, so there are no shared windows to read
+            return plan.evaluate(columns, history)
+        with self._lock:
+            # 1. Publish the snapshot
+            dtypes = {s: np.asarray(columns[s]).dtype for s in SIGNALS}
+            frame = self._frame_for(size, dtypes)
+            for s in SIGNALS:
+                frame[s][:size] = columns[s]
+            if temporal:
+                # FleetColumns already carry machine_index rows
+                rows = getattr(columns, "index", None)
+                frame["row"][:size] = rows if rows is not None else history.rows(columns["machine_id"])
+            if plan is not self._plan:
+                # Workers recompile when the key changes
+                self._plan, self._plan_seq = plan, self._plan_seq + 1
+
+            # 2. Fan out contiguous machine ranges; the rings must not move while workers read them
+            bounds = np.linspace(0, size, self.workers + 1).astype(int)
+            lock = history._lock if temporal else threading.Lock()
+            with lock:
+                history_desc = history.descriptor if temporal else None
+                if temporal and history_desc is None:
+                    raise ValueError("Sharded temporal rules need a SignalHistory(shared=True)")
+                pool = self._executor()
+                futures = [pool.submit(evaluate_shard, self._plan_seq, plan.rules, frame.descriptor, history_desc, a, b)
+                           for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+                parts = [f.result() for f in futures]
+
+            # 3. Merge
+            masks = [np.zeros(size, dtype=bool) for _ in plan.rules]
+            for part in parts:
+                for mask, hit in zip(masks, part):
+                    mask[hit] = True
+            self.sharded_runs += 1
+            return masks
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+            if self._frame is not None:
+                self._frame.close()
+                self._frame = None
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "min_machines": self.min_machines, "sharded_runs": self.sharded_runs}
+
+sharded_inference = ShardedInference()
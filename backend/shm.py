@@ -0,0 +1,57 @@
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+import numpy as np
+
+ALIGN = 64
+
+class SharedArrays:
+    """
+    Named NumPy arrays packed into one multiprocessing.shared_memory block.
+
+    The owner creates the block and passes `descriptor` (block name + layout, a few
+    hundred bytes) to worker processes, which attach to the same memory instead of
+    receiving pickled copies.
+    """
+    def __init__(self, block, layout, owner):
+        self.block = block
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {}
+        for name, (offset, shape, dtype) in layout.items():
+            self.arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+
+    @classmethod
+    def create(cls, specs: Dict[str, Tuple[tuple, str]]) -> "SharedArrays":
+        """specs: name -> (shape, dtype)"""
+        layout, size = {}, 0
+        for name, (shape, dtype) in specs.items():
+            layout[name] = (size, tuple(shape), np.dtype(dtype).str)
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            size += -(-nbytes // ALIGN) * ALIGN
+        block = shared_memory.SharedMemory(create=True, size=max(size, ALIGN))
+        return cls(block, layout, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor) -> "SharedArrays":
+        name, layout = descriptor
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def name(self):
+        return self.block.name
+
+    @property
+    def descriptor(self):
+        return (self.block.name, self.layout)
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def close(self):
+        self.arrays = {}
+        try:
+            self.block.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes away with it
+        if self.owner:
+            self.block.unlink()
@@ -1,101 +1,159 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Dict, Optional, Callable
 from .models import MachineData
-import random
+from .columnar import FleetColumns
 
 from .database import db
+from .metrics import timed, TICK_SECONDS, ERRORS
+
+# Machines that always run hot (demo scenario)
+FORCED_CRITICAL = ('M-015', 'M-088', 'M-105', 'M-200', 'M-404')
+ANOMALY_RATE = 0.05
+# Upper bound on rows generated and written per backfill transaction
+BACKFILL_CHUNK_ROWS = 200_000
+# Simulated plant layout: (model, rated capacity kW)
+MACHINES_PER_SECTOR = 50
+MODELS = (("SF-100", 12.0), ("SF-200", 15.0), ("SF-300", 20.0))
 
 class Simulator:
-    def __init__(self, num_machines=500):
-        self.num_machines = 500
-        # Simulating all 500 machines now
-        self.machines = [f"M-{i:03d}" for i in range(1, 501)]
+    def __init__(self, num_machines=500, seed=None):
+        self.num_machines = num_machines
+        self.machines = [f"M-{i:03d}" for i in range(1, num_machines + 1)]
+        self.machine_ids = np.array(self.machines, dtype=object)
+        self.forced_critical = np.isin(self.machine_ids, FORCED_CRITICAL)
+        self.rng = np.random.default_rng(seed)
         # We'll call ensure_history from main.py startup to avoid circular import issues or double init
-    
-    def ensure_history(self):
-        """Check if DB has data. If not, generate 24h of history."""
-        try:
-            # Check if we have recent data (Optimization: Check DB directly)
-            if db.has_any_data():
-                 print("Database already has data. Skipping heavy backfill.")
-                 # In a real app we'd check for gaps, but for this demo, if DB exists, we assume good.
-                 # If user deleted DB file, this would return False and we regen.
-                 return
 
+    def metadata(self) -> List[Dict]:
+        """Plant layout: sectors of 50 machines, 5 lines per sector, models by position on the line"""
+        rows = []
+        for i, machine_id in enumerate(self.machines):
+            sector, line, model = i // MACHINES_PER_SECTOR + 1, (i % MACHINES_PER_SECTOR) // 10 + 1, MODELS[i % len(MODELS)]
+            rows.append({
+                "machine_id": machine_id,
+                "sector": f"Sector {sector}",
+                "line": f"Line {sector}-{line}",
+                "model": model[0],
+                "rated_capacity": model[1],
+            })
+        return rows
+
+    def missing_ticks(self, last: Optional[datetime], now: Optional[datetime] = None) -> List[datetime]:
+        """History ticks newer than `last` (the newest stored reading, None if empty)"""
+        now = now or datetime.now()
+        # 1. 24h hourly backbone (older than 1h, since the next part covers the last hour)
+        timestamps = [now - timedelta(hours=24 - i) for i in range(24)]
+        timestamps = [t for t in timestamps if t < now - timedelta(hours=1)]
+        # 2. Last 60 minutes at minute resolution
+        timestamps += [now - timedelta(minutes=60 - i) for i in range(60)]
+        return [t for t in timestamps if last is None or t > last]
+
+    def ensure_history(self, progress: Optional[Callable[[int, int], None]] = None,
+                       stop: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Fill the gap between the newest stored tick and now: all 24h of history on an
+        empty DB, only the missing hours/minutes after a restart. Returns ticks written;
+        stop() is checked between chunks, so a shutdown does not wait for the whole gap.
+        """
+        last = db.get_last_timestamp()
+        timestamps = self.missing_ticks(last)
+        if not timestamps:
+            print("History is up to date.")
+            return 0
+        if last is None:
             print("No data found. Initializing DB with 24 hours of history...")
-            
-            # 1. Backfill 24 Hours (Hourly resolution)
-            print("Generating 24h hourly backbone...")
-            for i in range(24):
-                t = datetime.now() - timedelta(hours=24-i)
-                # Only if older than 1h (since next loop handles last hour)
-                if t < datetime.now() - timedelta(hours=1):
-                        self.generate_tick(t, persist=True)
-            
-            # 2. Backfill Last 60 Minutes (Minute resolution)
-            print("Generating last 60m minutely detail...")
-            for i in range(60):
-                t = datetime.now() - timedelta(minutes=60-i)
-                self.generate_tick(t, persist=True)
-                
-            print("History initialized.")
-        except Exception as e:
-            print(f"History init failed: {e}")
+        else:
+            print(f"Filling {len(timestamps)} missing ticks since {last.isoformat(timespec='seconds')}...")
+        written = self.backfill(timestamps, progress, stop)
+        if written < len(timestamps):
+            print(f"History fill stopped after {written} of {len(timestamps)} ticks.")
+        else:
+            print(f"History initialized ({written} ticks).")
+        return written
+
+    def backfill(self, timestamps: List[datetime], progress: Optional[Callable[[int, int], None]] = None,
+                 stop: Optional[Callable[[], bool]] = None) -> int:
+        """
+        Generate and persist many ticks at once, chunked to bound memory; progress(done, total).
+        Oldest first, so stopping early (stop() true between chunks) leaves no gap behind.
+        Returns ticks written.
+        """
+        per_chunk = max(1, BACKFILL_CHUNK_ROWS // self.num_machines)
+        done = 0
+        for i in range(0, len(timestamps), per_chunk):
+            if stop and stop():
+                break
+            db.insert_columns(self.generate_columns(timestamps[i:i + per_chunk]))
+            done = min(i + per_chunk, len(timestamps))
+            if progress:
+                progress(done, len(timestamps))
+        return done
+
+    @timed(TICK_SECONDS)
+    def generate_columns(self, timestamps: List[datetime]) -> Dict[str, np.ndarray]:
+        """
+        Generate one or more whole ticks as column arrays (tick-major: every machine
+        for the first timestamp, then the next, ...).
+        """
+        shape = (len(timestamps), self.num_machines)
+        rng = self.rng
+
+        # Base values
+        temp = rng.normal(70, 5, shape)
+        vib = rng.normal(50, 10, shape)
+        power = rng.normal(10, 2, shape)
+
+        # Forced Criticals
+        temp[:, self.forced_critical] += 45
+        vib[:, self.forced_critical] += 80
+
+        # Random anomalies on everyone else: temperature, vibration or both
+        anomaly = (rng.random(shape) < ANOMALY_RATE) & ~self.forced_critical
+        kind = rng.integers(0, 3, shape)  # 0 = temp, 1 = vib, 2 = both
+        temp += np.where(anomaly & (kind != 1), 30, 0)
+        vib += np.where(anomaly & (kind != 0), 60, 0)
+
+        count = shape[0] * shape[1]
+        return {
+            "machine_id": np.tile(self.machine_ids, shape[0]),
+            "timestamp": np.repeat(np.array([t.isoformat() for t in timestamps], dtype=object), shape[1]),
+            "temperature": np.round(temp, 2).ravel(),
+            "vibration": np.round(vib, 2).ravel(),
+            "power": np.round(power, 2).ravel(),
+            "status": np.full(count, "running", dtype=object),
+        }
 
     def generate_tick(self, timestamp=None, persist=True) -> List[dict]:
         """Generate a single snapshot of data for all machines"""
         if timestamp is None:
             timestamp = datetime.now()
-            
-        data = []
-        for machine_id in self.machines:
-            # Base values
-            temp = np.random.normal(70, 5) 
-            vib = np.random.normal(50, 10) 
-            power = np.random.normal(10, 2) 
-            
-            # Forced Criticals
-            forced_critical = ['M-015', 'M-088', 'M-105', 'M-200', 'M-404']
-            if machine_id in forced_critical:
-                temp += 45
-                vib += 80
-            elif random.random() < 0.05: # Random anomalies
-                type_anomaly = random.choice(['temp', 'vib', 'both'])
-                if type_anomaly == 'temp': temp += 30
-                elif type_anomaly == 'vib': vib += 60
-                else: temp += 30; vib += 60
-
-            data.append({
-                "machine_id": machine_id,
-                "timestamp": timestamp.isoformat(),
-                "temperature": round(temp, 2),
-                "vibration": round(vib, 2),
-                "power": round(power, 2),
-                "status": "running"
-            })
-            
+
+        columns = self.generate_columns([timestamp])
         if persist:
             try:
-                db.insert_readings(data)
+                db.insert_columns(columns)
             except Exception as e:
+                ERRORS.inc(where="tick_insert")
                 print(f"Insert failed: {e}")
-                
-        return data
 
-    def get_latest_readings(self) -> List[MachineData]:
-        # Try to fetch from DB first (Last distinct reading per machine)
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*(columns[k].tolist() for k in keys))]
+
+    def get_latest_frame(self) -> FleetColumns:
+        """Columnar form of get_latest_readings, for hot paths that never need models"""
         try:
-             # Fast check for current data
-             rows = db.get_latest_readings(limit=500)
-             if len(rows) > 400:
-                 return [MachineData(**row) for row in rows]
+            return db.get_latest_columns()
         except Exception as e:
+            ERRORS.inc(where="latest_fetch")
             print(f"Fetch failed: {e}")
+            return FleetColumns.empty()
 
-        # If no fresh data, generate new tick and persist
-        raw_data = self.generate_tick()
-        return [MachineData(**row) for row in raw_data]
+    def get_latest_readings(self) -> List[MachineData]:
+        """
+        Read-only: current state of every machine from the DB (machine_latest).
+        Ticks are produced by the background ingest loop, never by a request.
+        """
+        return self.get_latest_frame().to_models()
 
 simulator = Simulator()
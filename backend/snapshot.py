@@ -0,0 +1,120 @@
+import threading
+from typing import List, Dict, Optional
+
+from .models import MachineData, Diagnosis
+from .columnar import FleetColumns, ReadingRow
+from .simulator import simulator
+from .es_engine import es_engine
+from .database import db
+
+def compute_overview(frame: FleetColumns, diagnoses: List[Diagnosis]) -> Dict:
+    """Business metrics for the dashboard header"""
+    active_machines = 490 # Fixed: 10 machines OFF as requested
+
+    alert_count = len(diagnoses)
+    critical_count = len([d for d in diagnoses if "Critical" in d.reasoning or d.confidence > 0.9])
+
+    # Calculated Business Metrics
+    production = 98.4 - (alert_count * 0.1)
+    avg_power = float(frame.power.mean(dtype="float64")) if len(frame) else 10
+    efficiency = 100 - ((avg_power - 10) * 5) if avg_power > 10 else 98.5
+
+    return {
+        "active_machines": active_machines,
+        "total_machines": 500,
+        "active_alerts": alert_count,
+        "critical_alerts": critical_count,
+        "production_output": round(production, 1),
+        "energy_efficiency": round(efficiency, 1),
+        "system_health": "Optimal" if alert_count < 10 else "Attention Required"
+    }
+
+class Snapshot:
+    """Latest readings (columnar) plus everything derived from them, computed once per tick"""
+    # Derived artifacts (encoded responses) kept per snapshot
+    MEMO_SIZE = 64
+
+    def __init__(self, key, frame: FleetColumns, diagnoses: List[Diagnosis]):
+        self.key = key
+        self.frame = frame
+        self.diagnoses = diagnoses
+        self.overview = compute_overview(frame, diagnoses)
+        self.etag = '"%s-r%s"' % key
+        self._readings = None
+        self._memo = {}
+
+    def memo(self, key, build=None):
+        """Value derived from this snapshot, built once by build(); None if absent and no build"""
+        value = self._memo.get(key)
+        if value is None and build is not None:
+            if len(self._memo) >= self.MEMO_SIZE:
+                self._memo.clear()
+            value = self._memo[key] = build()
+        return value
+
+    @property
+    def readings(self) -> List[MachineData]:
+        """Full model list, built on first use only (API boundary)"""
+        if self._readings is None:
+            self._readings = self.frame.to_models()
+        return self._readings
+
+    def reading(self, machine_id: str) -> Optional[ReadingRow]:
+        row = self.frame.find(machine_id)
+        return None if row is None else self.frame.row(row)
+
+class SnapshotCache:
+    """
+    Shared per-tick cache for the dashboard endpoints.
+
+    The key is the DB tick id plus the rule base version, so the snapshot is rebuilt
+    exactly when a new ingest batch commits or the rules are edited. Concurrent
+    callers during a rebuild wait for the one computation instead of repeating it.
+    """
+    def __init__(self, database=db, source=simulator, engine=es_engine):
+        self.database = database
+        self.source = source
+        self.engine = engine
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self):
+        self.engine.refresh()
+        return (self.database.tick_id, self.engine.rules_version)
+
+    def peek(self) -> Optional[Snapshot]:
+        """
+        The snapshot if it is current for the committed tick, else None. Never blocks or
+        queries: rule edits are picked up by the rebuild every tick performs through get().
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == (self.database.tick_id, self.engine.rules_version):
+            self.hits += 1
+            return snapshot
+        return None
+
+    def get(self) -> Snapshot:
+        key = self._key()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == key:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.key == key:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            frame = self.source.get_latest_frame()
+            snapshot = Snapshot(key, frame, self.engine.diagnose_frame(frame))
+            self._snapshot = snapshot
+            return snapshot
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else None}
+
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,209 @@
+import json
+import asyncio
+import threading
+import collections
+import numpy as np
+from typing import Dict
+
+from .database import db
+from .snapshot import snapshot_cache, Snapshot
+from .metrics import ERRORS
+
+# Deltas buffered per client before it is treated as a slow consumer
+BUFFER_SIZE = 8
+KEEPALIVE_SECONDS = 15
+
+def _sse(event: str, payload: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+def _readings(frame, rows=slice(None)):
+    return [{"machine_id": d["machine_id"], "temperature": d["temperature"], "vibration": d["vibration"],
+             "power": d["power"], "status": d["status"]} for d in frame.to_dicts(rows)]
+
+def _fleet_point(snapshot: Snapshot):
+    """Fleet averages for the tick, in the same shape as a get_history row"""
+    frame = snapshot.frame
+    if not len(frame):
+        return None
+    power = float(frame.power.mean(dtype="float64"))
+    return {
+        "timestamp": str(frame.timestamp.max().astype("datetime64[s]")),
+        "temperature": float(frame.temperature.mean(dtype="float64")),
+        "vibration": float(frame.vibration.mean(dtype="float64")),
+        "power": power,
+        "signals": int(power * 50),
+    }
+
+def _changed_rows(previous, current) -> np.ndarray:
+    """Rows of `current` whose reading differs from `previous` (compared by machine index)"""
+    if not len(previous):
+        return np.arange(len(current))
+    slot = np.full(max(previous.index.max(), current.index.max()) + 1, -1)
+    slot[previous.index] = np.arange(len(previous))
+    prev_rows = slot[current.index]
+    known = prev_rows >= 0
+    p = np.where(known, prev_rows, 0)
+    same = known
+    for column in ("temperature", "vibration", "power", "status"):
+        same &= current[column] == previous[column][p]
+    return np.flatnonzero(~same)
+
+class Subscriber:
+    def __init__(self, loop, buffer_size=BUFFER_SIZE):
+        self.loop = loop
+        self.buffer_size = buffer_size
+        self.buffer = collections.deque()
+        self.event = asyncio.Event()
+        self.lock = threading.Lock()
+        # A new client (or one that fell behind) is sent the full state next
+        self.resync = True
+        self.coalesced = 0
+
+    def push(self, message: str):
+        with self.lock:
+            if self.resync:
+                pass
+            elif len(self.buffer) >= self.buffer_size:
+                # Slow consumer: drop its backlog and coalesce into one full snapshot on next read
+                self.buffer.clear()
+                self.resync = True
+                self.coalesced += 1
+            else:
+                self.buffer.append(message)
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    def take(self):
+        with self.lock:
+            resync, self.resync = self.resync, False
+            messages = list(self.buffer)
+            self.buffer.clear()
+        return resync, messages
+
+class TelemetryHub:
+    """
+    Single fan-out for live telemetry.
+
+    On each committed ingest batch the publisher thread takes the shared snapshot,
+    computes one delta against the previously published snapshot (changed readings,
+    new/cleared diagnoses, overview counters, fleet averages), serializes it once and
+    hands the same string to every subscriber's bounded buffer.
+    """
+    def __init__(self, database=db, cache=snapshot_cache):
+        self.cache = cache
+        self.subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._published = None   # snapshot the last delta was computed against
+        self._full = None        # cached full message for self._published
+        self.messages_published = 0
+        database.add_ingest_listener(lambda tick_id, columns: self._wake.set())
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-hub", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def subscribe(self, loop) -> Subscriber:
+        subscriber = Subscriber(loop)
+        subscriber.event.set()
+        with self._lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self.subscribers.discard(subscriber)
+            if not self.subscribers:
+                self._published = self._full = None
+
+    def full_message(self) -> str:
+        """Full state for a new or resyncing client, consistent with the next delta"""
+        with self._lock:
+            if self._published is None:
+                self._published = self.cache.get()
+            if self._full is None:
+                snapshot = self._published
+                self._full = _sse("snapshot", {
+                    "tick": snapshot.etag.strip('"'),
+                    "overview": snapshot.overview,
+                    "readings": _readings(snapshot.frame),
+                    "diagnoses": [d.model_dump(mode="json") for d in snapshot.diagnoses],
+                    "fleet": _fleet_point(snapshot),
+                })
+            return self._full
+
+    def _delta(self, previous: Snapshot, current: Snapshot) -> str:
+        readings = _readings(current.frame, _changed_rows(previous.frame, current.frame))
+
+        before = {(d.machine_id, d.condition) for d in previous.diagnoses}
+        after = {(d.machine_id, d.condition) for d in current.diagnoses}
+        return _sse("delta", {
+            "tick": current.etag.strip('"'),
+            "overview": current.overview,
+            "readings": readings,
+            "diagnoses_new": [d.model_dump(mode="json") for d in current.diagnoses
+                              if (d.machine_id, d.condition) not in before],
+            "diagnoses_cleared": [{"machine_id": m, "condition": c} for m, c in sorted(before - after)],
+            "fleet": _fleet_point(current),
+        })
+
+    def publish(self):
+        with self._lock:
+            if not self.subscribers or self._published is None:
+                return
+            current = self.cache.get()
+            if current.key == self._published.key:
+                return
+            message = self._delta(self._published, current)
+            self._published, self._full = current, None
+            for subscriber in self.subscribers:
+                subscriber.push(message)
+            self.messages_published += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.publish()
+            except Exception as e:
+                ERRORS.inc(where="telemetry_publish")
+                print(f"Telemetry publish failed: {e}")
+
+    async def events(self, subscriber: Subscriber):
+        """SSE stream for one client: full snapshot first, then deltas"""
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.event.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            subscriber.event.clear()
+            resync, messages = subscriber.take()
+            if resync:
+                yield await asyncio.to_thread(self.full_message)
+            else:
+                for message in messages:
+                    yield message
+
+    def stats(self) -> Dict:
+        with self._lock:
+            subscribers = list(self.subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "messages_published": self.messages_published,
+            "buffered": sum(len(s.buffer) for s in subscribers),
+            "coalesced_resyncs": sum(s.coalesced for s in subscribers),
+        }
+
+telemetry_hub = TelemetryHub()
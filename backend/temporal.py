@@ -0,0 +1,158 @@
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+
+from .columnar import machine_index, occurrence_groups
+from .rule_compiler import OPERATORS, SIGNALS, MAX_WINDOW
+from .shm import SharedArrays
+
+class SignalHistory:
+    """
+    The last `window` readings of every machine, in per-machine ring buffers.
+
+    Rows are shared machine_index positions, so one (machines, window, signals) block
+    holds the whole fleet. Each ingested reading is an O(1) slot write, and temporal
+    rule predicates (k-of-n persistence, rate of change) read a fixed-size slice
+    instead of re-querying history.
+
+    With shared=True the rings live in a shared memory block, so inference worker
+    processes (see sharding.py) read them in place via `descriptor`.
+    """
+    ARRAYS = ("values", "times", "head", "filled", "last_t")
+
+    def __init__(self, window=MAX_WINDOW, shared=False):
+        self.window = window
+        self.shared = shared
+        self._block = None
+        self._lock = threading.Lock()
+        self._t0 = None
+        self._allocate(0)
+
+    @classmethod
+    def attached(cls, arrays) -> "SignalHistory":
+        """Read-only view over arrays from another process's `descriptor` (no ingest)"""
+        history = cls.__new__(cls)
+        history.shared, history._block, history._t0 = False, None, None
+        history._lock = threading.Lock()
+        for name in cls.ARRAYS:
+            setattr(history, name, arrays[name])
+        history.window = history.values.shape[1]
+        return history
+
+    def _allocate(self, n):
+        specs = {
+            "values": ((n, self.window, len(SIGNALS)), np.float32),
+            "times": ((n, self.window), np.float64),      # minutes since _t0
+            "head": ((n,), np.int32),                     # next slot to write
+            "filled": ((n,), np.int32),
+            "last_t": ((n,), np.float64),
+        }
+        if self.shared and n:
+            self._block = SharedArrays.create(specs)
+            arrays = self._block.arrays
+        else:
+            arrays = {name: np.empty(shape, dtype) for name, (shape, dtype) in specs.items()}
+        for name in self.ARRAYS:
+            arrays[name].fill(-np.inf if name == "last_t" else 0)
+            setattr(self, name, arrays[name])
+
+    def _grow(self, n):
+        size = len(self.head)
+        if n <= size:
+            return
+        old = [getattr(self, name) for name in self.ARRAYS]
+        old_block = self._block
+        self._allocate(max(n, 2 * size))
+        for name, arr in zip(self.ARRAYS, old):
+            getattr(self, name)[:size] = arr
+        del old, arr
+        if old_block is not None:
+            old_block.close()
+
+    @property
+    def descriptor(self):
+        """Shared memory descriptor of the rings (None unless shared); stable until the fleet grows"""
+        return self._block.descriptor if self._block is not None else None
+
+    def close(self):
+        if self._block is not None:
+            with self._lock:
+                self._block.close()
+                self._block = None
+
+    def observe(self, columns):
+        """Ingest listener: append a batch (one or more ticks) to the machines' rings, in time order"""
+        idx = machine_index.lookup(np.asarray(columns["machine_id"], dtype=object))
+        ts = np.asarray(columns["timestamp"], dtype="datetime64[us]")
+        values = np.stack([np.asarray(columns[c], dtype=np.float32) for c in SIGNALS], axis=1)
+
+        with self._lock:
+            self._grow(len(machine_index))
+            if self._t0 is None:
+                self._t0 = ts.min()
+            minutes = (ts - self._t0) / np.timedelta64(1, "m")
+
+            # One slot per reading: each machine's readings appended oldest first
+            for rows in occurrence_groups(idx, minutes):
+                self._append(idx[rows], minutes[rows], values[rows])
+
+    def _append(self, idx, t, x):
+        fresh = t > self.last_t[idx]  # late or replayed readings are not part of "the last n"
+        if not fresh.all():
+            idx, t, x = idx[fresh], t[fresh], x[fresh]
+        slot = self.head[idx]
+        self.values[idx, slot] = x
+        self.times[idx, slot] = t
+        self.head[idx] = (slot + 1) % self.window
+        self.filled[idx] = np.minimum(self.filled[idx] + 1, self.window)
+        self.last_t[idx] = t
+
+    def warm_start(self, database, window=timedelta(minutes=15)):
+        """Refill the rings from recent history after a restart"""
+        if self.filled.any():
+            return
+        columns = database.get_readings_since(datetime.now() - window)
+        if len(columns["machine_id"]):
+            self.observe(columns)
+            print(f"--- ES: warm-started rule windows from {len(columns['machine_id'])} readings ---")
+
+    def rows(self, machine_ids) -> np.ndarray:
+        return machine_index.lookup(np.asarray(machine_ids, dtype=object))
+
+    def _recent(self, rows, n):
+        """Ring slots of each machine's last n readings (newest first) and which of them exist"""
+        back = np.arange(n)
+        known = rows < len(self.head)
+        safe = np.where(known, rows, 0)
+        slots = (self.head[safe][:, None] - 1 - back) % self.window
+        valid = (back < self.filled[safe][:, None]) & known[:, None]
+        return safe[:, None], slots, valid
+
+    def persistence(self, rows, signal, op, value, k, n) -> np.ndarray:
+        """True where `signal op value` held in at least k of each machine's last n readings"""
+        with self._lock:
+            if not len(self.head):
+                return np.zeros(len(rows), dtype=bool)
+            r, slots, valid = self._recent(rows, n)
+            window = self.values[r, slots, SIGNALS.index(signal)]
+        hits = OPERATORS[op](window, np.float32(value)) & valid
+        return np.count_nonzero(hits, axis=1) >= k
+
+    def rate(self, rows, signal, over) -> np.ndarray:
+        """Change per minute between each machine's newest reading and the one `over` readings
+        earlier; NaN while a machine has fewer readings than that"""
+        s = SIGNALS.index(signal)
+        with self._lock:
+            if not len(self.head):
+                return np.full(len(rows), np.nan)
+            r, slots, valid = self._recent(rows, over + 1)
+            newest, oldest = slots[:, 0:1], slots[:, over:over + 1]
+            dv = self.values[r, newest, s].astype(np.float64) - self.values[r, oldest, s]
+            dt = self.times[r, newest] - self.times[r, oldest]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(valid[:, over:over + 1] & (dt > 0), dv / dt, np.nan)
+        return rate[:, 0]
+
+    def stats(self):
+        return {"machines": int(np.count_nonzero(self.filled)), "window": self.window,
+                "memory_kb": round((self.values.nbytes + self.times.nbytes) / 1024, 1)}
@@ -0,0 +1,90 @@
+import time
+import threading
+from typing import Dict
+
+from .simulator import simulator
+from .database import db
+from .dss_engine import dss_engine
+from .es_engine import es_engine
+from .ingest import ingest_loop
+from .metrics import ERRORS
+
+class Warmup:
+    """
+    Startup work that does not have to block serving, on a background thread.
+
+    1. Register the plant's machine metadata (sector, line, model) for group rollups
+    2. Seed the DSS statistics and ES rule windows from the history already stored
+    3. Fill the gap between the newest stored tick and now, in bulk transactions
+    4. Start the live ingest loop (after the gap-fill, so ticks stay in time order)
+
+    Endpoints serve whatever history exists meanwhile and report state "warming".
+    """
+    def __init__(self, source=simulator, ingest=ingest_loop):
+        self.source = source
+        self.ingest = ingest
+        self.state = "idle"
+        self.phase = None
+        self.ticks_planned = 0
+        self.ticks_written = 0
+        self.error = None
+        self._started = None
+        self._elapsed_ms = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def warming(self) -> bool:
+        return self.state == "warming"
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.state = "warming"
+            self._stop.clear()
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Shutdown: the gap-fill stops after its current chunk, and ingest is not started"""
+        self._stop.set()
+        self.join(timeout=30)
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _progress(self, done, total):
+        self.ticks_written, self.ticks_planned = done, total
+
+    def _run(self):
+        try:
+            self.phase = "metadata"
+            db.set_machine_metadata(self.source.metadata())
+            self.phase = "streaming_state"
+            dss_engine.warm_start()
+            es_engine.warm_start()
+            self.phase = "history"
+            self.source.ensure_history(self._progress, self._stop.is_set)
+            self.state = "stopped" if self._stop.is_set() else "ready"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            ERRORS.inc(where="warmup")
+            print(f"Warmup failed: {e}")
+        finally:
+            # Serve live data even if the backfill failed
+            self.phase = None
+            if not self._stop.is_set():
+                self.ingest.start()
+            self._elapsed_ms = round((time.perf_counter() - self._started) * 1000, 1)
+            print(f"--- Warmup {self.state} in {self._elapsed_ms} ms ---")
+
+    def stats(self) -> Dict:
+        elapsed = self._elapsed_ms
+        if elapsed is None and self._started is not None:
+            elapsed = round((time.perf_counter() - self._started) * 1000, 1)
+        return {"state": self.state, "phase": self.phase, "ticks_planned": self.ticks_planned,
+                "ticks_written": self.ticks_written, "elapsed_ms": elapsed, "error": self.error}
+
+warmup = Warmup()
@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmark scripts: timing statistics and JSON reports."""
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+def summarize(samples_s):
+    """Latency statistics in milliseconds for a list of durations in seconds"""
+    ms = np.asarray(samples_s, dtype=np.float64) * 1000
+    if not len(ms):
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "count": len(ms),
+        "min_ms": round(float(ms.min()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+def measure(fn, repeat=5, warmup=1, setup=None):
+    """
+    Time fn() `repeat` times after `warmup` untimed calls. With `setup`, each call
+    is fn(setup()) and only fn is timed.
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        if i >= warmup:
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def environment():
+    """What a result depends on, so runs from different commits/machines can be compared"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def write_report(name, params, results, out=None):
+    report = {"benchmark": name, "environment": environment(), "params": params, "results": results}
+    text = json.dumps(report, indent=2)
+    if out:
+        with open(out, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {out}", file=sys.stderr)
+    else:
+        print(text)
+    return report
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
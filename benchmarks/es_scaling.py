@@ -0,0 +1,98 @@
+"""
+ES inference scaling benchmark.
+Compares a reference per-reading, per-rule loop (the original evaluation
+strategy, kept here as `reference_loop`) with the compiled vectorized batch
+path (ESEngine.diagnose_batch) for growing fleet and rule base sizes.
+
+Run from the project root:
+    python -m benchmarks.es_scaling
+"""
+import time
+import random
+import operator
+import numpy as np
+from datetime import datetime
+
+from backend.es_engine import ESEngine
+from backend.rule_compiler import SIGNALS
+from backend.models import MachineData, Diagnosis
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+
+def make_columns(num_machines, rng):
+    return {
+        "machine_id": np.array([f"M-{i:05d}" for i in range(num_machines)], dtype=object),
+        "timestamp": np.full(num_machines, datetime.now(), dtype=object),
+        "temperature": rng.normal(70, 5, num_machines),
+        "vibration": rng.normal(50, 10, num_machines),
+        "power": rng.normal(10, 2, num_machines),
+    }
+
+def make_rules(num_rules, seed=7):
+    """Synthetic threshold rules with realistic (low) hit rates and whole-unit thresholds"""
+    rnd = random.Random(seed)
+    limits = {"temperature": (85, 110), "vibration": (80, 130), "power": (13, 18)}
+    rules = []
+    for i in range(num_rules):
+        when = []
+        for signal in rnd.sample(SIGNALS, rnd.choice([1, 2])):
+            low, high = limits[signal]
+            when.append((signal, ">", rnd.randint(low, high)))
+        rules.append({
+            "when": when,
+            "diagnosis": f"Synthetic Fault {i}",
+            "action": "Inspect",
+            "reasoning": "Synthetic benchmark rule",
+            "confidence": 0.8,
+        })
+    return rules
+
+def reference_loop(rules, readings) -> list:
+    """Every rule against every reading in Python, one predicate at a time"""
+    diagnoses = []
+    for reading in readings:
+        for rule in rules:
+            if all(OPERATORS[op](getattr(reading, signal), threshold) for signal, op, threshold in rule["when"]):
+                diagnoses.append(Diagnosis(machine_id=reading.machine_id, timestamp=reading.timestamp,
+                                           condition=rule["diagnosis"], action=rule["action"],
+                                           reasoning=rule["reasoning"], confidence=rule["confidence"]))
+    return diagnoses
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng = np.random.default_rng(42)
+    engine = ESEngine()
+
+    print(f"{'machines':>9} {'rules':>6} {'preds':>6} {'loop (ms)':>10} {'batch (ms)':>11} {'hits':>7}")
+    for num_machines, num_rules in [(500, 3), (500, 200), (2000, 200), (10000, 200), (10000, 1000)]:
+        columns = make_columns(num_machines, rng)
+        rules = make_rules(num_rules)
+        engine.set_rules(rules)
+
+        hits = len(engine.diagnose_batch(columns))
+        batch = best_of(lambda: engine.diagnose_batch(columns))
+
+        # The reference loop becomes impractically slow at the largest sizes
+        loop = "-"
+        if num_machines * num_rules <= 400_000:
+            readings = [
+                MachineData(machine_id=columns["machine_id"][i], timestamp=columns["timestamp"][i],
+                            temperature=columns["temperature"][i], vibration=columns["vibration"][i],
+                            power=columns["power"][i])
+                for i in range(num_machines)
+            ]
+            assert len(reference_loop(rules, readings)) == hits
+            loop_time = best_of(lambda: reference_loop(rules, readings), repeat=1)
+            loop = f"{loop_time * 1000:.1f}"
+
+        print(f"{num_machines:>9} {num_rules:>6} {engine.plan.predicate_count:>6} {loop:>10} {batch * 1000:>11.1f} {hits:>7}")
+
+if __name__ == "__main__":
+    main()
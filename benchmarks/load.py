@@ -0,0 +1,164 @@
+"""
+In-process HTTP load generator for backend.main:app.
+
+Drives the ASGI app directly (no server, no sockets, no client library) with a
+fixed number of concurrent workers per endpoint, and reports throughput and
+p50/p90/p99 latency per endpoint as JSON. Startup runs as usual (DB init, history
+backfill, ingest loop) against a throwaway database in a temp directory.
+
+Run from the project root:
+    python -m benchmarks.load --concurrency 16 --duration 5 --out load.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import summarize, write_report
+
+# (method, path with query, JSON body)
+ENDPOINTS = [
+    ("GET", "/api/dashboard/overview", None),
+    ("GET", "/api/es/diagnoses", None),
+    ("GET", "/api/machines?limit=50", None),
+    ("GET", "/api/dashboard/history?period=current", None),
+    ("GET", "/api/dashboard/history?period=60m", None),
+    ("GET", "/api/dashboard/history?period=24h", None),
+    ("GET", "/api/dss/trends", None),
+    ("GET", "/api/dss/drift", None),
+    ("GET", "/api/es/search?q=bear", None),
+    ("GET", "/api/machines/M-001/history?points=200", None),
+    ("POST", "/api/dss/simulate", {"machine_id": "M-015", "parameter": "capacity", "value": 80}),
+]
+
+async def call(app, method, target, body=None, headers=()):
+    """One request through the ASGI interface; returns (status, response body)"""
+    url = urlsplit(target)
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"host", b"bench")] + [(k.lower().encode(), v.encode()) for k, v in headers]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": url.path, "raw_path": url.path.encode(),
+        "query_string": url.query.encode(), "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    status, chunks = None, []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status, b"".join(chunks)
+
+async def run_endpoint(app, method, target, body, concurrency, duration, max_requests, headers=()):
+    latencies, errors, size = [], 0, 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors, size
+        while time.perf_counter() < deadline and (not max_requests or len(latencies) < max_requests):
+            start = time.perf_counter()
+            status, response = await call(app, method, target, body, headers)
+            latencies.append(time.perf_counter() - start)
+            size = len(response)
+            if status is None or status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "endpoint": f"{method} {target}",
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "response_bytes": size,
+        **summarize(latencies),
+    }
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Run the app's startup/shutdown handlers through the ASGI lifespan protocol"""
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, inbox.get, outbox.put))
+    await inbox.put({"type": "lifespan.startup"})
+    message = await outbox.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Startup failed: {message.get('message')}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
+
+async def run(args):
+    from backend.main import app  # imported after chdir so the DB lands in the temp dir
+
+    async with lifespan(app):
+        results = []
+        for method, target, body in ENDPOINTS:
+            if args.only and not any(s in target for s in args.only):
+                continue
+            await call(app, method, target, body, args.header)  # warm caches and code paths
+            result = await run_endpoint(app, method, target, body, args.concurrency, args.duration, args.requests,
+                                        args.header)
+            print(f"{result['endpoint']:<55} {result['throughput_rps']:>9} rps  "
+                  f"p50 {result.get('p50_ms')} ms  p99 {result.get('p99_ms')} ms", flush=True)
+            results.append(result)
+        return results
+
+def header(value):
+    name, _, content = value.partition(":")
+    return name.strip(), content.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process HTTP load generator for backend.main:app")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per endpoint")
+    parser.add_argument("--requests", type=int, default=0, help="stop an endpoint after this many requests")
+    parser.add_argument("--only", nargs="*", help="substrings selecting endpoints")
+    parser.add_argument("--header", type=header, action="append", default=[],
+                        help="extra request header, e.g. 'Accept: application/vnd.smartfactory.columnar+json'")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sf-load-")
+    cwd = os.getcwd()
+    out = os.path.abspath(args.out) if args.out else None
+    os.chdir(workdir)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_report("load", vars(args), results, out)
+
+if __name__ == "__main__":
+    main()
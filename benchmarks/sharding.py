@@ -0,0 +1,89 @@
+"""
+Sharded ES inference benchmark: in-process evaluation vs. the worker pool.
+
+For every fleet and rule base size it times ESEngine.evaluate_masks in-process and
+with 1..N shard workers, checks that every sharded run returns the same masks, and
+reports speedup and parallel efficiency against the in-process time. Speedup is
+bounded by the cores actually available (see environment.cpus in the report).
+
+Run from the project root:
+    python -m benchmarks.sharding --machines 100000,500000 --rules 100,1000 --workers 1,2,4,8
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.es_engine import ESEngine
+from backend.sharding import ShardedInference
+from backend.temporal import SignalHistory
+from benchmarks.common import measure, write_report, int_list
+from benchmarks.es_scaling import make_columns, make_rules
+
+def temporal_rules(num_rules, seed=11):
+    """Persistence (k-of-n) variants of the synthetic threshold rules"""
+    rules = make_rules(num_rules, seed)
+    for rule in rules:
+        signal, op, value = rule["when"][0]
+        rule["when"] = {"signal": signal, "op": op, "value": value, "for": 3, "of": 5}
+    return rules
+
+def bench_fleet(num_machines, rule_counts, worker_counts, temporal, repeat, rng):
+    columns = make_columns(num_machines, rng)
+    history = SignalHistory(shared=True)
+    if temporal:
+        start = datetime.now() - timedelta(minutes=10)
+        for minute in range(10):
+            tick = make_columns(num_machines, rng)
+            tick["timestamp"] = np.full(num_machines, start + timedelta(minutes=minute), dtype=object)
+            history.observe(tick)
+
+    results = []
+    pools = {n: ShardedInference(workers=n, min_machines=0) for n in worker_counts}
+    try:
+        for num_rules in rule_counts:
+            rules = temporal_rules(num_rules) if temporal else make_rules(num_rules)
+            local = ESEngine(history=history)
+            local.set_rules(rules)
+            expected = local.evaluate_masks(columns)
+            common = {"machines": num_machines, "rules": num_rules, "temporal": temporal,
+                      "predicates": local.plan.predicate_count}
+
+            baseline = measure(lambda: local.evaluate_masks(columns), repeat)
+            results.append({"name": "es.evaluate_masks[in-process]", **common, "workers": 0, **baseline})
+            for workers, sharding in pools.items():
+                engine = ESEngine(history=history, sharding=sharding)
+                engine.set_rules(rules)
+                masks = engine.evaluate_masks(columns)   # also warms up the pool and worker plans
+                if any((a != b).any() for a, b in zip(masks, expected)):
+                    raise AssertionError(f"sharded masks differ ({workers} workers, {num_rules} rules)")
+                stats = measure(lambda: engine.evaluate_masks(columns), repeat)
+                speedup = baseline["p50_ms"] / stats["p50_ms"]
+                results.append({"name": "es.evaluate_masks[sharded]", **common, "workers": workers, **stats,
+                                "speedup": round(speedup, 2), "efficiency": round(speedup / workers, 2)})
+    finally:
+        for sharding in pools.values():
+            sharding.close()
+        history.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--machines", type=int_list, default=[100_000], help="comma-separated fleet sizes")
+    parser.add_argument("--rules", type=int_list, default=[100, 1000], help="comma-separated rule base sizes")
+    parser.add_argument("--workers", type=int_list, default=sorted({1, 2, os.cpu_count() or 1}),
+                        help="comma-separated shard worker counts")
+    parser.add_argument("--temporal", action="store_true", help="use k-of-n persistence rules over shared windows")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    results = []
+    for num_machines in args.machines:
+        results += bench_fleet(num_machines, args.rules, args.workers, args.temporal, args.repeat, rng)
+    write_report("sharding", vars(args), results, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Backend component benchmarks, emitted as JSON so runs can be compared across commits.
+
+For every fleet size it builds a throwaway database with `--history-hours` of
+minute-resolution history, then times tick generation, inserts, latest/history
+reads, ES inference for every rule base size and the DSS trend paths.
+
+Run from the project root:
+    python -m benchmarks.suite --machines 500,5000,50000 --rules 3,100,1000 --out bench.json
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.database import Database
+from backend.simulator import Simulator
+from backend.es_engine import ESEngine
+from backend.dss_engine import DSSEngine
+from backend.temporal import SignalHistory
+from benchmarks.common import measure, write_report, int_list
+from benchmarks.es_scaling import make_rules
+
+def build_database(path, simulator, history_hours):
+    database = Database(path)
+    database.init_db()
+    now = datetime.now()
+    ticks = [now - timedelta(minutes=m) for m in range(int(history_hours * 60), 0, -1)]
+    per_chunk = max(1, 200_000 // simulator.num_machines)
+    for i in range(0, len(ticks), per_chunk):
+        database.insert_columns(simulator.generate_columns(ticks[i:i + per_chunk]))
+    return database
+
+def distinct_timestamp_batch(simulator, start, rows=50_000):
+    """Bulk-upload shaped batch: one timestamp per row, machines round robin, rows shuffled"""
+    ticks = -(-rows // simulator.num_machines)
+    columns = simulator.generate_columns([start])
+    stamps = np.array([(start + timedelta(milliseconds=i)).isoformat() for i in range(rows)], dtype=object)
+    order = np.random.default_rng(rows).permutation(rows)
+    batch = {k: np.tile(v, ticks)[:rows][order] for k, v in columns.items()}
+    batch["timestamp"] = stamps[order]
+    return batch
+
+def bench_fleet(num_machines, rule_counts, history_hours, repeat, workdir):
+    simulator = Simulator(num_machines=num_machines, seed=42)
+    database = build_database(os.path.join(workdir, f"bench_{num_machines}.db"), simulator, history_hours)
+    common = {"machines": num_machines, "history_hours": history_hours}
+    results = []
+
+    def record(name, stats, **extra):
+        results.append({"name": name, **common, **extra, **stats})
+
+    # 1. Tick generation and writes
+    record("simulator.generate_columns", measure(lambda: simulator.generate_columns([datetime.now()]), repeat))
+    record("simulator.generate_tick", measure(lambda: simulator.generate_tick(persist=False), repeat))
+    clock = iter(datetime.now() + timedelta(seconds=s) for s in range(1, 10_000))
+    record("database.insert_readings", measure(
+        database.insert_readings, repeat, setup=lambda: simulator.generate_tick(next(clock), persist=False)))
+    record("database.insert_columns", measure(
+        database.insert_columns, repeat, setup=lambda: simulator.generate_columns([next(clock)])))
+
+    # 2. Reads
+    record("database.get_latest_readings", measure(database.get_latest_readings, repeat))
+    record("database.get_latest_columns", measure(database.get_latest_columns, repeat))
+    for period in ("current", "60m", "24h"):
+        record(f"database.get_history[{period}]", measure(lambda: database.get_history(period), repeat))
+    now = datetime.now()
+    record("database.get_machine_history[1h]", measure(
+        lambda: database.get_machine_history(simulator.machines[0], now - timedelta(hours=1), now), repeat))
+
+    # 3. ES inference on the current fleet state
+    frame = database.get_latest_columns()
+    models = frame.to_models()
+    engine = ESEngine()
+    for num_rules in rule_counts:
+        engine.set_rules(make_rules(num_rules))
+        extra = {"rules": num_rules, "predicates": engine.plan.predicate_count}
+        record("es.diagnose_all", measure(lambda: engine.diagnose_all(models), repeat), **extra)
+        record("es.diagnose_frame", measure(lambda: engine.diagnose_frame(frame), repeat), **extra)
+
+    # 4. DSS: batch pandas trends vs. the streaming per-machine state
+    dss = DSSEngine()
+    dss.observe(database.get_readings_since(now - timedelta(hours=history_hours)))
+    df = pd.DataFrame(database.get_latest_readings())
+    record("dss.analyze_trends", measure(lambda: dss.analyze_trends(df), repeat))
+    record("dss.observe_tick", measure(dss.observe, repeat, setup=lambda: simulator.generate_columns([next(clock)])))
+    # Every row its own timestamp, as in bulk uploads: must not cost one update per timestamp
+    epochs = iter(datetime.now() + timedelta(hours=h) for h in range(1, 10_000))
+    record("dss.observe_distinct_timestamps", measure(
+        dss.observe, repeat, setup=lambda: distinct_timestamp_batch(simulator, next(epochs))), rows=50_000)
+    history = SignalHistory()
+    record("history.observe_distinct_timestamps", measure(
+        history.observe, repeat, setup=lambda: distinct_timestamp_batch(simulator, next(epochs))), rows=50_000)
+    record("dss.trend_summary", measure(dss.trend_summary, repeat))
+    record("dss.detect_drift", measure(dss.detect_drift, repeat))
+
+    database.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--machines", type=int_list, default=[500, 5000], help="comma-separated fleet sizes")
+    parser.add_argument("--rules", type=int_list, default=[3, 100], help="comma-separated rule base sizes")
+    parser.add_argument("--history-hours", type=float, default=1.0, help="minute-resolution history per fleet")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sf-bench-")
+    try:
+        results = []
+        for num_machines in args.machines:
+            results += bench_fleet(num_machines, args.rules, args.history_hours, args.repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_report("suite", vars(args), results, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -7,15 +7,21 @@ print(f"--- DB Debug ---")
 conn = sqlite3.connect("smartfactory.db")
 c = conn.cursor()
 
-# 1. Check Row Count
-count = c.execute("SELECT count(*) FROM machine_readings").fetchone()[0]
+# 1. Check Row Count (raw readings are partitioned by day)
+partitions = db.list_partitions()
+count = 0
+for table in partitions:
+    rows_in_partition = c.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    print(f"{table}: {rows_in_partition} rows")
+    count += rows_in_partition
 print(f"Total Rows: {count}")
 
 # 2. Check Latest Data
 print("\n--- Latest 5 Rows ---")
-rows = c.execute("SELECT id, timestamp FROM machine_readings ORDER BY id DESC LIMIT 5").fetchall()
-for r in rows:
-    print(r)
+if partitions:
+    rows = c.execute(f"SELECT machine_id, timestamp FROM {partitions[-1]} ORDER BY timestamp DESC LIMIT 5").fetchall()
+    for r in rows:
+        print(r)
 
 # 3. Check 'Current' Window Logic
 print("\n--- Testing Current Window Query ---")
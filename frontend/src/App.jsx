@@ -7,6 +7,7 @@ import { ESView } from './components/views/ESView';
 import { SettingsView } from './components/views/SettingsView';
 import { MachineListModal } from './components/MachineListModal';
 import api from './api';
+import { subscribeTelemetry } from './stream';
 
 const SPECIFIC_ALERTS = []; // Deprecated: Now using real backend alerts
 
@@ -145,12 +146,23 @@ function App() {
     }
   };
 
+  // Full refresh on mount and once a minute; overview and alerts arrive live from the telemetry stream
   useEffect(() => {
     fetchData();
-    const interval = setInterval(fetchData, 5000);
+    const interval = setInterval(fetchData, 60000);
     return () => clearInterval(interval);
   }, [activeMachinesCount]);
 
+  useEffect(() => {
+    return subscribeTelemetry(({ overview, alerts }) => {
+      setData(prev => ({
+        ...prev,
+        overview: { ...prev.overview, ...overview, active_machines: activeMachinesCount },
+        alerts
+      }));
+    });
+  }, [activeMachinesCount]);
+
   if (loading && !data.history.length) {
     return <div className="min-h-screen bg-background flex items-center justify-center text-primary animate-pulse">Initializing System...</div>;
   }
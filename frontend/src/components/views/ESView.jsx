@@ -94,7 +94,7 @@ export const ESView = ({ alerts }) => {
                                 logs.length > 0 ? logs.map((l, i) => (
                                     <div key={i} className="bg-black/40 p-3 rounded-lg border border-white/5">
                                         <div className="flex justify-between">
-                                            <span className="font-bold text-white">{l.fault_rules?.diagnosis || 'System Event'}</span>
+                                            <span className="font-bold text-white">{l.diagnosis || 'System Event'}</span>
                                             <span className="text-xs text-gray-500">{new Date(l.timestamp).toLocaleString()}</span>
                                         </div>
                                         <div className="text-sm text-gray-300 mt-1">{l.technician_action}</div>
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { TrendChart } from '../TrendChart';
 import { Power, Activity, Clock, BarChart2 } from 'lucide-react';
 import api from '../../api';
+import { subscribeTelemetry } from '../../stream';
 
 export const SimulatorView = ({ data, onOpenMachineList }) => {
     // Persist state in localStorage, default to true
@@ -35,11 +36,12 @@ export const SimulatorView = ({ data, onOpenMachineList }) => {
         }
     };
 
-    // Auto-refresh when range changes or every 5s
+    // Refresh when the range changes, then once per new tick pushed by the telemetry stream
     useEffect(() => {
         fetchHistory();
-        const interval = setInterval(fetchHistory, 5000);
-        return () => clearInterval(interval);
+        return subscribeTelemetry(({ snapshot }) => {
+            if (!snapshot) fetchHistory();
+        });
     }, [timeRange]);
 
     // Initialize with prop data if 24h (optimization to show something immediately)
@@ -0,0 +1,66 @@
+import api from './api';
+
+// Live telemetry over Server-Sent Events (GET /api/stream).
+// The server sends one full 'snapshot' event on connect and a 'delta' event per tick;
+// this keeps the alert list in sync and calls onTick({ overview, alerts, fleet, snapshot }).
+// EventSource reconnects on its own and the server answers a reconnect with a fresh snapshot.
+//
+// One EventSource per page, shared by every subscriber: it opens with the first
+// subscription and closes when the last one unsubscribes.
+const key = (d) => `${d.machine_id}|${d.condition}`;
+const subscribers = new Set();
+let source = null;
+let alerts = new Map();
+let last = null;
+
+const publish = (tick) => {
+    last = tick;
+    subscribers.forEach(({ onTick }) => onTick(tick));
+};
+
+const open = () => {
+    source = new EventSource(`${api.defaults.baseURL}/stream`);
+
+    source.addEventListener('snapshot', (e) => {
+        const msg = JSON.parse(e.data);
+        alerts = new Map(msg.diagnoses.map(d => [key(d), d]));
+        publish({ overview: msg.overview, alerts: [...alerts.values()], fleet: msg.fleet, snapshot: true });
+    });
+
+    source.addEventListener('delta', (e) => {
+        const msg = JSON.parse(e.data);
+        msg.diagnoses_cleared.forEach(d => alerts.delete(key(d)));
+        msg.diagnoses_new.forEach(d => alerts.set(key(d), d));
+        publish({ overview: msg.overview, alerts: [...alerts.values()], fleet: msg.fleet, snapshot: false });
+    });
+
+    source.onerror = (err) => {
+        subscribers.forEach(({ onError }) => onError && onError(err));
+    };
+};
+
+const close = () => {
+    source.close();
+    source = null;
+    alerts = new Map();
+    last = null;
+};
+
+export const subscribeTelemetry = (onTick, onError) => {
+    const subscriber = { onTick, onError };
+    subscribers.add(subscriber);
+    if (source === null) {
+        open();
+    } else if (last !== null) {
+        // Late subscribers start from the current state, like a fresh connection would
+        onTick({ ...last, snapshot: true });
+    }
+
+    return () => {
+        subscribers.delete(subscriber);
+        // Deferred, so a component re-subscribing in the same render keeps the connection
+        setTimeout(() => {
+            if (subscribers.size === 0 && source !== null) close();
+        }, 0);
+    };
+};
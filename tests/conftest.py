@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The backend keeps smartfactory.db in the working directory and reads SF_* settings at
+# import time: run the suite in a scratch directory, without a live ingest tick.
+os.environ.setdefault("SF_TICK_INTERVAL", "3600")
+os.environ.setdefault("SF_RETENTION_INTERVAL", "3600")
+os.chdir(tempfile.mkdtemp(prefix="sf-tests-"))
+
+from backend.database import Database  # noqa: E402
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh, initialized Database of its own"""
+    database = Database(str(tmp_path / "test.db"))
+    database.init_db()
+    yield database
+    database.close()
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient of the app, started once and warmed up (24h of simulated history)"""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.warmup import warmup
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 60
+        while warmup.warming and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert warmup.state == "ready", warmup.stats()
+        yield client
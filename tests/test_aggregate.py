@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.aggregate import GroupAggregator, parse_window
+from tests.test_database import batch
+
+NOW = datetime.now().replace(second=0, microsecond=0)
+METADATA = [
+    {"machine_id": "G-1", "sector": "Sector 1", "line": "Line 1-1", "model": "SF-100", "rated_capacity": 12.0},
+    {"machine_id": "G-2", "sector": "Sector 1", "line": "Line 1-2", "model": "SF-200", "rated_capacity": 15.0},
+    {"machine_id": "G-3", "sector": "Sector 2", "line": "Line 2-1", "model": "SF-100", "rated_capacity": 12.0},
+]
+
+def readings(minutes_ago):
+    t = NOW - timedelta(minutes=minutes_ago)
+    return batch([("G-1", t, 70, 50, 10), ("G-2", t, 80, 60, 12), ("G-3", t, 60, 40, 6)])
+
+def by_group(result):
+    return {g["group"]: g for g in result["groups"]}
+
+@pytest.mark.parametrize("window, span", [("15m", timedelta(minutes=15)), ("1h", timedelta(hours=1)),
+                                          ("30d", timedelta(days=30))])
+def test_parse_window(window, span):
+    assert parse_window(window) == span
+
+@pytest.mark.parametrize("window", ["", "1w", "h", "-1h", "0m", "31d", "1.5h"])
+def test_invalid_window(window):
+    with pytest.raises(ValueError):
+        parse_window(window)
+
+def test_group_sums_and_utilization(database):
+    database.set_machine_metadata(METADATA)
+    database.insert_columns(readings(5))
+    database.insert_columns(readings(4))
+
+    result = GroupAggregator(database).aggregate("sector", "power", "1h")
+    assert result["resolution"] == "1m" and [g["group"] for g in result["groups"]] == ["Sector 1", "Sector 2"]
+    sector1 = by_group(result)["Sector 1"]
+    assert (sector1["count"], sector1["avg"], sector1["min"], sector1["max"]) == (4, 11.0, 10, 12)
+    assert sector1["machines"] == 2 and sector1["rated_capacity_kw"] == 27.0
+    assert sector1["utilization_pct"] == round(100 * 11.0 / 13.5, 1)
+
+    models = by_group(GroupAggregator(database).aggregate("model", "temperature", "7d", series=True))
+    assert models["SF-100"]["avg"] == 65.0 and models["SF-100"]["series"][0]["count"] == 4
+    assert "utilization_pct" not in models["SF-100"]
+
+def test_history_is_regrouped_on_first_metadata_load(database):
+    # Readings stored before any metadata existed still land in their groups
+    database.insert_columns(readings(5))
+    database.set_machine_metadata(METADATA)
+    lines = by_group(GroupAggregator(database).aggregate("line", "temperature", "1h"))
+    assert set(lines) == {"Line 1-1", "Line 1-2", "Line 2-1"} and lines["Line 1-2"]["avg"] == 80.0
+
+def test_results_are_cached_until_the_next_tick(database):
+    database.set_machine_metadata(METADATA)
+    database.insert_columns(readings(5))
+    aggregator = GroupAggregator(database)
+
+    first = aggregator.aggregate("sector", "power", "1h")
+    assert aggregator.aggregate("sector", "power", "1h") is first
+    assert (aggregator.hits, aggregator.misses) == (1, 1)
+
+    database.insert_columns(readings(4))
+    assert by_group(aggregator.aggregate("sector", "power", "1h"))["Sector 2"]["count"] == 2
+    assert aggregator.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.333}
+
+@pytest.mark.parametrize("group_by, metric", [("plant", "power"), ("sector", "pressure")])
+def test_unknown_dimension_or_metric(database, group_by, metric):
+    with pytest.raises(ValueError):
+        GroupAggregator(database).aggregate(group_by, metric)
+
+def test_aggregate_endpoint(client):
+    response = client.get("/api/aggregate", params={"group_by": "sector", "metric": "power", "window": "2h"})
+    assert response.status_code == 200
+    assert [g["group"] for g in response.json()["groups"]][:2] == ["Sector 1", "Sector 2"]
+    assert client.get("/api/aggregate", params={"window": "2w"}).status_code == 400
+    assert client.get("/api/aggregate", params={"group_by": "plant"}).status_code == 400
+    assert client.get("/api/aggregate", params={"window": "24h"}).json()["resolution"] == "1h"
+
+    unknown = client.post("/api/dss/scenario", json={"changes": {"speed": 110}, "sector": "Sector 99", "samples": 10})
+    assert unknown.status_code == 404
@@ -0,0 +1,113 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from backend.alerts import AlertManager
+from backend.models import Diagnosis
+
+RULES = [{"diagnosis": "Motor Overheating", "severity": "High"}, {"diagnosis": "Shaft Misalignment", "severity": "Low"}]
+
+class FakeCache:
+    """Stands in for the snapshot cache: each tick() is a new snapshot with the given diagnoses"""
+    def __init__(self):
+        self.snapshot = SimpleNamespace(key=0, diagnoses=[])
+
+    def tick(self, *firing):
+        self.snapshot = SimpleNamespace(key=self.snapshot.key + 1, diagnoses=[
+            Diagnosis(machine_id=m, timestamp=datetime.now(), condition=c, action="Inspect", reasoning="", confidence=conf)
+            for m, c, conf in firing])
+
+    def get(self):
+        return self.snapshot
+
+@pytest.fixture
+def cache():
+    return FakeCache()
+
+@pytest.fixture
+def alerts(database, cache):
+    manager = AlertManager(database=database, cache=cache, engine=SimpleNamespace(rules=RULES),
+                           clear_after=2, flush_interval=3600)
+    manager.load()
+    return manager
+
+def test_updates_wait_for_load(database, cache):
+    manager = AlertManager(database=database, cache=cache, engine=SimpleNamespace(rules=RULES))
+    cache.tick(("A", "Motor Overheating", 0.9))
+    assert manager.update() == 0 and not manager.open
+
+def test_alert_opens_once_and_takes_the_best_confidence(alerts, cache, database):
+    cache.tick(("A", "Motor Overheating", 0.7), ("A", "Motor Overheating", 0.9))
+    assert alerts.update() == 1
+    (alert,) = database.get_open_alerts()
+    assert (alert["machine_id"], alert["condition"], alert["severity"], alert["confidence"]) == \
+        ("A", "Motor Overheating", "High", 0.9)
+
+    # Still firing: no new alert; the same snapshot is not evaluated twice
+    assert alerts.update() == 0
+    cache.tick(("A", "Motor Overheating", 0.9))
+    assert alerts.update() == 0 and len(database.get_open_alerts()) == 1
+
+def test_alert_clears_after_consecutive_absent_ticks(alerts, cache, database):
+    cache.tick(("A", "Motor Overheating", 0.9))
+    alerts.update()
+
+    cache.tick()
+    assert alerts.update() == 0  # absent once: a flap, not a fix
+    cache.tick(("A", "Motor Overheating", 0.9))
+    alerts.update()
+    cache.tick()
+    alerts.update()
+    assert alerts.open
+
+    cache.tick()
+    assert alerts.update() == 1 and not alerts.open
+    (alert,) = database.get_alerts(status="all")
+    assert alert["resolution"] == "cleared" and alert["resolved_at"]
+    assert [e["type"] for e in alerts.events_since()["events"]] == ["opened", "resolved"]
+
+def test_technician_fix_resolves_the_targeted_alerts(alerts, cache, database):
+    cache.tick(("A", "Motor Overheating", 0.9), ("A", "Shaft Misalignment", 0.8), ("B", "Motor Overheating", 0.9))
+    alerts.update()
+    by_key = {(a["machine_id"], a["condition"]): a["id"] for a in alerts.list_open()}
+
+    note = alerts.log_maintenance("A", "Checked", "No fix yet", resolved=False)
+    assert note["resolved_alerts"] == [] and len(alerts.open) == 3
+
+    fix = alerts.log_maintenance("A", "Realigned shaft", "", alert_id=by_key[("A", "Shaft Misalignment")])
+    assert fix["resolved_alerts"] == [by_key[("A", "Shaft Misalignment")]]
+
+    rest = alerts.log_maintenance("A", "Replaced motor", "")
+    assert rest["resolved_alerts"] == [by_key[("A", "Motor Overheating")]] and rest["alert_id"] == rest["resolved_alerts"][0]
+    assert [a["machine_id"] for a in alerts.list_open()] == ["B"]
+
+    resolved = {a["id"]: a for a in database.get_alerts(status="resolved")}
+    assert resolved[fix["resolved_alerts"][0]]["resolution"] == "technician"
+    assert resolved[fix["resolved_alerts"][0]]["log_id"] == fix["id"]
+
+def test_open_alerts_survive_a_restart(alerts, cache, database):
+    cache.tick(("A", "Motor Overheating", 0.9))
+    alerts.update()
+
+    restarted = AlertManager(database=database, cache=cache, engine=SimpleNamespace(rules=RULES), clear_after=2)
+    restarted.load()
+    assert list(restarted.open) == [("A", "Motor Overheating")]
+    cache.tick(("A", "Motor Overheating", 0.9))
+    assert restarted.update() == 0  # resumed, not reopened
+
+def test_event_feed_paging(alerts, cache):
+    cache.tick(*[(f"M-{i}", "Motor Overheating", 0.9) for i in range(5)])
+    alerts.update()
+    first = alerts.events_since(0, limit=2)
+    assert [e["seq"] for e in first["events"]] == [1, 2] and not first["resync"]
+    assert [e["seq"] for e in alerts.events_since(first["seq"])["events"]] == [3, 4, 5]
+    assert alerts.events_since(5)["events"] == []
+
+    alerts.events.clear()
+    assert alerts.events_since(1)["resync"]
+
+def test_alert_endpoints(client):
+    assert client.get("/api/alerts", params={"status": "open"}).status_code == 200
+    assert client.get("/api/alerts/events").json()["resync"] is False
+    assert client.get("/api/alerts/status").json()["clear_after_ticks"] >= 1
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.async_db import AsyncDatabase, Coalescer, run_cpu
+
+def test_concurrent_calls_share_one_computation():
+    coalescer = Coalescer()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def main():
+        first = await asyncio.gather(*(coalescer.run("k", compute, 21) for _ in range(5)),
+                                     coalescer.run("other", compute, 1))
+        second = await coalescer.run("k", compute, 5)  # nothing is cached once the first run finished
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == [42] * 5 + [2] and second == 10
+    assert calls == [21, 1, 5]
+    assert coalescer.stats() == {"in_flight": 0, "started": 3, "joined": 4}
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    coalescer = Coalescer()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(*(coalescer.run("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await coalescer.run("k", asyncio.sleep, 0, "ok") == "ok"
+
+    asyncio.run(main())
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    coalescer = Coalescer()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leaving = asyncio.ensure_future(coalescer.run("k", slow))
+        staying = asyncio.ensure_future(coalescer.run("k", slow))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        return await staying
+
+    assert asyncio.run(main()) == "done"
+
+def test_reads_run_off_the_event_loop(database):
+    adb = AsyncDatabase(database, threads=2)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        rules = await adb.get_all_rules()
+        thread = await adb.run(threading.get_ident)
+        cpu_thread = await run_cpu(threading.get_ident)
+        return rules, thread != loop_thread, cpu_thread != loop_thread
+
+    try:
+        rules, off_loop, cpu_off_loop = asyncio.run(main())
+    finally:
+        adb.close()
+    assert rules and off_loop and cpu_off_loop
+    assert adb.path == database.path  # plain attributes pass through unwrapped
+
+@pytest.mark.parametrize("limit", [-1, 0, 501])
+def test_page_limit_is_validated(client, limit):
+    for path in ("/api/machines", "/api/alerts", "/api/maintenance/logs", "/api/alerts/events"):
+        response = client.get(path, params={"limit": limit})
+        assert response.status_code == 400 and "limit" in response.json()["detail"]
+
+def test_machines_endpoint_honours_the_limit(client):
+    assert len(client.get("/api/machines", params={"limit": 5}).json()) == 5
+    assert client.get("/api/stream/status").json()["coalescing"]["in_flight"] == 0
@@ -0,0 +1,74 @@
+import asyncio
+import json
+from datetime import datetime
+
+import numpy as np
+
+from backend.es_engine import ESEngine
+from backend.models import MachineData
+from backend.simulator import Simulator
+from benchmarks.common import int_list, measure, summarize, write_report
+from benchmarks.es_scaling import make_columns, make_rules, reference_loop
+from benchmarks.load import call, header, run_endpoint
+from benchmarks.suite import distinct_timestamp_batch
+
+def test_summarize():
+    stats = summarize([0.001, 0.002, 0.003, 0.004])
+    assert stats["count"] == 4
+    assert stats["min_ms"] == 1.0 and stats["max_ms"] == 4.0 and stats["p50_ms"] == 2.5
+    assert stats["p50_ms"] <= stats["p90_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert summarize([]) == {"count": 0}
+
+def test_measure_times_only_the_repeats():
+    calls, made = [], []
+    stats = measure(lambda: calls.append(1), repeat=4, warmup=2)
+    assert len(calls) == 6 and stats["count"] == 4
+
+    # setup() output is passed to fn on every call, warmup included
+    measure(lambda arg: calls.append(arg), repeat=2, warmup=1, setup=lambda: made.append(1) or len(made))
+    assert calls[-3:] == [1, 2, 3]
+
+def test_report_and_arguments(tmp_path, capsys):
+    out = tmp_path / "report.json"
+    write_report("unit", {"n": 1}, [{"count": 0}], out=str(out))
+    report = json.loads(out.read_text())
+    assert report["benchmark"] == "unit" and report["params"] == {"n": 1}
+    assert {"commit", "python", "numpy", "sqlite"} <= set(report["environment"])
+
+    assert int_list("500,5000,") == [500, 5000]
+    assert header("Accept-Encoding: gzip") == ("Accept-Encoding", "gzip")
+
+def test_batch_inference_matches_reference_loop():
+    rng = np.random.default_rng(3)
+    columns = make_columns(300, rng)
+    rules = make_rules(50)
+    assert make_rules(50) == rules  # seeded
+
+    engine = ESEngine()
+    engine.set_rules(rules)
+    readings = [MachineData(machine_id=columns["machine_id"][i], timestamp=columns["timestamp"][i],
+                            temperature=columns["temperature"][i], vibration=columns["vibration"][i],
+                            power=columns["power"][i]) for i in range(300)]
+    expected = sorted((d.machine_id, d.condition) for d in reference_loop(rules, readings))
+    assert expected
+    assert sorted((d.machine_id, d.condition) for d in engine.diagnose_batch(columns)) == expected
+
+def test_distinct_timestamp_batch():
+    simulator = Simulator(num_machines=7, seed=1)
+    batch = distinct_timestamp_batch(simulator, datetime(2026, 1, 1), rows=50)
+    assert all(len(v) == 50 for v in batch.values())
+    assert len(set(batch["timestamp"])) == 50
+    assert set(batch["machine_id"]) == set(simulator.generate_columns([datetime(2026, 1, 1)])["machine_id"])
+
+async def echo_app(scope, receive, send):
+    message = await receive()
+    status = 404 if scope["path"] == "/missing" else 200
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": scope["method"].encode() + message["body"]})
+
+def test_in_process_client():
+    assert asyncio.run(call(echo_app, "POST", "/echo?x=1", {"a": 1})) == (200, b'POST{"a": 1}')
+
+    result = asyncio.run(run_endpoint(echo_app, "GET", "/missing", None, concurrency=2, duration=5, max_requests=10))
+    assert result["count"] >= 10 and result["errors"] == result["count"]
+    assert result["endpoint"] == "GET /missing" and result["response_bytes"] == 3
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend import columnar
+from backend.columnar import FleetColumns, MachineIndex, STATUS_NAMES, status_code
+from backend.encoding import frame_table
+
+T0 = datetime(2026, 1, 1, 12)
+
+def fleet():
+    return FleetColumns.from_tuples([
+        ("M-001", T0.isoformat(), 70.12, 50.5, 10.0, "running"),
+        ("M-002", T0.isoformat(), 99.99, 91.25, 14.33, "fault"),
+    ])
+
+def test_round_trip_to_dicts_and_models():
+    frame = fleet()
+    assert frame.to_dicts() == [
+        {"machine_id": "M-001", "timestamp": T0, "temperature": 70.12, "vibration": 50.5, "power": 10.0, "status": "running"},
+        {"machine_id": "M-002", "timestamp": T0, "temperature": 99.99, "vibration": 91.25, "power": 14.33, "status": "fault"},
+    ]
+    assert frame.to_models(slice(1, 2))[0].temperature == 99.99
+    assert frame.temperature.dtype == np.float32
+
+def test_values_are_reported_to_two_decimals():
+    # The documented precision contract: float32 storage, 2 decimals out
+    frame = FleetColumns.from_tuples([("M-001", T0.isoformat(), 70.123456, 1.005, 2.0, "running")])
+    assert frame.to_dicts()[0]["temperature"] == 70.12
+    assert frame_table(frame).rows()[0]["temperature"] == 70.12
+
+def test_row_access_and_take():
+    frame = fleet()
+    assert frame.find("M-002") == 1 and frame.find("M-404") is None
+    assert frame.row(1).status == "fault"
+    assert frame["power"] is frame.power
+    assert frame.take(np.array([1])).machine_id.tolist() == ["M-002"]
+    assert len(FleetColumns.empty()) == 0 and FleetColumns.from_tuples([]).to_dicts() == []
+
+def test_machine_index_lookup_and_find():
+    index = MachineIndex()
+    assert index.lookup(["B", "A", "B"]).tolist() == [0, 1, 0]
+    assert index.find(["A", "C"]).tolist() == [1, -1]
+    assert len(index) == 2  # find never adds machines
+    assert index.lookup(["C"]).tolist() == [2]
+
+def test_status_codes_are_capped(monkeypatch):
+    assert STATUS_NAMES[status_code("fault")] == "fault"
+    monkeypatch.setattr(columnar, "STATUS_NAMES", list(range(columnar.MAX_STATUSES)))
+    with pytest.raises(ValueError, match="Too many"):
+        status_code("never-seen-status")
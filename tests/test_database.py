@@ -0,0 +1,106 @@
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.database import bucket_key
+
+def batch(rows):
+    """Column arrays from (machine_id, timestamp, temperature, vibration, power) tuples"""
+    ids, ts, temp, vib, power = zip(*rows)
+    return {
+        "machine_id": np.array(ids, dtype=object),
+        "timestamp": np.array([t.isoformat() for t in ts], dtype=object),
+        "temperature": np.array(temp, dtype=np.float64),
+        "vibration": np.array(vib, dtype=np.float64),
+        "power": np.array(power, dtype=np.float64),
+        "status": np.full(len(ids), "running", dtype=object),
+    }
+
+def test_latest_keeps_newest_reading(database):
+    now = datetime.now().replace(microsecond=0)
+    # One batch with two ticks: only each machine's newer reading is its latest state
+    database.insert_columns(batch([("A", now - timedelta(seconds=20), 70, 50, 10),
+                                   ("B", now - timedelta(seconds=20), 71, 51, 11),
+                                   ("A", now - timedelta(seconds=10), 72, 52, 12)]))
+    # A late reading for A must not overwrite its newer state
+    database.insert_columns(batch([("A", now - timedelta(seconds=30), 99, 99, 99)]))
+
+    latest = {r["machine_id"]: r for r in database.get_latest_readings()}
+    assert latest["A"]["temperature"] == 72
+    assert latest["A"]["timestamp"] == (now - timedelta(seconds=10)).isoformat()
+    assert latest["B"]["temperature"] == 71
+
+    frame = database.get_latest_columns()
+    assert frame.machine_id.tolist() == ["A", "B"]
+    assert frame.temperature.tolist() == [72, 71]
+
+def test_latest_leaves_out_stale_machines(database):
+    now = datetime.now()
+    database.insert_columns(batch([("A", now, 70, 50, 10), ("B", now - timedelta(minutes=5), 70, 50, 10)]))
+
+    assert [r["machine_id"] for r in database.get_latest_readings()] == ["A"]
+    assert [r["machine_id"] for r in database.get_latest_readings(max_age=timedelta(minutes=10))] == ["A", "B"]
+    assert database.machine_exists("B") and not database.machine_exists("C")
+
+def test_rollups_merge_batches(database):
+    minute = (datetime.now() - timedelta(minutes=10)).replace(second=0, microsecond=0)
+    readings = [("A", minute + timedelta(seconds=5), 70, 50, 10), ("B", minute + timedelta(seconds=5), 80, 40, 12),
+                ("A", minute + timedelta(seconds=35), 90, 60, 14), ("A", minute + timedelta(seconds=65), 60, 30, 8)]
+    # The first minute's bucket is written by two batches and must merge, not overwrite
+    database.insert_columns(batch(readings[:2]))
+    database.insert_columns(batch(readings[2:]))
+
+    rows = database.get_connection().execute(
+        "SELECT * FROM readings_rollup_1m ORDER BY bucket").fetchall()
+    first, second = (dict(r) for r in rows)
+    assert first["bucket"] == minute.isoformat()
+    assert first["count"] == 3
+    assert first["temperature_sum"] == 240 and first["temperature_min"] == 70 and first["temperature_max"] == 90
+    assert second["count"] == 1
+
+    history = database.get_history("60m")
+    assert [h["timestamp"] for h in history] == [minute.isoformat(), (minute + timedelta(minutes=1)).isoformat()]
+    assert history[0]["temperature"] == 80 and history[0]["power"] == 12
+
+    hours = sorted({bucket_key(r[1].isoformat(), "1h") for r in readings})
+    assert [h["timestamp"] for h in database.get_history("24h")] == hours
+    assert sum(r["count"] for r in database.get_connection().execute("SELECT count FROM readings_rollup_1h")) == 4
+
+def test_current_history_reads_raw_rows(database):
+    now = datetime.now().replace(microsecond=0)
+    database.insert_columns(batch([("A", now - timedelta(seconds=30), 70, 50, 10),
+                                   ("A", now - timedelta(minutes=5), 71, 51, 11)]))
+    assert [h["temperature"] for h in database.get_history("current")] == [70]
+
+def test_connections_are_wal_and_per_thread(database):
+    conn = database.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert database.get_connection() is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(database.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+def test_writer_runs_jobs_in_order_and_rolls_back_failures(database):
+    database.writer.execute(lambda cursor: cursor.execute("CREATE TABLE t (v INTEGER)"))
+    futures = [database.writer.submit(lambda cursor, v: cursor.execute("INSERT INTO t VALUES (?)", (v,)), v)
+               for v in range(20)]
+    for future in futures:
+        future.result()
+
+    def failing(cursor):
+        cursor.execute("INSERT INTO t VALUES (99)")
+        raise RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        database.writer.execute(failing)
+
+    rows = database.get_connection().execute("SELECT v FROM t ORDER BY rowid").fetchall()
+    assert [r[0] for r in rows] == list(range(20))
+
+def test_nested_write_job_is_refused(database):
+    with pytest.raises(RuntimeError, match="Nested"):
+        database.writer.execute(lambda cursor: database.writer.execute(lambda c: None))
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from backend.downsample import downsample, lttb, minmax
+
+def reference_lttb(x, y, points):
+    """Textbook LTTB, one bucket at a time in Python"""
+    n = len(y)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    selected, a = [0], 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < points - 1:
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = np.mean(x[nlo:nhi]), np.mean(y[nlo:nhi])
+        else:
+            cx, cy = x[-1], y[-1]
+        areas = [abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        selected.append(a)
+    return selected + [n - 1]
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000, dtype=np.float64)
+    y = np.cumsum(rng.normal(0, 1, 1000))
+    assert lttb(x, y, 50).tolist() == reference_lttb(x, y, 50)
+
+def test_lttb_keeps_ends_and_spikes():
+    x = np.arange(0, 10_000, dtype="datetime64[s]")
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    keep = lttb(x, y, 100)
+
+    assert len(keep) == 100 and keep[0] == 0 and keep[-1] == 9999
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep
+
+def test_short_series_are_returned_whole():
+    assert lttb(np.arange(5), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+    assert minmax(np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb(np.array([]), np.array([]), 10).tolist() == []
+    with pytest.raises(ValueError):
+        lttb(np.arange(10), np.arange(10.0), 2)
+
+def test_minmax_keeps_extremes_in_time_order():
+    rng = np.random.default_rng(1)
+    y = rng.normal(0, 1, 5000)
+    y[100], y[4000] = -50.0, 50.0
+    keep = minmax(y, 100)
+
+    assert len(keep) <= 100 and np.all(np.diff(keep) > 0)
+    assert {100, 4000} <= set(keep.tolist())
+
+def test_minmax_with_ties():
+    # A flat series: min and max of each bucket may be the same row, which is kept once
+    keep = minmax(np.full(1000, 3.0), 20)
+    assert len(keep) <= 20 and len(np.unique(keep)) == len(keep)
+
+def test_unknown_method():
+    with pytest.raises(ValueError, match="Unknown downsampling method"):
+        downsample(np.arange(10), np.arange(10.0), 5, "average")
+
+def test_history_endpoint(client):
+    response = client.get("/api/machines/M-001/history", params={"points": 20})
+    body = response.json()
+    assert response.status_code == 200 and body["raw_points"] > 20
+    assert set(body["series"]) == {"temperature", "vibration", "power"}
+    assert all(len(points) <= 20 for points in body["series"].values())
+
+    minmax_body = client.get("/api/machines/M-001/history", params={"points": 20, "method": "minmax",
+                                                                     "signals": "power"}).json()
+    assert list(minmax_body["series"]) == ["power"]
+
+    assert client.get("/api/machines/M-001/history", params={"points": 2}).status_code == 400
+    assert client.get("/api/machines/M-001/history", params={"method": "average"}).status_code == 400
+    assert client.get("/api/machines/M-001/history", params={"signals": "pressure"}).status_code == 400
+    assert client.get("/api/machines/NOPE/history").status_code == 404
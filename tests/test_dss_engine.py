@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.columnar import machine_index, occurrence_groups
+from backend.dss_engine import DSSEngine
+
+T0 = datetime(2026, 1, 1)
+
+def readings(machine_ids, minutes, temperature, vibration=50.0, power=10.0):
+    n = len(machine_ids)
+    return {
+        "machine_id": np.array(machine_ids, dtype=object),
+        "timestamp": np.array([(T0 + timedelta(minutes=float(m))).isoformat() for m in minutes], dtype=object),
+        "temperature": np.broadcast_to(np.asarray(temperature, dtype=np.float64), (n,)),
+        "vibration": np.full(n, vibration),
+        "power": np.full(n, power),
+    }
+
+def test_step_change_is_flagged_as_drift():
+    engine = DSSEngine()
+    rng = np.random.default_rng(0)
+    minutes = np.arange(80)
+    noise = rng.normal(0, 0.5, 80)
+    engine.observe(readings(["DSS-steady"] * 80, minutes, 70 + noise))
+    engine.observe(readings(["DSS-step"] * 80, minutes, np.where(minutes < 50, 70.0, 78.0) + noise))
+
+    drift = engine.detect_drift("temperature")
+    assert [d["machine_id"] for d in drift] == ["DSS-step"]
+    assert drift[0]["direction"] == "up" and drift[0]["level"] > drift[0]["baseline"]
+    assert engine.trend_summary()["drifting"] == 1
+
+def test_slope_of_a_ramp():
+    engine = DSSEngine()
+    minutes = np.arange(40)
+    engine.observe(readings(["DSS-ramp"] * 40, minutes, 60 + 0.5 * minutes))
+    row = machine_index.find(["DSS-ramp"])[0]
+    assert engine._slopes(np.array([row]))[0, 0] == pytest.approx(0.5)
+
+def test_late_and_replayed_readings_are_ignored():
+    engine = DSSEngine()
+    engine.observe(readings(["DSS-late"] * 3, [0, 1, 2], [70, 71, 72]))
+    engine.observe(readings(["DSS-late"] * 2, [1, 2], [99, 99]))
+    row = machine_index.find(["DSS-late"])[0]
+    assert engine.count[row] == 3
+    assert engine.fast[row, 0] < 80
+
+def test_shuffled_batch_matches_sequential_readings():
+    ids = [f"DSS-{i % 7}" for i in range(210)]
+    minutes = np.arange(210) / 7
+    temperature = np.random.default_rng(1).normal(70, 5, 210)
+    order = np.random.default_rng(2).permutation(210)
+
+    batched, sequential = DSSEngine(), DSSEngine()
+    shuffled = readings(ids, minutes, temperature)
+    batched.observe({k: v[order] for k, v in shuffled.items()})
+    for i in range(210):
+        sequential.observe(readings([ids[i]], [minutes[i]], temperature[i]))
+
+    rows = machine_index.find(sorted(set(ids)))
+    for name in ("count", "fast", "slow", "var", "cusum_hi", "s_ty"):
+        assert np.allclose(getattr(batched, name)[rows], getattr(sequential, name)[rows]), name
+
+def test_occurrence_groups_with_timestamp_ties():
+    idx = np.array([2, 0, 2, 1, 0, 2])
+    t = np.array([5.0, 1.0, 5.0, 3.0, 0.0, 4.0])
+    groups = occurrence_groups(idx, t)
+
+    assert [sorted(idx[g].tolist()) for g in groups] == [[0, 1, 2], [0, 2], [2]]
+    # Each machine's readings come out oldest first, one per group
+    assert [t[g][idx[g] == 0].tolist() for g in groups[:2]] == [[0.0], [1.0]]
+    assert [t[g][idx[g] == 2].tolist() for g in groups] == [[4.0], [5.0], [5.0]]
+    # One reading per machine: a single group
+    assert len(occurrence_groups(np.array([3, 1, 2]), np.zeros(3))) == 1
+    assert occurrence_groups(np.array([], dtype=np.int32), np.array([]))[0].size == 0
+
+def test_empty_state():
+    assert DSSEngine().trend_summary() == {"avg_temp": None, "avg_vib": None, "power_draw": 0.0,
+                                           "bottlenecks": [], "drifting": 0}
+
+def test_bottlenecks_and_baseline():
+    engine = DSSEngine()
+    engine.observe(readings(["DSS-busy"] * 10, np.arange(10), 70.0, power=16.0))
+    engine.observe(readings(["DSS-idle"] * 10, np.arange(10), 70.0, power=8.0))
+    assert "DSS-busy" in engine.trend_summary()["bottlenecks"]
+
+    ids, mean, std = engine.baseline(["DSS-idle"])
+    assert ids == ["DSS-idle"] and mean.shape == (1, 3) and (std > 0).all()
+
+    size = len(machine_index)
+    with pytest.raises(LookupError, match="DSS-unknown"):
+        engine.baseline(["DSS-idle", "DSS-unknown"])
+    assert len(machine_index) == size
@@ -0,0 +1,103 @@
+import gzip
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.encoding import COMPRESS_MIN_BYTES, NotAcceptable, Table, content_coding, encode, negotiate
+
+TABLE = Table({
+    "machine_id": np.array(["M-1", "M-2"], dtype=object),
+    "timestamp": np.array(["2026-01-01T10:00:00", "2026-01-01T10:00:01"], dtype="datetime64[us]"),
+    "temperature": np.array([70.5, 71.25]),
+})
+
+@pytest.mark.parametrize("format, accept, expected", [
+    (None, None, "json"),
+    (None, "*/*", "json"),
+    ("columnar", "application/json", "columnar"),
+    (None, "application/json;q=0.5, application/vnd.smartfactory.columnar+json", "columnar"),
+    (None, "application/vnd.smartfactory.columnar+json;q=0, application/json;q=0.1", "json"),
+    (None, "application/x-msgpack", "msgpack"),
+    (None, "application/vnd.smartfactory.columnar+json;q=0", "json"),
+])
+def test_negotiate(format, accept, expected):
+    assert negotiate(format, accept) == expected
+
+@pytest.mark.parametrize("format, accept", [("xml", None), (None, "application/json;q=0")])
+def test_negotiate_not_acceptable(format, accept):
+    with pytest.raises(NotAcceptable):
+        negotiate(format, accept)
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, GZIP;q=0.5", "gzip"),
+    ("identity", None),
+])
+def test_content_coding(accept_encoding, expected):
+    assert content_coding(accept_encoding) == expected
+
+def test_row_and_columnar_json():
+    assert json.loads(encode(TABLE, "json").body) == [
+        {"machine_id": "M-1", "timestamp": "2026-01-01T10:00:00", "temperature": 70.5},
+        {"machine_id": "M-2", "timestamp": "2026-01-01T10:00:01", "temperature": 71.25},
+    ]
+    columnar = encode(TABLE, "columnar")
+    assert json.loads(columnar.body)["temperature"] == [70.5, 71.25]
+    assert columnar.headers["Content-Type"] == "application/vnd.smartfactory.columnar+json"
+
+def test_table_conversions():
+    table = Table.from_rows([{"a": 1, "t": datetime(2026, 1, 1)}, {"a": 2, "t": datetime(2026, 1, 2)}])
+    assert len(table) == 2 and table.lists()["t"] == ["2026-01-01T00:00:00", "2026-01-02T00:00:00"]
+    assert TABLE.lists()["timestamp"][0] == "2026-01-01T10:00:00.000000"
+    assert table.rows()[1] == {"a": 2, "t": datetime(2026, 1, 2)}
+
+def test_only_large_bodies_are_compressed():
+    small = encode(TABLE, "json", "gzip")
+    assert "Content-Encoding" not in small.headers
+
+    big = Table({"machine_id": [f"M-{i:05d}" for i in range(COMPRESS_MIN_BYTES)]})
+    encoded = encode(big, "json", "gzip")
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(encoded.body))[0] == {"machine_id": "M-00000"}
+    assert encoded.headers["Vary"] == "Accept, Accept-Encoding"
+
+def test_machines_endpoint_formats(client):
+    rows = client.get("/api/machines", params={"limit": 3}).json()
+    columns = client.get("/api/machines", params={"limit": 3, "format": "columnar"}).json()
+    assert [r["machine_id"] for r in rows] == columns["machine_id"]
+    assert [r["temperature"] for r in rows] == columns["temperature"]
+
+    by_accept = client.get("/api/machines", params={"limit": 3},
+                           headers={"Accept": "application/vnd.smartfactory.columnar+json"})
+    assert by_accept.headers["content-type"] == "application/vnd.smartfactory.columnar+json"
+    assert client.get("/api/machines", params={"format": "xml"}).status_code == 406
+    assert client.get("/api/machines", headers={"Accept": "application/json;q=0"}).status_code == 406
+
+def test_each_representation_has_its_own_etag(client):
+    # The tick can advance between requests; retry until all three reads see the same snapshot
+    for _ in range(5):
+        plain = client.get("/api/machines", params={"limit": 500}, headers={"Accept-Encoding": "identity"})
+        zipped = client.get("/api/machines", params={"limit": 500}, headers={"Accept-Encoding": "gzip"})
+        columnar = client.get("/api/machines", params={"limit": 500, "format": "columnar"},
+                              headers={"Accept-Encoding": "identity"})
+        tags = [r.headers["etag"] for r in (plain, zipped, columnar)]
+        if len({t.rsplit("-", 2)[0] for t in tags}) == 1:
+            break
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert len(set(tags)) == 3
+    assert all({"Accept", "Accept-Encoding"} <= {v.strip() for v in r.headers["vary"].split(",")}
+               for r in (plain, zipped, columnar))
+
+    # A tag only validates the representation it was issued for
+    again = client.get("/api/machines", params={"limit": 500},
+                       headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]})
+    assert again.status_code == 200
+
+    cached = client.get("/api/machines", params={"limit": 500},
+                        headers={"Accept-Encoding": "identity", "If-None-Match": f'W/{plain.headers["etag"]}, "x"'})
+    assert cached.status_code == 304 and cached.headers["etag"] == plain.headers["etag"]
+    assert client.get("/api/machines", headers={"If-None-Match": "*"}).status_code == 304
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import numpy as np
+
+from backend.columnar import FleetColumns
+from backend.es_engine import ESEngine, columns_from_readings
+from backend.models import MachineData
+from benchmarks.es_scaling import make_rules, reference_loop
+
+def readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime(2026, 1, 1, 12)
+    return [MachineData(machine_id=f"M-{i:03d}", timestamp=now, temperature=round(float(t), 2),
+                        vibration=round(float(v), 2), power=round(float(p), 2))
+            for i, (t, v, p) in enumerate(zip(rng.normal(85, 15, n), rng.normal(80, 30, n), rng.normal(13, 3, n)))]
+
+def test_batch_matches_per_reading_loop():
+    rules = make_rules(50)
+    engine = ESEngine()
+    engine.set_rules(rules)
+    fleet = readings(400)
+
+    expected = reference_loop(rules, fleet)
+    assert expected, "fixture should fire some rules"
+    assert engine.diagnose_all(fleet) == expected
+
+def test_single_reading_and_empty_fleet():
+    engine = ESEngine()
+    engine.set_rules([{"when": [("vibration", ">", 90)], "diagnosis": "Shake", "action": "Check",
+                       "reasoning": "", "confidence": 0.9}])
+    hot, calm = readings(2)
+    hot = hot.model_copy(update={"vibration": 95.0})
+    calm = calm.model_copy(update={"vibration": 10.0})
+
+    assert [d.condition for d in engine.diagnose(hot)] == ["Shake"]
+    assert engine.diagnose(calm) == []
+    assert engine.diagnose_all([]) == []
+    assert engine.diagnose_frame(FleetColumns.empty()) == []
+
+def test_float32_snapshot_compares_at_threshold():
+    # 80.1 is not exactly representable: a float32 column must still not exceed a threshold of 80.1
+    engine = ESEngine()
+    engine.set_rules([{"when": [("temperature", ">", 80.1)], "diagnosis": "Hot", "action": "",
+                       "reasoning": "", "confidence": 1.0}])
+    columns = columns_from_readings(readings(3))
+    columns["temperature"] = np.array([80.1, 80.11, 80.09], dtype=np.float32)
+
+    assert [d.machine_id for d in engine.diagnose_batch(columns)] == ["M-001"]
@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+
+from backend.ingest import IngestLoop
+from backend.simulator import Simulator
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def tick(value):
+    return {"machine_id": np.array(["A"], dtype=object), "timestamp": np.array([f"2026-01-01T00:00:{value:02d}"], dtype=object),
+            "temperature": np.array([value]), "vibration": np.array([0.0]), "power": np.array([0.0])}
+
+def test_full_queue_drops_oldest_tick():
+    loop = IngestLoop(database=None, max_queue=2)
+    for value in range(3):
+        loop._offer(tick(value))
+
+    assert loop.ticks_produced == 3 and loop.ticks_dropped == 1
+    assert [loop.queue.get_nowait()["temperature"][0] for _ in range(2)] == [1, 2]
+
+def test_loop_writes_ticks_in_batches(database):
+    loop = IngestLoop(source=Simulator(num_machines=20, seed=1), database=database, interval=3600)
+    loop.start()
+    try:
+        wait_for(lambda: loop.ticks_written >= 1)
+        loop.request_tick()
+        wait_for(lambda: loop.ticks_written >= 2)
+    finally:
+        loop.stop()
+
+    assert not loop.running
+    assert loop.stats()["ticks_written"] == loop.ticks_produced
+    assert len(database.get_latest_readings()) == 20
+
+def test_failed_write_is_counted_not_raised():
+    class Broken:
+        def insert_columns(self, columns):
+            raise OSError("disk full")
+
+    loop = IngestLoop(database=Broken())
+    loop._write([tick(0), tick(1)])
+    assert loop.write_errors == 1 and loop.ticks_written == 0
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from backend.metrics import Registry, MetricsMiddleware, Sampler, timed
+
+def test_counter_and_gauge_render():
+    registry = Registry(enabled=True)
+    hits = registry.counter("sf_test_hits_total", "Test hits", ["kind"])
+    hits.inc(kind="a")
+    hits.inc(2, kind="a")
+    hits.inc(kind='say "hi"')
+    registry.gauge("sf_test_depth", "Depth", lambda: 3)
+    registry.gauge("sf_test_by_state", "By state", lambda: [({"state": "ok"}, 1), ({"state": "down"}, None)])
+
+    assert registry.render().splitlines() == [
+        "# HELP sf_test_hits_total Test hits",
+        "# TYPE sf_test_hits_total counter",
+        'sf_test_hits_total{kind="a"} 3',
+        'sf_test_hits_total{kind="say \\"hi\\""} 1',
+        "# HELP sf_test_depth Depth",
+        "# TYPE sf_test_depth gauge",
+        "sf_test_depth 3",
+        "# HELP sf_test_by_state By state",
+        "# TYPE sf_test_by_state gauge",
+        'sf_test_by_state{state="ok"} 1',
+    ]
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry(enabled=True)
+    latency = registry.histogram("sf_test_seconds", "Latency", ["op"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, op="read")
+
+    assert latency.render()[2:] == [
+        'sf_test_seconds_bucket{op="read",le="0.1"} 2',
+        'sf_test_seconds_bucket{op="read",le="1.0"} 3',
+        'sf_test_seconds_bucket{op="read",le="+Inf"} 4',
+        'sf_test_seconds_sum{op="read"} 3.65',
+        'sf_test_seconds_count{op="read"} 4',
+    ]
+
+def test_failing_gauge_does_not_break_the_scrape():
+    registry = Registry(enabled=True)
+    registry.gauge("sf_test_broken", "Broken", lambda: 1 / 0)
+    registry.counter("sf_test_total", "Total").inc()
+    assert registry.render().splitlines()[-1] == "sf_test_total 1"
+
+def test_timed_records_latency_and_rows():
+    registry = Registry(enabled=True)
+    latency = registry.histogram("sf_test_query_seconds", "Latency", ["query"])
+    rows = registry.counter("sf_test_rows_total", "Rows", ["query"])
+
+    @timed(latency, rows)
+    def load_rows():
+        return {"machine_id": [1, 2, 3]}
+
+    assert load_rows() == {"machine_id": [1, 2, 3]} and load_rows.__name__ == "load_rows"
+    load_rows()
+    assert 'sf_test_query_seconds_count{query="load_rows"} 2' in latency.render()
+    assert rows.render()[-1] == 'sf_test_rows_total{query="load_rows"} 6'
+
+def test_disabled_registry_records_nothing():
+    registry = Registry(enabled=False)
+    latency = registry.histogram("sf_test_seconds", "Latency", ["op"])
+    fn = lambda: 1
+    assert timed(latency)(fn) is fn
+
+    latency.observe(1.0, op="read")
+    registry.counter("sf_test_total", "Total").inc()
+    assert "sf_test_seconds_count" not in registry.render()
+    assert "sf_test_total 1" not in registry.render()
+
+def test_sampler_collects_collapsed_stacks():
+    sampler = Sampler(interval=0.001).start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    stacks = sampler.stop()
+    assert sampler.samples > 0
+    assert "test_sampler_collects_collapsed_stacks" in stacks
+
+def test_middleware_labels_requests_by_route():
+    registry = Registry(enabled=True)
+    latency = registry.histogram("sf_test_http_seconds", "HTTP", ["method", "route", "status"])
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/x", "query_string": b""}
+    asyncio.run(MetricsMiddleware(app, histogram=latency, profiling=False)(scope, None, send))
+    assert 'sf_test_http_seconds_count{method="GET",route="unmatched",status="204"} 1' in latency.render()
+
+def test_metrics_endpoint(client):
+    client.get("/api/machines/M-001/history", params={"points": 20})
+    response = client.get("/api/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert "# TYPE sf_http_request_seconds histogram" in text
+    assert 'route="/api/machines/{machine_id}/history"' in text
+    assert "M-001" not in text  # labelled by path template, not by the concrete path
+    assert "sf_db_partitions" in text
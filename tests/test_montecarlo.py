@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend.montecarlo import PARAMETERS, run_scenarios, validate_changes
+
+IDS = ["MC-1", "MC-2", "MC-3"]
+MEAN = np.array([[70.0, 50.0, 10.0], [75.0, 85.0, 12.0], [60.0, 40.0, 8.0]])
+STD = np.array([[2.0, 5.0, 1.0]] * 3)
+RULES = [{"when": [("vibration", ">", 90)]}]
+
+def test_validate_changes():
+    assert validate_changes({"speed": 120, "ambient_temperature": -5}) == {"speed": 120.0, "ambient_temperature": -5.0}
+    assert validate_changes({}) == {}
+
+@pytest.mark.parametrize("changes", [
+    {"pressure": 1},
+    {"speed": -5},
+    {"speed": 0},
+    {"capacity": float("nan")},
+    {"capacity": float("inf")},
+    {"capacity": 1e9},
+    {"ambient_temperature": -100},
+])
+def test_invalid_changes(changes):
+    with pytest.raises(ValueError):
+        validate_changes(changes)
+
+def test_nominal_scenario_changes_nothing():
+    (result,) = run_scenarios(IDS, MEAN, STD, [dict(PARAMETERS)], RULES, samples=500, seed=1)
+    assert result["samples"] == 500 and result["machines"] == 3
+    assert result["energy_impact_kw"]["p50"] == 0
+    assert result["output_pct"]["p50"] <= 100
+
+def test_scenarios_move_energy_and_risk_in_the_right_direction():
+    base, faster, busier = run_scenarios(IDS, MEAN, STD, [{}, {"speed": 130}, {"capacity": 90}], RULES, samples=500, seed=1)
+    assert faster["energy_impact_kw"]["mean"] > 0 and busier["energy_impact_kw"]["mean"] > 0
+    assert faster["fault_probability"] > base["fault_probability"]
+    assert faster["at_risk"][0]["machine_id"] == "MC-2"
+
+def test_seeded_runs_repeat_with_or_without_executor():
+    first = run_scenarios(IDS, MEAN, STD, [{"speed": 110}], RULES, samples=400, seed=7, parts=3)
+    with ThreadPoolExecutor(2) as pool:
+        second = run_scenarios(IDS, MEAN, STD, [{"speed": 110}], RULES, samples=400, seed=7, executor=pool, parts=3)
+    assert first == second and first[0]["samples"] == 400
+
+def test_simulate_endpoint_rejects_invalid_values(client):
+    body = {"machine_id": "M-001", "parameter": "speed", "value": -5}
+    response = client.post("/api/dss/simulate", json=body)
+    assert response.status_code == 400 and "speed" in response.json()["detail"]
+
+    response = client.post("/api/dss/simulate", json={**body, "value": 120})
+    assert response.status_code == 200 and response.json()["energy_impact"] is not None
+
+def test_scenario_endpoints_validate_requests(client):
+    assert client.post("/api/dss/scenario", json={"changes": {"capacity": 0}, "samples": 10}).status_code == 400
+    assert client.post("/api/dss/scenario", json={"changes": {"speed": 110}, "machine_ids": ["M-404x"]}).status_code == 404
+    assert client.post("/api/dss/scenario/sweep", json={"scenarios": []}).status_code == 400
+    too_many = {"scenarios": [{"speed": 100}] * 51, "samples": 10}
+    assert client.post("/api/dss/scenario/sweep", json=too_many).status_code == 422
+
+    response = client.post("/api/dss/scenario", json={"changes": {"speed": 110}, "sector": "Sector 1", "samples": 50, "seed": 1})
+    assert response.status_code == 200 and response.json()["machines"] == 50
@@ -0,0 +1,60 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from backend.database import Database
+from backend.retention import RetentionWorker
+from tests.test_database import batch
+
+NOW = datetime.now().replace(second=0, microsecond=0)
+OLD = (NOW - timedelta(days=5)).replace(hour=10, minute=15)
+
+def test_readings_are_partitioned_by_day(database):
+    database.insert_columns(batch([("A", OLD, 70, 50, 10), ("A", NOW, 71, 51, 11)]))
+    days = [OLD.strftime("%Y%m%d"), NOW.strftime("%Y%m%d")]
+
+    assert [t[-8:] for t in database.partitions()] == days
+    assert [t[-8:] for t in database.partitions(start=NOW - timedelta(hours=1))] == days[1:]
+    assert database.list_partitions() == database.partitions()
+    assert database.get_last_timestamp() == NOW
+
+def test_expired_partitions_are_downsampled(database):
+    database.insert_columns(batch([("A", OLD, 70, 50, 10), ("A", OLD + timedelta(seconds=30), 80, 60, 12),
+                                   ("A", OLD + timedelta(minutes=1), 90, 70, 14), ("A", NOW, 71, 51, 11)]))
+    worker = RetentionWorker(database=database, raw_retention=timedelta(hours=48), rollup_retention=timedelta(days=30))
+
+    result = worker.run_once(NOW)
+    assert [t[-8:] for t in result["downsampled"]] == [OLD.strftime("%Y%m%d")]
+    assert [t[-8:] for t in database.list_partitions()] == [NOW.strftime("%Y%m%d")]
+
+    # Old readings are still served, as per-minute averages from the rollup
+    history = database.get_machine_history("A", OLD - timedelta(hours=1), NOW + timedelta(minutes=1))
+    assert history["temperature"].tolist() == [75, 90, 71]
+    assert history["timestamp"][0] == OLD
+
+    assert worker.run_once(NOW)["downsampled"] == []
+
+def test_rollups_past_retention_are_pruned(database):
+    database.insert_columns(batch([("A", OLD, 70, 50, 10), ("A", NOW, 71, 51, 11)]))
+    worker = RetentionWorker(database=database, raw_retention=timedelta(hours=48), rollup_retention=timedelta(days=2))
+
+    result = worker.run_once(NOW)
+    assert result["rollup_rows_pruned"] > 0
+    assert database.get_machine_history("A", OLD - timedelta(hours=1), NOW + timedelta(minutes=1))["temperature"].tolist() == [71]
+    assert worker.stats()["passes"] == 1
+
+def test_legacy_readings_table_is_migrated(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE machine_readings (machine_id TEXT, timestamp DATETIME, temperature REAL, "
+                 "vibration REAL, power REAL, status TEXT)")
+    conn.execute("INSERT INTO machine_readings VALUES ('A', ?, 70, 50, 10, 'running')", (OLD.isoformat(),))
+    conn.commit()
+    conn.close()
+
+    database = Database(path)
+    database.init_db()
+    try:
+        assert [t[-8:] for t in database.partitions()] == [OLD.strftime("%Y%m%d")]
+        assert database.get_last_timestamp() == OLD
+    finally:
+        database.close()
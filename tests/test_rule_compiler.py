@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend.es_engine import ESEngine
+from backend.rule_compiler import RuleError, compile_rules, parse_condition
+
+COLUMNS = {
+    "machine_id": np.array(["M-1", "M-2", "M-3", "M-4"], dtype=object),
+    "temperature": np.array([90.0, 90.0, 60.0, 60.0]),
+    "vibration": np.array([95.0, 40.0, 95.0, 40.0]),
+    "power": np.array([10.0, 10.0, 10.0, 20.0]),
+}
+
+def hits(condition, columns=COLUMNS):
+    (mask,) = compile_rules([{"when": condition, "diagnosis": "x"}]).evaluate(columns)
+    return mask.tolist()
+
+def test_combinators():
+    hot = {"signal": "temperature", "op": ">", "value": 80}
+    shaking = {"signal": "vibration", "op": ">", "value": 90}
+    assert hits({"all": [hot, shaking]}) == [True, False, False, False]
+    assert hits({"any": [hot, shaking]}) == [True, True, True, False]
+    assert hits({"not": hot}) == [False, False, True, True]
+    assert hits({"all": [{"any": [hot, shaking]}, {"not": {"signal": "power", "op": ">=", "value": 15}}]}) == \
+        [True, True, True, False]
+
+def test_shorthand_forms():
+    # A list means "all"; (signal, op, value) tuples are leaves; JSON strings are parsed
+    assert parse_condition([("temperature", ">", 80), ("vibration", ">", 90)]) == parse_condition(
+        {"all": [{"signal": "temperature", "op": ">", "value": 80}, {"signal": "vibration", "op": ">", "value": 90}]})
+    assert hits(json.dumps({"signal": "power", "op": "==", "value": 20})) == [False, False, False, True]
+
+def test_window_defaults():
+    assert parse_condition({"signal": "power", "op": ">", "value": 1, "for": 3}) == \
+        {"signal": "power", "op": ">", "value": 1.0, "for": 3, "of": 3}
+    assert parse_condition({"rate": "power", "op": ">", "value": 1})["over"] == 1
+
+@pytest.mark.parametrize("condition", [
+    {"signal": "pressure", "op": ">", "value": 1},
+    {"signal": "power", "op": "~", "value": 1},
+    {"all": []},
+    {"all": [("power", ">", 1)], "any": [("power", "<", 1)]},
+    {"signal": "power", "op": ">", "value": 1, "for": 4, "of": 3},
+    {"signal": "power", "op": ">", "value": 1, "for": 2.5},
+    {"signal": "power", "op": ">", "value": 1, "for": 0},
+    {"rate": "power", "op": ">", "value": 1, "over": 33},
+    42,
+])
+def test_invalid_conditions(condition):
+    with pytest.raises(RuleError):
+        parse_condition(condition)
+
+def test_shared_predicates_are_interned():
+    hot = ("temperature", ">", 80)
+    plan = compile_rules([{"when": [hot, ("vibration", ">", 90)]}, {"when": [hot]}, {"when": [("vibration", ">", 90), hot]}])
+    assert plan.predicate_count == 2
+    assert plan.roots[0] == plan.roots[2]
+
+def test_invalid_rules_are_skipped():
+    plan = compile_rules([{"when": {"signal": "pressure", "op": ">", "value": 1}, "diagnosis": "bad"},
+                          {"when": [("power", ">", 15)], "diagnosis": "good"}])
+    assert [r["diagnosis"] for r in plan.rules] == ["good"]
+
+def test_rules_reload_when_table_changes(database):
+    engine = ESEngine(source=database)
+    engine.load_rules()
+    before = len(engine.rules)
+    assert before and all("when" in r for r in engine.rules)
+
+    database.writer.execute(lambda cursor: cursor.execute(
+        "INSERT INTO fault_rules (diagnosis, action, confidence, severity, conditions) VALUES (?, ?, ?, ?, ?)",
+        ("Overload", "Reduce load", 0.9, "Medium", json.dumps({"signal": "power", "op": ">", "value": 15}))))
+    engine._last_check = 0.0  # skip the reload interval
+    engine.refresh()
+
+    assert len(engine.rules) == before + 1
+    assert engine.rules[-1]["diagnosis"] == "Overload"
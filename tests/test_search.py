@@ -0,0 +1,39 @@
+import pytest
+
+from backend.search import RuleSearch
+
+@pytest.fixture
+def search(database):
+    if not database.fts_enabled:
+        pytest.skip("SQLite built without FTS5")
+    return RuleSearch(database=database, max_entries=2)
+
+def test_every_word_matches_as_a_prefix(search):
+    results = search.search("overheat")
+    assert results[0]["diagnosis"] == "Motor Overheating"
+
+    # Every word must match, in any column (here: action and keywords)
+    assert [r["diagnosis"] for r in search.search("bearing grinding")] == ["Bearing Seizure"]
+    assert [r["diagnosis"] for r in search.search("coolant pump")] == ["Coolant System Degradation"]
+    assert len(search.search("misalign")) == 2
+    assert search.search("  ") == []
+    assert len(search.search("a", limit=3)) <= 3
+
+def test_punctuation_does_not_break_the_query(search):
+    assert search.search('pump" OR (') is not None
+    assert search.search("power-supply")[0]["diagnosis"] == "Voltage Instability"
+
+def test_cache_is_lru_and_invalidated_by_rule_edits(search, database):
+    search.search("Bearing")
+    search.search("bearing ")  # same normalized query
+    assert (search.hits, search.misses) == (1, 1)
+
+    search.search("pump")
+    search.search("motor")  # evicts "bearing"
+    search.search("bearing")
+    assert search.misses == 4
+
+    database.writer.execute(lambda cursor: cursor.execute(
+        "INSERT INTO fault_rules (diagnosis, action) VALUES ('Bearing Cage Crack', 'Replace cage')"))
+    assert "Bearing Cage Crack" in [r["diagnosis"] for r in search.search("bearing")]
+    assert search.misses == 5
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.es_engine import ESEngine
+from backend.rule_compiler import compile_rules
+from backend.sharding import ShardedInference, evaluate_shard
+from backend.shm import SharedArrays
+from backend.temporal import SignalHistory
+from benchmarks.es_scaling import make_columns, make_rules
+from benchmarks.sharding import temporal_rules
+
+MACHINES = 2000
+
+def fleet(seed=0, prefix="S"):
+    columns = make_columns(MACHINES, np.random.default_rng(seed))
+    columns["machine_id"] = np.array([f"{prefix}-{i:05d}" for i in range(MACHINES)], dtype=object)
+    return columns
+
+@pytest.fixture(scope="module")
+def history():
+    history = SignalHistory(shared=True)
+    start = datetime.now() - timedelta(minutes=10)
+    for minute in range(6):
+        tick = fleet(minute)
+        tick["timestamp"] = np.full(MACHINES, start + timedelta(minutes=minute), dtype=object)
+        history.observe(tick)
+    yield history
+    history.close()
+
+@pytest.fixture(scope="module")
+def sharding():
+    sharding = ShardedInference(workers=2, min_machines=1000)
+    yield sharding
+    sharding.close()
+
+def assert_same_masks(actual, expected):
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        assert a.tolist() == b.tolist()
+
+def test_shared_arrays_round_trip():
+    owner = SharedArrays.create({"x": ((4,), np.float64), "row": ((4,), np.int32)})
+    try:
+        owner["x"][:] = [1, 2, 3, 4]
+        view = SharedArrays.attach(owner.descriptor)
+        assert view["x"].tolist() == [1, 2, 3, 4] and view["row"].dtype == np.int32
+        view["row"][0] = 7  # same memory, not a copy
+        assert owner["row"][0] == 7
+        view.close()
+    finally:
+        owner.close()
+
+def test_shard_covers_only_its_rows():
+    rules = make_rules(50)
+    columns = fleet()
+    expected_masks = compile_rules(rules).evaluate(columns)
+    frame = SharedArrays.create({s: ((MACHINES,), np.float64) for s in ("temperature", "vibration", "power")}
+                                | {"row": ((MACHINES,), np.int32)})
+    try:
+        for s in ("temperature", "vibration", "power"):
+            frame[s][:] = columns[s]
+        hits = evaluate_shard("unit", rules, frame.descriptor, None, 500, 1500)
+    finally:
+        frame.close()
+    for hit, mask in zip(hits, expected_masks):
+        assert hit.tolist() == [i for i in np.flatnonzero(mask).tolist() if 500 <= i < 1500]
+
+def test_sharded_threshold_rules_match_in_process(sharding):
+    columns = fleet()
+    local = ESEngine()
+    local.set_rules(make_rules(100))
+    engine = ESEngine(sharding=sharding)
+    engine.set_rules(local.rules)
+
+    before = sharding.sharded_runs
+    assert_same_masks(engine.evaluate_masks(columns), local.evaluate_masks(columns))
+    assert sharding.sharded_runs == before + 1
+    assert {(d.machine_id, d.condition) for d in engine.diagnose_batch(columns)} == \
+        {(d.machine_id, d.condition) for d in local.diagnose_batch(columns)}
+
+def test_sharded_temporal_rules_match_in_process(sharding, history):
+    columns = fleet(5)
+    rules = temporal_rules(50)
+    local = ESEngine(history=history)
+    local.set_rules(rules)
+    engine = ESEngine(history=history, sharding=sharding)
+    engine.set_rules(rules)
+    assert_same_masks(engine.evaluate_masks(columns), local.evaluate_masks(columns))
+
+def test_small_snapshots_stay_in_process(sharding):
+    engine = ESEngine(sharding=sharding)
+    engine.set_rules(make_rules(10))
+    before = sharding.sharded_runs
+    engine.evaluate_masks(make_columns(100, np.random.default_rng(0)))
+    assert sharding.sharded_runs == before
+    assert not ShardedInference(workers=0).should_shard(10 ** 9)
+
+def test_temporal_rules_need_shared_history(sharding):
+    history = SignalHistory()
+    tick = fleet(prefix="U")
+    tick["timestamp"] = np.full(MACHINES, datetime.now(), dtype=object)
+    history.observe(tick)
+    with pytest.raises(ValueError, match="shared=True"):
+        sharding.evaluate(compile_rules(temporal_rules(5)), fleet(prefix="U"), history)
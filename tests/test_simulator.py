@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.simulator import FORCED_CRITICAL, Simulator
+
+def test_columns_are_tick_major():
+    sim = Simulator(num_machines=10, seed=1)
+    t0 = datetime(2026, 1, 1, 12)
+    columns = sim.generate_columns([t0, t0 + timedelta(minutes=1)])
+
+    assert {len(v) for v in columns.values()} == {20}
+    assert columns["machine_id"].tolist() == sim.machines * 2
+    assert columns["timestamp"].tolist() == [t0.isoformat()] * 10 + [(t0 + timedelta(minutes=1)).isoformat()] * 10
+    assert set(columns["status"]) == {"running"}
+    assert np.array_equal(columns["power"], np.round(columns["power"], 2))
+
+def test_seeded_runs_repeat():
+    t0 = datetime(2026, 1, 1)
+    a = Simulator(num_machines=50, seed=7).generate_columns([t0])
+    b = Simulator(num_machines=50, seed=7).generate_columns([t0])
+    assert all(np.array_equal(a[k], b[k]) for k in ("temperature", "vibration", "power"))
+
+def test_forced_critical_machines_run_hot():
+    sim = Simulator(num_machines=500, seed=3)
+    columns = sim.generate_columns([datetime(2026, 1, 1) + timedelta(minutes=m) for m in range(20)])
+    forced = np.isin(columns["machine_id"], FORCED_CRITICAL)
+
+    assert forced.sum() == 20 * len(FORCED_CRITICAL)
+    assert columns["temperature"][forced].mean() > 110
+    assert columns["vibration"][forced].mean() > 120
+    assert columns["temperature"][~forced].mean() < 75
+
+def test_generate_tick_without_persisting():
+    sim = Simulator(num_machines=5, seed=1)
+    rows = sim.generate_tick(datetime(2026, 1, 1), persist=False)
+    assert [r["machine_id"] for r in rows] == sim.machines
+    assert set(rows[0]) == {"machine_id", "timestamp", "temperature", "vibration", "power", "status"}
+    assert isinstance(rows[0]["temperature"], float)
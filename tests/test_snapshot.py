@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from backend.es_engine import ESEngine
+from backend.simulator import Simulator
+from backend.snapshot import SnapshotCache
+
+def make_cache(database):
+    engine = ESEngine(source=database)
+    engine.load_rules()
+    source = SimpleNamespace(get_latest_frame=database.get_latest_columns)
+    return SnapshotCache(database=database, source=source, engine=engine), engine
+
+def test_snapshot_is_rebuilt_once_per_tick(database):
+    sim = Simulator(num_machines=30, seed=1)
+    cache, _ = make_cache(database)
+    database.insert_columns(sim.generate_columns([datetime.now()]))
+
+    first = cache.get()
+    assert cache.get() is first and cache.peek() is first
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert len(first.frame) == 30 and first.overview["total_machines"] == 500
+
+    database.insert_columns(sim.generate_columns([datetime.now()]))
+    assert cache.peek() is None
+    second = cache.get()
+    assert second is not first and second.etag != first.etag
+    assert cache.misses == 2
+
+def test_rule_edit_invalidates_snapshot(database):
+    cache, engine = make_cache(database)
+    first = cache.get()
+    database.writer.execute(lambda cursor: cursor.execute(
+        "INSERT INTO fault_rules (diagnosis, action, conditions) VALUES ('X', 'Y', ?)",
+        (json.dumps({"signal": "power", "op": ">", "value": 1}),)))
+    engine._last_check = 0.0  # skip the reload interval
+
+    assert cache.get() is not first
+
+def test_memo_builds_derived_values_once(database):
+    cache, _ = make_cache(database)
+    snapshot = cache.get()
+    calls = []
+    build = lambda: calls.append(1) or b"body"
+
+    assert snapshot.memo(("machines", "json"), build) == b"body"
+    assert snapshot.memo(("machines", "json"), build) == b"body"
+    assert snapshot.memo(("other",)) is None
+    assert len(calls) == 1
+
+def test_reading_lookup(database):
+    cache, _ = make_cache(database)
+    database.insert_columns(Simulator(num_machines=3, seed=1).generate_columns([datetime.now()]))
+    snapshot = cache.get()
+
+    assert snapshot.reading("M-002").machine_id == "M-002"
+    assert snapshot.reading("M-999") is None
+    assert [r.machine_id for r in snapshot.readings] == ["M-001", "M-002", "M-003"]
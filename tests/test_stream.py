@@ -0,0 +1,84 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend.es_engine import ESEngine
+from backend.simulator import Simulator
+from backend.snapshot import SnapshotCache
+from backend.stream import TelemetryHub, Subscriber
+from tests.test_database import batch
+
+def parse(message):
+    event, data = message.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture
+def hub(database):
+    engine = ESEngine()
+    engine.set_rules([{"when": [("temperature", ">", 100)], "diagnosis": "Hot", "action": "Cool",
+                       "reasoning": "", "confidence": 0.9}])
+    cache = SnapshotCache(database=database, source=SimpleNamespace(get_latest_frame=database.get_latest_columns),
+                          engine=engine)
+    return TelemetryHub(database=database, cache=cache)
+
+def test_new_subscriber_gets_full_snapshot(database, hub, loop):
+    now = datetime.now().replace(microsecond=0)
+    database.insert_columns(Simulator(num_machines=5, seed=1).generate_columns([now - timedelta(seconds=10)]))
+    subscriber = hub.subscribe(loop)
+
+    event, full = parse(hub.full_message())
+    assert event == "snapshot"
+    assert len(full["readings"]) == 5 and full["fleet"]["temperature"] > 0
+
+    # Only M-002 reports again, and now runs hot
+    database.insert_columns(batch([("M-002", now, 120, 50, 10)]))
+    hub.publish()
+
+    # Not yet read by the client: its first read is the full state, not the delta
+    assert subscriber.take() == (True, [])
+
+def test_delta_lists_changed_readings_and_diagnoses(database, hub, loop):
+    now = datetime.now().replace(microsecond=0)
+    database.insert_columns(Simulator(num_machines=5, seed=1).generate_columns([now - timedelta(seconds=10)]))
+    subscriber = hub.subscribe(loop)
+    hub.full_message()
+    subscriber.take()  # the client has received the full snapshot
+
+    database.insert_columns(batch([("M-002", now, 120, 50, 10)]))
+    hub.publish()
+    resync, (message,) = subscriber.take()
+    event, delta = parse(message)
+    assert not resync and event == "delta"
+    assert [r["machine_id"] for r in delta["readings"]] == ["M-002"]
+    assert [(d["machine_id"], d["condition"]) for d in delta["diagnoses_new"]] == [("M-002", "Hot")]
+    assert delta["diagnoses_cleared"] == []
+
+    database.insert_columns(batch([("M-002", now + timedelta(seconds=1), 70, 50, 10)]))
+    hub.publish()
+    _, delta = parse(subscriber.take()[1][0])
+    assert delta["diagnoses_cleared"] == [{"machine_id": "M-002", "condition": "Hot"}]
+
+def test_publish_without_new_tick_sends_nothing(database, hub, loop):
+    subscriber = hub.subscribe(loop)
+    hub.full_message()
+    subscriber.take()
+    hub.publish()
+    assert subscriber.take() == (False, [])
+
+def test_slow_consumer_is_resynced(loop):
+    subscriber = Subscriber(loop, buffer_size=2)
+    subscriber.take()
+    for i in range(3):
+        subscriber.push(f"delta {i}")
+
+    assert subscriber.take() == (True, [])
+    assert subscriber.coalesced == 1
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.es_engine import ESEngine
+from backend.temporal import SignalHistory
+from tests.test_database import batch
+
+T0 = datetime.now().replace(microsecond=0) - timedelta(minutes=10)
+
+def feed(history, vibrations, machine="T-1", start=0):
+    """One reading per minute for `machine`, with the given vibrations"""
+    history.observe(batch([(machine, T0 + timedelta(minutes=start + i), 70.0 + 2 * (start + i), v, 10.0)
+                           for i, v in enumerate(vibrations)]))
+
+def test_persistence_counts_k_of_the_last_n():
+    history = SignalHistory(window=8)
+    feed(history, [90, 90, 40, 90, 40])
+    rows = history.rows(["T-1"])
+
+    assert history.persistence(rows, "vibration", ">", 80, 2, 3).tolist() == [False]  # 40, 90, 40
+    assert history.persistence(rows, "vibration", ">", 80, 3, 5).tolist() == [True]
+    assert history.persistence(rows, "vibration", ">", 80, 4, 8).tolist() == [False]  # only 5 readings exist
+
+def test_ring_wraps_around():
+    history = SignalHistory(window=4)
+    feed(history, [90] * 4 + [40] * 3)
+    rows = history.rows(["T-1"])
+    assert history.persistence(rows, "vibration", ">", 80, 1, 3).tolist() == [False]
+    assert history.persistence(rows, "vibration", ">", 80, 1, 4).tolist() == [True]
+    assert history.stats()["window"] == 4
+
+def test_rate_is_change_per_minute():
+    history = SignalHistory()
+    feed(history, [50, 50, 50])  # temperature climbs 2 per minute
+    rows = history.rows(["T-1", "T-unseen"])
+
+    rate = history.rate(rows, "temperature", 2)
+    assert rate[0] == 2.0 and np.isnan(rate[1])
+    assert np.isnan(history.rate(history.rows(["T-1"]), "temperature", 3)[0])  # not enough readings yet
+
+def test_empty_history():
+    history = SignalHistory()
+    assert history.persistence(np.array([0]), "power", ">", 1, 1, 1).tolist() == [False]
+    assert np.isnan(history.rate(np.array([0]), "power", 1)).all()
+
+def test_late_readings_are_ignored():
+    history = SignalHistory()
+    feed(history, [90, 90], start=5)
+    feed(history, [40, 40], start=0)  # older than what the rings already hold
+    rows = history.rows(["T-1"])
+    assert history.persistence(rows, "vibration", ">", 80, 2, 2).tolist() == [True]
+    assert history.filled[rows[0]] == 2
+
+def test_engine_evaluates_temporal_rules_against_history():
+    history = SignalHistory()
+    engine = ESEngine(history=history)
+    engine.set_rules([
+        {"when": {"signal": "vibration", "op": ">", "value": 80, "for": 3}, "diagnosis": "Sustained Vibration",
+         "action": "Inspect", "reasoning": "Vibration held", "confidence": 0.9},
+        {"when": {"rate": "temperature", "op": ">", "value": 1, "over": 2}, "diagnosis": "Heating Up",
+         "action": "Check cooling", "reasoning": "Rising temperature", "confidence": 0.8},
+    ])
+    feed(history, [90, 90, 90], machine="T-hot")
+    feed(history, [90, 40, 90], machine="T-spiky")
+    latest = batch([("T-hot", T0 + timedelta(minutes=2), 74, 90, 10), ("T-spiky", T0 + timedelta(minutes=2), 74, 90, 10)])
+
+    found = {(d.machine_id, d.condition) for d in engine.diagnose_batch(latest)}
+    assert found == {("T-hot", "Sustained Vibration"), ("T-hot", "Heating Up"), ("T-spiky", "Heating Up")}
+
+    # Without history, a window falls back to the current reading and a rate never fires
+    plain = ESEngine()
+    plain.set_rules(engine.rules)
+    assert {(d.machine_id, d.condition) for d in plain.diagnose_batch(latest)} == \
+        {("T-hot", "Sustained Vibration"), ("T-spiky", "Sustained Vibration")}
+
+def test_warm_start_refills_from_recent_readings(database):
+    now = datetime.now().replace(microsecond=0)
+    database.insert_columns(batch([("T-warm", now - timedelta(minutes=m), 70, 90, 10) for m in (3, 2, 1)]))
+    history = SignalHistory()
+    history.warm_start(database)
+    assert history.persistence(history.rows(["T-warm"]), "vibration", ">", 80, 3, 3).tolist() == [True]
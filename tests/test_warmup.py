@@ -0,0 +1,101 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import backend.simulator
+from backend.simulator import Simulator
+from backend.warmup import Warmup
+
+NOW = datetime(2026, 1, 2, 12, 0)
+
+class GapFill:
+    """Warmup source with the app's plant layout and a slow, stoppable history fill"""
+    def __init__(self, ticks=1000, fail=False):
+        self.ticks = ticks
+        self.fail = fail
+
+    def metadata(self):
+        return backend.simulator.simulator.metadata()
+
+    def ensure_history(self, progress, stop):
+        if self.fail:
+            raise RuntimeError("disk full")
+        for i in range(self.ticks):
+            if stop():
+                return i
+            progress(i + 1, self.ticks)
+            time.sleep(0.002)
+        return self.ticks
+
+class Ingest:
+    def __init__(self):
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+@pytest.fixture
+def history_db(database, monkeypatch):
+    monkeypatch.setattr(backend.simulator, "db", database)
+    return database
+
+def test_missing_ticks():
+    sim = Simulator(num_machines=1)
+    ticks = sim.missing_ticks(None, NOW)
+    assert len(ticks) == 83 and ticks == sorted(ticks)  # 23 hourly + 60 per-minute
+    assert ticks[0] == NOW - timedelta(hours=24) and ticks[-1] == NOW - timedelta(minutes=1)
+
+    assert sim.missing_ticks(NOW - timedelta(minutes=3), NOW) == [NOW - timedelta(minutes=2), NOW - timedelta(minutes=1)]
+    assert sim.missing_ticks(NOW, NOW) == []
+
+def test_backfill_stops_between_chunks(history_db, monkeypatch):
+    monkeypatch.setattr(backend.simulator, "BACKFILL_CHUNK_ROWS", 10)
+    sim = Simulator(num_machines=5, seed=1)
+    ticks = [NOW - timedelta(minutes=m) for m in range(10, 0, -1)]
+    seen = []
+
+    written = sim.backfill(ticks, progress=lambda done, total: seen.append((done, total)), stop=lambda: len(seen) == 2)
+    assert written == 4 and seen == [(2, 10), (4, 10)]
+    assert history_db.get_last_timestamp() == ticks[3]  # oldest first: no gap behind the stop
+
+def test_ensure_history_fills_only_the_gap(history_db):
+    sim = Simulator(num_machines=3, seed=1)
+    assert sim.ensure_history() == 83
+    assert sim.ensure_history() <= 1  # at most the minute that passed meanwhile
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_warmup_completes_then_starts_ingest(client):
+    ingest = Ingest()
+    warmup = Warmup(source=GapFill(ticks=5), ingest=ingest)
+    warmup.start()
+    warmup.join(timeout=10)
+    assert warmup.state == "ready" and ingest.started
+    assert warmup.stats()["ticks_written"] == 5 and warmup.stats()["elapsed_ms"] is not None
+
+def test_stopped_warmup_does_not_start_ingest(client):
+    ingest = Ingest()
+    warmup = Warmup(source=GapFill(), ingest=ingest)
+    warmup.start()
+    assert warmup.warming
+    wait_for(lambda: warmup.ticks_written > 0)
+
+    warmup.stop()
+    assert warmup.state == "stopped" and not ingest.started
+    assert 0 < warmup.stats()["ticks_written"] < 1000
+
+def test_failed_warmup_still_serves_live_data(client):
+    ingest = Ingest()
+    warmup = Warmup(source=GapFill(fail=True), ingest=ingest)
+    warmup.start()
+    warmup.join(timeout=10)
+    assert warmup.state == "failed" and warmup.error == "disk full" and ingest.started
+
+def test_status_endpoint(client):
+    body = client.get("/api/startup/status").json()
+    assert body["state"] == "ready" and body["phase"] is None